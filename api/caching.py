@@ -0,0 +1,102 @@
+"""Full-response cache for the read-only viewsets.
+
+Responses are cached as the bytes produced by the msgspec renderers, keyed by
+viewset, action, lookup kwargs, renderer format and the normalized query
+string. Every key also carries the global data version, so any admin edit
+invalidates all of them at once. The same version is used for ETag and
+Last-Modified, letting unchanged requests end in a 304 before any query.
+"""
+
+import hashlib
+import re
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
+
+from databruce import data_version
+from databruce.pagination import DatatablesRenderer, JSONRenderer
+
+DRAW_PATTERN = re.compile(rb'^\{"draw":-?\d+')
+
+
+class ResponseCacheMixin:
+    cache_timeout = 60 * 60 * 24
+
+    # DataTables sends a new draw counter and jQuery cache buster every request
+    cache_ignored_params = ("draw", "_")
+
+    # per-user attendance doesn't bump the data version, so never cache it
+    cache_bypass_params = ("user", "user_unseen", "user_rare")
+
+    @method_decorator(data_version.conditional)
+    def dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)  # type: ignore
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)  # type: ignore
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)  # type: ignore
+
+    def get_response_cache_key(self, request) -> str:
+        params = sorted(
+            (key, sorted(request.query_params.getlist(key)))
+            for key in request.query_params
+            if key not in self.cache_ignored_params
+        )
+
+        digest = hashlib.sha256(
+            urlencode(params, doseq=True).encode(),
+        ).hexdigest()
+
+        lookup = ",".join(
+            f"{key}={value}" for key, value in sorted(self.kwargs.items())
+        )  # type: ignore
+
+        return data_version.versioned_key(
+            "api",
+            type(self).__name__,
+            self.action,  # type: ignore
+            lookup,
+            request.accepted_renderer.format,
+            digest,
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+
+        if not isinstance(renderer, (JSONRenderer, DatatablesRenderer)) or any(
+            param in request.query_params for param in self.cache_bypass_params
+        ):
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+
+            if response.status_code != 200:  # noqa: PLR2004
+                return response
+
+            # render now so the bytes can be stored, DRF won't render it twice
+            response.accepted_renderer = renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()  # type: ignore
+            response.render()
+
+            cached = (response.content, response["Content-Type"])
+            cache.set(key, cached, self.cache_timeout)
+
+            return response
+
+        content, content_type = cached
+
+        draw = request.query_params.get("draw")
+
+        if draw is not None and draw.isdigit():
+            content = DRAW_PATTERN.sub(b'{"draw":' + draw.encode(), content, count=1)
+
+        return HttpResponse(content, content_type=content_type)
@@ -0,0 +1,129 @@
+"""Join cardinality of lookup paths.
+
+Filtering or ordering across a reverse foreign key or a many-to-many relation
+joins one row per related row, so the parent rows repeat. Rather than
+`SELECT DISTINCT` over every selected column, callers check whether a lookup
+actually crosses such a relation and, when it does, filter through a
+correlated `EXISTS` with `semi_join()`, which never repeats a row.
+
+Filters applied before, like a FilterSet's, may have joined such a relation
+already, `many_joins()` finds those in the queryset itself.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Exists, F, Max, Min, Model, OuterRef, Q, QuerySet, Subquery
+
+
+def walk(model: type[Model], path: str):
+    """Yield the fields along `path`, stopping at the first non-relation.
+
+    Anything after that is a transform or lookup, like `name__unaccent`.
+    """
+    parts = path.split("__")
+
+    for i, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)  # noqa: SLF001
+        except FieldDoesNotExist:
+            return
+
+        yield field
+
+        if i == len(parts) - 1 or not field.is_relation:
+            return
+
+        model = field.related_model  # type: ignore
+
+
+def get_final_field(model: type[Model], path: str):
+    """The last field `path` resolves to, None when it isn't a field."""
+    fields = list(walk(model, path))
+
+    # a relation followed by something that isn't one of its fields
+    if not fields or (fields[-1].is_relation and len(fields) < len(path.split("__"))):
+        return None
+
+    return fields[-1]
+
+
+def is_multivalued(model: type[Model], path: str) -> bool:
+    """Whether `path` joins a relation with many rows per row of `model`."""
+    return any(field.one_to_many or field.many_to_many for field in walk(model, path))
+
+
+def q_is_multivalued(model: type[Model], q: Q) -> bool:
+    """Whether filtering `model` on `q` can repeat rows.
+
+    Negated branches are left out, Django filters those through a subquery.
+    """
+    if q.negated:
+        return False
+
+    for child in q.children:
+        if isinstance(child, Q):
+            if q_is_multivalued(model, child):
+                return True
+        elif isinstance(child, tuple) and is_multivalued(model, child[0]):
+            return True
+
+    return False
+
+
+def many_joins(queryset: QuerySet) -> set:
+    """The to-many joins `queryset` already has, from filters applied to it.
+
+    For a reverse foreign key, and the first half of a many-to-many, the join
+    field is the relation's remote side, which is one-to-many.
+    """
+    return {
+        (join.table_name, join.join_field)
+        for join in queryset.query.alias_map.values()
+        if getattr(join, "join_field", None) is not None
+        and (join.join_field.one_to_many or join.join_field.many_to_many)
+    }
+
+
+def semi_join(queryset: QuerySet, filtered: QuerySet) -> QuerySet:
+    """The rows of `queryset` that are in `filtered`, each once."""
+    return queryset.filter(Exists(filtered.order_by().filter(pk=OuterRef("pk"))))
+
+
+def semi_join_base(base: QuerySet, queryset: QuerySet, filtered: QuerySet) -> QuerySet:
+    """`semi_join()` on `base`, `queryset` without the joins filters added to it.
+
+    The annotations the filters added, like a search rank, are read from the
+    matching row of `filtered`, and `queryset`'s ordering is kept.
+    """
+    rows = filtered.order_by().filter(pk=OuterRef("pk"))
+
+    joined = semi_join(base, filtered).annotate(
+        **{
+            name: Subquery(rows.values(name)[:1])
+            for name in queryset.query.annotations
+            if name not in base.query.annotations
+        },
+    )
+
+    if queryset.query.order_by:
+        return joined.order_by(*queryset.query.order_by)
+
+    return joined
+
+
+def order_value(model: type[Model], path: str, *, descending: bool = False):
+    """An ordering expression for `path` that doesn't repeat rows.
+
+    A multi-valued path orders by its lowest value, or its highest when
+    descending, taken per row in a subquery.
+    """
+    if not is_multivalued(model, path):
+        return F(path)
+
+    aggregate = Max if descending else Min
+
+    return Subquery(
+        model._base_manager.filter(pk=OuterRef("pk"))  # noqa: SLF001
+        .values("pk")
+        .annotate(value=aggregate(path))
+        .values("value")[:1],
+    )
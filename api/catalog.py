@@ -0,0 +1,78 @@
+"""Lazy, process-local lookup tables shared by the serializers.
+
+These replace maps that used to be built while `api.serializers` was being
+imported. Each catalog loads on first use and reloads after the global data
+version has been bumped, so admin edits show up without a restart.
+"""
+
+import datetime
+import threading
+from typing import NamedTuple
+
+from databruce import data_version, models
+from databruce.templatetags.filters import format_fuzzy
+
+
+class SongEntry(NamedTuple):
+    id: int
+    uuid: str
+    name: str
+    slug: str
+    original_artist: str
+    original: bool
+    category: str
+
+
+class LazyCatalog:
+    def __init__(self, loader) -> None:
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = {}
+
+    def load(self) -> dict:
+        version = data_version.get_version()
+
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._data = self.loader()
+                    self._version = version
+
+        return self._data
+
+
+def format_event_date(event_id: str, date) -> str:
+    """Event date as YYYY-MM-DD, falling back to the date in the event id."""
+    if not date:
+        date = datetime.datetime.strptime(format_fuzzy(event_id), "%Y-%m-%d")
+
+    return date.strftime("%Y-%m-%d")
+
+
+def load_songs() -> dict[int, SongEntry]:
+    return {
+        row[0]: SongEntry(row[0], str(row[1]), *row[2:])
+        for row in models.Songs.objects.values_list(
+            "id",
+            "uuid",
+            "name",
+            "slug",
+            "original_artist",
+            "original",
+            "category",
+        )
+    }
+
+
+songs = LazyCatalog(load_songs)
+
+
+def song_data(catalog: dict, song_id: int, fields: list[str]) -> dict | None:
+    """Serialize a catalog song with the given fields, like MinimalSongsSerializer."""
+    song = catalog.get(song_id)
+
+    if song is None:
+        return None
+
+    return {field: getattr(song, field) for field in fields}
@@ -0,0 +1,71 @@
+"""Streaming exports for the large read-only viewsets.
+
+`GET <list url>/export/?format=ndjson` (or `csv`) returns every row matching
+the request's filters as a `StreamingHttpResponse`. Rows are read through a
+server-side cursor in chunks of `export_chunk_size`, serialized and encoded one
+chunk at a time, so memory stays flat however many rows match. The stream is
+read inside one transaction, which keeps the cursor on one server connection
+behind a transaction pooler. Unlike `list`, exports aren't paginated or cached.
+"""
+
+from itertools import batched
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+
+from databruce.pagination import CSVRenderer, NDJSONRenderer, get_columns
+
+
+class StreamingExportMixin:
+    export_chunk_size = 2000
+
+    def get_export_queryset(self):
+        return self.filter_queryset(self.get_queryset())  # type: ignore
+
+    def get_export_columns(self) -> list[str]:
+        serializer = self.get_serializer_class()(  # type: ignore
+            context=self.get_serializer_context(),  # type: ignore
+        )
+
+        return get_columns(serializer.fields)
+
+    def export_chunks(self, queryset):
+        """Serialized rows, one list per chunk of the server-side cursor.
+
+        A server-side cursor only lives as long as its transaction. Without
+        one, each fetch runs in its own transaction, and a pooler in
+        transaction mode (Supabase's on port 6543) can hand those to
+        different server connections. So the whole stream is read in one.
+        """
+        context = self.get_serializer_context()  # type: ignore
+        serializer_class = self.get_serializer_class()  # type: ignore
+
+        with transaction.atomic(using=queryset.db):
+            # prefetch_related is applied per chunk when a chunk size is given
+            rows = queryset.iterator(chunk_size=self.export_chunk_size)
+
+            for chunk in batched(rows, self.export_chunk_size):
+                yield serializer_class(chunk, many=True, context=context).data
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+        pagination_class=None,
+    )
+    def export(self, request, *args, **kwargs):  # noqa: ARG002
+        renderer = request.accepted_renderer
+        queryset = self.get_export_queryset()
+
+        response = StreamingHttpResponse(
+            renderer.stream(self.export_chunks(queryset), self.get_export_columns()),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.basename}.{renderer.format}"'  # type: ignore
+        )
+
+        return response
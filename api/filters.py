@@ -2,12 +2,7 @@ import datetime
 import re
 
 from dateutil import parser
-from django.contrib.postgres.search import (
-    SearchQuery,
-    SearchRank,
-    SearchVector,
-)
-from django.core.exceptions import FieldDoesNotExist
+from django.contrib.postgres.search import SearchQuery, SearchRank
 from django.db.models import (
     Case,
     CharField,
@@ -25,7 +20,8 @@ from rest_framework.filters import BaseFilterBackend
 from rest_framework.request import Request
 from rest_framework.views import APIView
 
-from databruce import models
+from api import cardinality, searchbuilder
+from databruce import models, trigram
 
 VALID_SET_NAMES = [
     "Show",
@@ -68,64 +64,27 @@ class NotEqualFilterBackend(BaseFilterBackend):
 
 
 class DataTablesFilterBackend(BaseFilterBackend):
-    def get_sb_filter(
-        self,
-        column: str | None,
-        condition: str | None,
-        value: str | None,
-        value2: str | None,
-        sb_type: str | None,
-    ) -> Q | None:
-        filter_types = {
-            "=": Q(**{f"{column}__iexact": value}),
-            "!=": ~Q(**{f"{column}__iexact": value}),
-            "starts": Q(**{f"{column}__istartswith": value}),
-            "!starts": ~Q(**{f"{column}__istartswith": value}),
-            "contains": Q(**{f"{column}__icontains": value}),
-            "!contains": ~Q(**{f"{column}__icontains": value}),
-            "ends": Q(**{f"{column}__iendswith": value}),
-            "!ends": ~Q(**{f"{column}__iendswith": value}),
-            "null": Q(**{f"{column}__exact": ""}) | Q(**{f"{column}__isnull": True}),
-            "!null": ~Q(**{f"{column}__exact": ""}) & Q(**{f"{column}__isnull": False}),
-            "<": Q(**{f"{column}__lt": value}),
-            "<=": Q(**{f"{column}__lte": value}),
-            ">=": Q(**{f"{column}__gte": value}),
-            ">": Q(**{f"{column}__gt": value}),
-            "between": Q(**{f"{column}__gte": value}) & Q(**{f"{column}__lte": value2}),
-            "!between": ~Q(
-                Q(**{f"{column}__gte": value}) & Q(**{f"{column}__lte": value2}),
-            ),
-        }
-
-        if sb_type == "num":
-            filter_types["null"] = Q(**{f"{column}__isnull": True})
-            filter_types["!null"] = Q(**{f"{column}__isnull": False})
-
-        if sb_type == "boolean":
-            filter_types["null"] = Q(**{f"{column}": False})
-            filter_types["!null"] = Q(**{f"{column}": True})
-
-        if condition:
-            return filter_types.get(condition)
-
-        return None
+    # trigram-indexed equivalents of the search lookups, see databruce.trigram
+    trigram_lookups = {"icontains": "search_contains", "iregex": "search_regex"}
+    use_trigram_indexes = True
 
     def get_final_field(self, model: Model, path: str):
         """Traverses the model __ path and returns the final Django field object."""
-        parts = path.split("__")
+        return cardinality.get_final_field(model, path)
 
-        for i, part in enumerate(parts):
-            try:
-                field = model._meta.get_field(part)  # noqa: SLF001
-                # If there are more parts and this is a relation, move to the next model
-                if i < len(parts) - 1 and field.is_relation:
-                    model = field.related_model  # type: ignore
-                else:
-                    return field
-            except FieldDoesNotExist:
-                return None
+    def get_search_lookup(self, model: Model, field: str, search_type: str) -> str:
+        field_obj = self.get_final_field(model, field)
 
-        return None
+        if not isinstance(field_obj, (CharField, TextField)):
+            return f"{field}__{search_type}"
+
+        # use the trigram index when the model declares one for this field
+        if self.use_trigram_indexes and field_obj.name in trigram.indexed_fields(
+            field_obj.model,
+        ):
+            return f"{field}__{self.trigram_lookups[search_type]}"
+
+        return f"{field}__unaccent__{search_type}"
 
     def get_param(self, request: Request, param: str, default=None) -> str | None:
         return request.query_params.get(param, default)
@@ -137,7 +96,7 @@ class DataTablesFilterBackend(BaseFilterBackend):
         ret["search_regex"] = self.get_param(request, "search[regex]") == "true"
         return ret
 
-    def get_ordering_fields(self, request, view, fields):
+    def get_ordering_fields(self, request, view, fields, model=None):
         order_list = []
         i = 0
 
@@ -157,11 +116,21 @@ class DataTablesFilterBackend(BaseFilterBackend):
                 i += 1
                 continue
 
-            direction = self.get_param(request, f"{col}[dir]", "asc")
-            order = F(f"{field['order_value']}").asc(nulls_last=True)
+            descending = self.get_param(request, f"{col}[dir]", "asc") == "desc"
+            value = F(field["order_value"])
+
+            # a to-many column orders by one value per row instead of repeating rows
+            if model is not None:
+                value = cardinality.order_value(
+                    model,
+                    field["order_value"],
+                    descending=descending,
+                )
+
+            order = value.asc(nulls_last=True)
 
-            if direction == "desc":
-                order = F(f"{field['order_value']}").desc(nulls_last=True)
+            if descending:
+                order = value.desc(nulls_last=True)
 
             order_list.append(order)
             i += 1
@@ -250,17 +219,7 @@ class DataTablesFilterBackend(BaseFilterBackend):
                 is_filtered = True
 
                 for field in config["name"]:
-                    lookup = f"{field}__{search_type}"
-
-                    try:
-                        field_obj = self.get_final_field(queryset.model, field)
-
-                        if isinstance(field_obj, (CharField, TextField)):
-                            lookup = f"{field}__unaccent__{search_type}"
-
-                    except FieldDoesNotExist:
-                        continue
-
+                    lookup = self.get_search_lookup(queryset.model, field, search_type)
                     global_q |= Q(**{lookup: search_value})
 
             if config["search_value"]:
@@ -270,77 +229,110 @@ class DataTablesFilterBackend(BaseFilterBackend):
                     search_type = "iregex"
 
                 for field in config["name"]:
-                    lookup = f"{field}__{search_type}"
+                    lookup = self.get_search_lookup(queryset.model, field, search_type)
+                    column_q &= Q(**{lookup: config["search_value"]})
 
-                    try:
-                        field_obj = self.get_final_field(queryset.model, field)
+        # --- 3. ORDERING LOGIC ---
+        order_list = self.get_ordering_fields(
+            request,
+            view,
+            fields,
+            model=queryset.model,
+        )
 
-                        if isinstance(field_obj, (CharField, TextField)):
-                            lookup = f"{field}__unaccent__{search_type}"
+        plan = self.get_searchbuilder_plan(request, queryset, view, fields)
 
-                    except FieldDoesNotExist:
-                        continue
+        filtered = queryset
+        search_q = global_q & column_q
 
-                    column_q &= Q(**{lookup: config["search_value"]})
+        if is_filtered:
+            filtered = filtered.filter(search_q)
 
-        # --- 3. ORDERING LOGIC ---
-        order_list = self.get_ordering_fields(request, view, fields)
+        if plan is not None:
+            filtered = filtered.filter(plan.q)
 
-        sb_index = 0
-        sb_filter = Q()
+        base = self.get_unjoined_queryset(queryset, view)
 
-        # searchbuilder
-        while True:
-            searchbuilder_prefix = f"searchBuilder[criteria][{sb_index}]"
+        # rows only repeat when a filter joins a to-many relation, which is then
+        # matched through EXISTS rather than a DISTINCT over every column
+        if base is not None:
+            queryset = cardinality.semi_join_base(base, queryset, filtered)
+        elif (
+            is_filtered and cardinality.q_is_multivalued(queryset.model, search_q)
+        ) or (plan is not None and plan.multivalued):
+            queryset = cardinality.semi_join(queryset, filtered)
+        else:
+            queryset = filtered
 
-            col_idx_param = self.get_param(
-                request,
-                f"{searchbuilder_prefix}[origData]",
-            )
+        if order_list:
+            return queryset.order_by(*order_list)
 
-            criteria = self.get_param(request, "searchBuilder[logic]")
+        return queryset
 
-            if not criteria:
-                break
+    def get_unjoined_queryset(
+        self,
+        queryset: QuerySet,
+        view: APIView,
+    ) -> QuerySet | None:
+        """The view's queryset when an earlier filter joined a to-many relation.
 
-            if col_idx_param is None:
-                break
+        The filters before this one, like the `EventsFilter` on `?relation=`,
+        can join the onstage or setlist rows, so the incoming queryset repeats
+        its rows. Semi-joining it wouldn't help, it keeps those joins, so the
+        view's own queryset, without them, is filtered instead.
+        """
+        # grouped rows don't repeat, and a sliced queryset can't be filtered
+        if queryset.query.group_by is not None or queryset.query.is_sliced:
+            return None
 
-            name = next(c for c in fields if c["data"] == col_idx_param)
-
-            for field in name["name"]:
-                sb_field_filter = self.get_sb_filter(
-                    column=field,
-                    condition=self.get_param(
-                        request,
-                        f"{searchbuilder_prefix}[condition]",
-                    ),
-                    value=self.get_param(request, f"{searchbuilder_prefix}[value1]"),
-                    value2=self.get_param(request, f"{searchbuilder_prefix}[value2]"),
-                    sb_type=self.get_param(
-                        request,
-                        f"{searchbuilder_prefix}[type]",
-                        "text",
-                    ),
-                )
+        joins = cardinality.many_joins(queryset)
 
-                if criteria == "OR":
-                    sb_filter |= sb_field_filter
-                else:
-                    sb_filter &= sb_field_filter
+        if not joins:
+            return None
 
-            sb_index += 1
+        base = view.get_queryset()
 
-        if is_filtered:
-            queryset = queryset.filter(global_q & column_q)
+        if joins <= cardinality.many_joins(base):
+            return None
 
-        if sb_filter:
-            queryset = queryset.filter(sb_filter)
+        return base
 
-        if order_list:
-            return queryset.order_by(*order_list).distinct()
+    def get_searchbuilder_plan(
+        self,
+        request: Request,
+        queryset: QuerySet,
+        view: APIView,
+        fields: list[dict],
+    ) -> searchbuilder.Plan | None:
+        """The compiled SearchBuilder criteria, None when there are none.
+
+        The report of the plan is kept on the request for the X-Search-Plan
+        debug header, see `DatatablesLimitOffsetPagination`.
+        """
+        group = searchbuilder.parse_criteria(
+            request.query_params,
+            {field["data"]: tuple(field["name"]) for field in fields},
+        )
 
-        return queryset
+        if group is None:
+            return None
+
+        searchbuilder.validate_paths(group, getattr(view, "searchbuilder_fields", None))
+
+        plan, cached = searchbuilder.get_plan(
+            queryset.model,
+            group,
+            use_trigram=self.use_trigram_indexes,
+        )
+
+        request.search_plan = {
+            "key": plan.key[:16],
+            "cache": "hit" if cached else "miss",
+            "multivalued": plan.multivalued,
+            "lookups": plan.lookups,
+        }
+
+        return plan
 
 
 class ArchiveFilter(filters.FilterSet):
@@ -596,16 +588,8 @@ class EventsFilter(filters.FilterSet):
 
         query = SearchQuery(value, search_type="websearch")
 
-        vector = (
-            SearchVector("event_id", weight="B")
-            + SearchVector("date", weight="A")
-            + SearchVector("date__day", weight="B")
-            + SearchVector("early_late", weight="B")
-            + SearchVector("artist__name", weight="C")
-            + SearchVector("venue__name", weight="B")
-            + SearchVector("venue__city__name", weight="B")
-            + SearchVector("run__name", weight="D")
-        )
+        # weighted and kept up to date by databruce.search_documents
+        vector = F("search_document__document")
 
         # If the user provided a full exact date, boost it to the very top (similar to Event ID)
         exact_date_match = Q()
@@ -626,14 +610,15 @@ class EventsFilter(filters.FilterSet):
 
         return (
             queryset.annotate(
-                search=vector,
                 rank=Case(
                     *ranking_cases,  # Unpack the valid cases here safely
                     default=SearchRank(vector, query, weights=[0.1, 0.3, 0.6, 1.0]),
                 ),
             )
             .filter(
-                Q(event_id__startswith=str(value)) | date_conditions | Q(search=query),
+                Q(event_id__startswith=str(value))
+                | date_conditions
+                | Q(search_document__document=query),
                 rank__gt=0.1,
             )
             .order_by("event_id")[:25]
@@ -994,6 +979,30 @@ class SetlistStatsFilter(filters.FilterSet):
         fields = "__all__"
 
 
+class SetlistPlayStatsFilter(filters.FilterSet):
+    event = filters.NumberFilter(
+        field_name="event_id",
+        lookup_expr="exact",
+        label="event",
+    )
+
+    song = filters.NumberFilter(
+        field_name="song_id",
+        lookup_expr="exact",
+        label="song",
+    )
+
+    tour = filters.NumberFilter(
+        field_name="tour_id",
+        lookup_expr="exact",
+        label="tour",
+    )
+
+    class Meta:
+        model = models.SetlistPlayStats
+        fields = ["event", "song", "tour"]
+
+
 class SetlistFilter(filters.FilterSet):
     event = filters.NumberFilter(
         field_name="event_id",
@@ -1322,7 +1331,7 @@ class SetlistNoteFilter(filters.FilterSet):
         lookup_expr="exact",
         label="event_id",
     )
-    note = filters.CharFilter(lookup_expr="icontains")
+    note = filters.CharFilter(lookup_expr="search_contains")
 
 
 class UserAttendedShowsFilter(filters.FilterSet):
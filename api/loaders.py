@@ -0,0 +1,154 @@
+"""Batched lookups for serializer fields.
+
+A `BatchedField` names a `Loader` and reads an id from each row. When the
+serializer is used with `many=True` through `BatchListSerializer`, the ids of
+every row on the page are collected first and each loader fetches them with
+one query, so a page costs one query per related model however many rows it
+has. A serializer opts in with `list_serializer_class = BatchListSerializer`
+in its `Meta`.
+
+Loaders for rows that don't change between requests, like songs and events,
+memoize what they fetch per process until the global data version is bumped,
+the same way the catalogs in `api.catalog` do.
+"""
+
+import threading
+from typing import NamedTuple
+
+from django.db.models.manager import BaseManager
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+
+from api import catalog
+from databruce import data_version, models
+
+
+class EventEntry(NamedTuple):
+    event_id: str
+    date: str
+
+
+class Loader:
+    """Resolves ids to values with `fetch(ids) -> {id: value}`."""
+
+    def __init__(self, fetch, *, memoize: bool = False) -> None:
+        self.fetch = fetch
+        self.memoize = memoize
+        self._lock = threading.Lock()
+        self._version = None
+        self._memo = {}
+
+    def __deepcopy__(self, memo) -> "Loader":
+        # DRF deep copies declared fields with their arguments, the memo is shared
+        return self
+
+    def get_memo(self) -> dict:
+        version = data_version.get_version()
+
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._memo = {}
+                    self._version = version
+
+        return self._memo
+
+    def load_many(self, ids) -> dict:
+        ids = {pk for pk in ids if pk is not None}
+
+        if not self.memoize:
+            return self.fetch(ids) if ids else {}
+
+        memo = self.get_memo()
+        missing = ids - memo.keys()
+
+        if missing:
+            fetched = self.fetch(missing)
+
+            with self._lock:
+                memo.update(fetched)
+
+        return memo
+
+
+class BatchedField(serializers.Field):
+    """A read-only field resolved through `loader`.
+
+    `attributes` picks what to return from the loaded value, which is
+    returned as is otherwise.
+    """
+
+    def __init__(
+        self,
+        loader: Loader,
+        attributes: list[str] | None = None,
+        **kwargs,
+    ) -> None:
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+        self.loader = loader
+        self.attributes = attributes
+        self.page = None
+
+    def prime(self, instances) -> None:
+        """Load the ids of every row on the page at once."""
+        ids = []
+
+        for instance in instances:
+            try:
+                ids.append(self.get_attribute(instance))
+            except SkipField:
+                continue
+
+        self.page = self.loader.load_many(ids)
+
+    def to_representation(self, value):
+        page = self.page if self.page is not None else self.loader.load_many([value])
+        loaded = page.get(value)
+
+        if loaded is None or self.attributes is None:
+            return loaded
+
+        return {name: getattr(loaded, name) for name in self.attributes}
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    """Primes the child's batched fields with the whole page before rendering."""
+
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, BaseManager) else data)
+
+        for field in self.child._readable_fields:  # noqa: SLF001
+            if isinstance(field, BatchedField):
+                field.prime(instances)
+
+        return super().to_representation(instances)
+
+
+def fetch_songs(ids) -> dict[int, catalog.SongEntry]:
+    return {
+        row[0]: catalog.SongEntry(row[0], str(row[1]), *row[2:])
+        for row in models.Songs.objects.filter(id__in=ids).values_list(
+            "id",
+            "uuid",
+            "name",
+            "slug",
+            "original_artist",
+            "original",
+            "category",
+        )
+    }
+
+
+def fetch_events(ids) -> dict[str, EventEntry]:
+    return {
+        event_id: EventEntry(event_id, catalog.format_event_date(event_id, date))
+        for event_id, date in models.Events.objects.filter(
+            event_id__in=ids,
+        ).values_list("event_id", "date")
+    }
+
+
+songs = Loader(fetch_songs, memoize=True)
+events = Loader(fetch_events, memoize=True)
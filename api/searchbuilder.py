@@ -0,0 +1,382 @@
+"""Compiles DataTables SearchBuilder criteria into a single `Q`.
+
+SearchBuilder sends its criteria as nested params, such as
+`searchBuilder[criteria][0][criteria][1][condition]`. `parse_criteria()` reads
+the whole tree, nested groups included, into `Group` and `Criterion` tuples.
+Each criterion's column is resolved to the request's `columns[i][name]` paths,
+which have to be in the view's `searchbuilder_fields`, the columns its tables
+show. Views that don't declare them can't be searched with SearchBuilder, so
+no criterion can reach a field the tables don't show, like a user's password.
+
+Compiled plans are cached per process under a hash of the model and the
+normalized tree. A plan records the lookups it uses and whether any of them
+crosses a to-many relation, see `api.cardinality`.
+"""
+
+import functools
+import hashlib
+import re
+from typing import NamedTuple
+
+from django.db.models import CharField, Q, TextField
+from rest_framework.exceptions import ValidationError
+
+from api import cardinality
+from databruce import trigram
+
+PARAM = "searchBuilder"
+PARAM_PARTS = re.compile(r"\[([^\]]*)\]")
+
+LOGIC = ("AND", "OR")
+
+# SearchBuilder condition -> lookup, "!" negates
+LOOKUPS = {
+    "=": "iexact",
+    "starts": "istartswith",
+    "contains": "icontains",
+    "ends": "iendswith",
+    "<": "lt",
+    "<=": "lte",
+    ">=": "gte",
+    ">": "gt",
+}
+
+CONDITIONS = frozenset(
+    [
+        *LOOKUPS,
+        "!=",
+        "!starts",
+        "!contains",
+        "!ends",
+        "null",
+        "!null",
+        "between",
+        "!between",
+    ],
+)
+
+NUM_TYPES = frozenset(["num", "num-fmt", "html-num", "html-num-fmt"])
+
+MAX_DEPTH = 4
+MAX_CRITERIA = 50
+MAX_PLANS = 512
+
+plans = {}
+
+
+class Criterion(NamedTuple):
+    paths: tuple[str, ...]
+    condition: str
+    type: str
+    value1: str | None
+    value2: str | None
+
+
+class Group(NamedTuple):
+    logic: str
+    children: tuple
+
+
+class Plan(NamedTuple):
+    q: Q
+    multivalued: bool
+    lookups: tuple[str, ...]
+    key: str
+
+
+def invalid(message: str) -> ValidationError:
+    return ValidationError({PARAM: message})
+
+
+@functools.lru_cache(maxsize=1024)
+def resolve_path(model, path: str):
+    """The field `path` ends at, None unless every part of it is a field."""
+    fields = list(cardinality.walk(model, path))
+
+    if len(fields) != len(path.split("__")):
+        return None
+
+    return fields[-1]
+
+
+def read_params(params) -> dict:
+    """The `searchBuilder[...]` params as nested dicts."""
+    tree = {}
+
+    for key in params:
+        if not key.startswith(f"{PARAM}["):
+            continue
+
+        parts = PARAM_PARTS.findall(key[len(PARAM) :])
+
+        if not parts or parts == [""]:
+            msg = f"malformed parameter {key}"
+            raise invalid(msg)
+
+        if parts[-1] == "":
+            parts = parts[:-1]
+            value = params.getlist(key)
+        else:
+            value = params.get(key)
+
+        node = tree
+
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+
+            if not isinstance(node, dict):
+                msg = f"malformed parameter {key}"
+                raise invalid(msg)
+
+        node[parts[-1]] = value
+
+    return tree
+
+
+def build_criterion(node: dict, columns: dict) -> Criterion | None:
+    condition = node.get("condition")
+
+    # SearchBuilder sends criteria while they are still being filled in
+    if not condition:
+        return None
+
+    if condition not in CONDITIONS:
+        msg = f"unknown condition {condition!r}"
+        raise invalid(msg)
+
+    column = node.get("origData") or node.get("data")
+
+    if column not in columns:
+        msg = f"unknown column {column!r}"
+        raise invalid(msg)
+
+    values = node.get("value") or []
+
+    if not isinstance(values, list):
+        values = [values]
+
+    value1 = node.get("value1", values[0] if values else None)
+    value2 = node.get("value2", values[1] if len(values) > 1 else None)
+
+    if condition not in ("null", "!null") and value1 in (None, ""):
+        return None
+
+    if condition in ("between", "!between") and value2 in (None, ""):
+        return None
+
+    return Criterion(
+        columns[column],
+        condition,
+        node.get("type") or "text",
+        value1,
+        value2,
+    )
+
+
+def build_group(node: dict, columns: dict, depth: int = 0) -> Group | None:
+    if depth > MAX_DEPTH:
+        msg = f"groups can't be nested more than {MAX_DEPTH} deep"
+        raise invalid(msg)
+
+    logic = (node.get("logic") or "AND").upper()
+
+    if logic not in LOGIC:
+        msg = f"unknown logic {logic!r}"
+        raise invalid(msg)
+
+    criteria = node.get("criteria") or {}
+
+    if not isinstance(criteria, dict) or not all(i.isdigit() for i in criteria):
+        msg = "malformed criteria"
+        raise invalid(msg)
+
+    children = []
+
+    for index in sorted(criteria, key=int):
+        child = criteria[index]
+
+        if not isinstance(child, dict):
+            msg = "malformed criteria"
+            raise invalid(msg)
+
+        if "criteria" in child:
+            built = build_group(child, columns, depth + 1)
+        else:
+            built = build_criterion(child, columns)
+
+        if built is not None:
+            children.append(built)
+
+    if not children:
+        return None
+
+    return Group(logic, tuple(children))
+
+
+def count_criteria(group: Group) -> int:
+    return sum(
+        count_criteria(child) if isinstance(child, Group) else 1
+        for child in group.children
+    )
+
+
+def parse_criteria(params, columns: dict) -> Group | None:
+    """The SearchBuilder tree in `params`, None when there are no criteria.
+
+    `columns` maps each column's `data` to the field paths it searches.
+    """
+    tree = read_params(params)
+
+    if not tree:
+        return None
+
+    group = build_group(tree, columns)
+
+    if group is not None and count_criteria(group) > MAX_CRITERIA:
+        msg = f"at most {MAX_CRITERIA} criteria are allowed"
+        raise invalid(msg)
+
+    return group
+
+
+def get_paths(group: Group):
+    for child in group.children:
+        if isinstance(child, Group):
+            yield from get_paths(child)
+        else:
+            yield from child.paths
+
+
+def validate_paths(group: Group, allowed) -> None:
+    """Check every path against `allowed`, None allows none of them."""
+    for path in get_paths(group):
+        if allowed is None or path not in allowed:
+            msg = f"{path!r} can't be searched"
+            raise invalid(msg)
+
+
+def get_lookup(model, path: str, condition: str, *, use_trigram: bool) -> str:
+    lookup = LOOKUPS[condition]
+
+    if lookup == "icontains" and use_trigram:
+        field = resolve_path(model, path)
+
+        # use the trigram index when the model declares one for this field
+        if isinstance(field, (CharField, TextField)) and field.name in (
+            trigram.indexed_fields(field.model)
+        ):
+            return f"{path}__search_contains"
+
+    return f"{path}__{lookup}"
+
+
+def compile_null(model, path: str, sb_type: str) -> Q:
+    if sb_type == "boolean":
+        return Q(**{path: False})
+
+    field = resolve_path(model, path)
+
+    if sb_type in NUM_TYPES or (field is not None and not field.empty_strings_allowed):
+        return Q(**{f"{path}__isnull": True})
+
+    return Q(**{f"{path}__exact": ""}) | Q(**{f"{path}__isnull": True})
+
+
+def compile_not_null(model, path: str, sb_type: str) -> Q:
+    if sb_type == "boolean":
+        return Q(**{path: True})
+
+    field = resolve_path(model, path)
+
+    if sb_type in NUM_TYPES or (field is not None and not field.empty_strings_allowed):
+        return Q(**{f"{path}__isnull": False})
+
+    return ~Q(**{f"{path}__exact": ""}) & Q(**{f"{path}__isnull": False})
+
+
+def compile_condition(
+    model,
+    path: str,
+    criterion: Criterion,
+    *,
+    use_trigram: bool,
+) -> Q:
+    condition = criterion.condition
+
+    if condition == "null":
+        return compile_null(model, path, criterion.type)
+
+    if condition == "!null":
+        return compile_not_null(model, path, criterion.type)
+
+    if condition in ("between", "!between"):
+        q = Q(**{f"{path}__gte": criterion.value1}) & Q(
+            **{f"{path}__lte": criterion.value2},
+        )
+        return ~q if condition == "!between" else q
+
+    negated = condition.startswith("!")
+    base = "=" if condition == "!=" else condition.removeprefix("!")
+
+    q = Q(
+        **{get_lookup(model, path, base, use_trigram=use_trigram): criterion.value1},
+    )
+
+    return ~q if negated else q
+
+
+def get_lookups(q: Q):
+    for child in q.children:
+        if isinstance(child, Q):
+            yield from get_lookups(child)
+        else:
+            yield child[0]
+
+
+def compile_group(model, group: Group, lookups: list, *, use_trigram: bool) -> Q:
+    combined = Q()
+
+    for child in group.children:
+        if isinstance(child, Group):
+            q = compile_group(model, child, lookups, use_trigram=use_trigram)
+        else:
+            q = Q()
+
+            # a column searching several fields matches them with the group's logic
+            for path in child.paths:
+                part = compile_condition(model, path, child, use_trigram=use_trigram)
+                lookups.extend(get_lookups(part))
+                q = q | part if group.logic == "OR" else q & part
+
+        combined = combined | q if group.logic == "OR" else combined & q
+
+    return combined
+
+
+def get_plan(model, group: Group, *, use_trigram: bool = True) -> tuple[Plan, bool]:
+    """The compiled plan for `group`, and whether it came from the cache."""
+    key = hashlib.sha256(
+        repr((model._meta.label, group, use_trigram)).encode(),  # noqa: SLF001
+    ).hexdigest()
+
+    plan = plans.get(key)
+
+    if plan is not None:
+        return plan, True
+
+    lookups = []
+    q = compile_group(model, group, lookups, use_trigram=use_trigram)
+
+    plan = Plan(
+        q,
+        cardinality.q_is_multivalued(model, q),
+        tuple(dict.fromkeys(lookups)),
+        key,
+    )
+
+    if len(plans) >= MAX_PLANS:
+        plans.pop(next(iter(plans)))
+
+    plans[key] = plan
+
+    return plan, False
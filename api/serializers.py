@@ -1,11 +1,14 @@
-import datetime
+import copy
+from functools import cached_property
+from typing import ClassVar
 from zoneinfo import ZoneInfo
 
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from api import catalog, loaders
+from api.loaders import BatchedField, BatchListSerializer
 from databruce import models
-from databruce.templatetags.filters import format_fuzzy
 
 UserModel = get_user_model()
 VALID_SET_NAMES = [
@@ -17,6 +20,10 @@ VALID_SET_NAMES = [
     "Post-Show",
 ]
 
+# the song and event shapes returned by the batched fields
+SONG_ATTRIBUTES = ["name", "category", "uuid", "original"]
+EVENT_ATTRIBUTES = ["date", "event_id"]
+
 
 def get_date_from_instance(obj):
     """Get event date from instance, creating date from id if needed."""
@@ -26,10 +33,7 @@ def get_date_from_instance(obj):
     if event_id is None:
         return None
 
-    if not date:
-        date = datetime.datetime.strptime(format_fuzzy(event_id), "%Y-%m-%d")
-
-    return date.strftime("%Y-%m-%d")
+    return catalog.format_event_date(event_id, date)
 
 
 def get_formatted_city(obj):
@@ -46,23 +50,49 @@ def get_formatted_city(obj):
 
 
 class BaseSerializer(serializers.ModelSerializer):
+    # unbound fields per (class, include, exclude), built once per process
+    field_plans: ClassVar[dict] = {}
+    use_field_plans = True
+
     def __init__(self, *args, **kwargs) -> None:
         # Don't pass 'fields' up to the superclass
         include = kwargs.pop("include", None)
         exclude = kwargs.pop("exclude", None)
         super().__init__(*args, **kwargs)
 
+        self.plan_key = (
+            type(self),
+            None if include is None else frozenset(include),
+            None if exclude is None else frozenset(exclude),
+        )
+
+    def build_field_plan(self) -> dict:
+        fields = super().get_fields()
+        _, include, exclude = self.plan_key
+
         if include is not None:
             # Drop any fields that are not specified in the 'fields' argument
-            allowed = set(include)
-            existing = set(self.fields)
-            for field_name in existing - allowed:
-                self.fields.pop(field_name)
+            fields = {name: field for name, field in fields.items() if name in include}
 
         if exclude is not None:
             # Drop any fields specifically specified in the 'exclude' argument
-            for field_name in exclude:
-                self.fields.pop(field_name, None)
+            fields = {
+                name: field for name, field in fields.items() if name not in exclude
+            }
+
+        return fields
+
+    def get_fields(self) -> dict:
+        if not self.use_field_plans:
+            return self.build_field_plan()
+
+        plan = self.field_plans.get(self.plan_key)
+
+        if plan is None:
+            plan = self.field_plans.setdefault(self.plan_key, self.build_field_plan())
+
+        # fields are bound to their serializer, so each instance gets copies
+        return copy.deepcopy(plan)
 
 
 class MinimalStatesSerializer(BaseSerializer):
@@ -495,7 +525,7 @@ class EventsSerializer(BaseSerializer):
             return None
 
     leg = serializers.CharField(required=False, source="leg.name", max_length=255)
-    has_setlist = serializers.SerializerMethodField()
+    has_setlist = serializers.BooleanField(read_only=True)
 
     rank = serializers.IntegerField(required=False)
     event_status = serializers.BooleanField(required=False)
@@ -515,9 +545,6 @@ class EventsSerializer(BaseSerializer):
         required=False,
     )
 
-    def get_has_setlist(self, obj):
-        return bool(obj.setlist_event.exists())
-
     def get_date(self, obj):
         return get_date_from_instance(obj)
 
@@ -561,7 +588,7 @@ class AdvSearchSerializer(BaseSerializer):
         return get_formatted_city(obj.venue.city)
 
     leg = serializers.CharField(required=False, source="leg.name", max_length=255)
-    has_setlist = serializers.SerializerMethodField()
+    has_setlist = serializers.BooleanField(read_only=True)
 
     type = TypesSerializer(many=True, required=False)
     tags = TagsSerializer(many=True, required=False)
@@ -589,9 +616,6 @@ class AdvSearchSerializer(BaseSerializer):
         include=["song", "notes", "set_name", "debut", "premiere", "nobruce", "segue"],
     )
 
-    def get_has_setlist(self, obj):
-        return bool(obj.setlist_event.exists())
-
     def get_date(self, obj):
         return get_date_from_instance(obj)
 
@@ -725,6 +749,8 @@ class SongsSerializer(BaseSerializer):
     first_event = MinimalEventSerializer()
     last_event = MinimalEventSerializer()
     has_lyrics = serializers.SerializerMethodField(required=False)
+    show_gap = serializers.IntegerField(source="stats.show_gap", required=False)
+    frequency = serializers.FloatField(source="stats.frequency", required=False)
 
     def get_has_lyrics(self, obj):
         return obj.lyrics_song.exists()
@@ -743,6 +769,8 @@ class SongsSerializer(BaseSerializer):
             "closer",
             "category",
             "has_lyrics",
+            "show_gap",
+            "frequency",
             "sort_song_name",
             "uuid",
             "slug",
@@ -758,6 +786,17 @@ class SetlistStatsSerializer(BaseSerializer):
         fields = "__all__"
 
 
+class SetlistPlayStatsSerializer(BaseSerializer):
+    event = MinimalEventSerializer()
+    song = MinimalSongsSerializer(include=["name", "uuid", "slug"])
+    tour = MinimalToursSerializer()
+    ltp = MinimalEventSerializer(required=False)
+
+    class Meta:
+        model = models.SetlistPlayStats
+        fields = "__all__"
+
+
 class SetlistMobileSerializer(BaseSerializer):
     song = MinimalSongsSerializer(include=["name", "uuid", "slug"])
     # notes = serializers.SerializerMethodField()
@@ -915,33 +954,13 @@ class SnippetSerializer(BaseSerializer):
 class IncludedSerializer(BaseSerializer):
     count = serializers.IntegerField(required=False)
 
-    event_map = {
-        s.event_id: MinimalEventSerializer(s).data for s in models.Events.objects.all()
-    }
-
-    song_map = {
-        s.id: MinimalSongsSerializer(
-            s,
-            include=["uuid", "name", "category", "original"],
-        ).data
-        for s in models.Songs.objects.all()
-    }
-
-    first_event = serializers.SerializerMethodField()
-    last_event = serializers.SerializerMethodField()
-    snippet = serializers.SerializerMethodField()
-
-    def get_snippet(self, obj):
-        return self.song_map[obj["snippet_id"]]
-
-    def get_first_event(self, obj):
-        return self.event_map[obj["first_event"]]
-
-    def get_last_event(self, obj):
-        return self.event_map[obj["last_event"]]
+    first_event = BatchedField(loaders.events, EVENT_ATTRIBUTES)
+    last_event = BatchedField(loaders.events, EVENT_ATTRIBUTES)
+    snippet = BatchedField(loaders.songs, SONG_ATTRIBUTES, source="snippet_id")
 
     class Meta:
         model = models.Snippets
+        list_serializer_class = BatchListSerializer
         fields = [
             "count",
             "snippet",
@@ -1121,59 +1140,13 @@ class SetlistEntrySerializer(BaseSerializer):
 
 class SetlistSongsSerializer(BaseSerializer):
     count = serializers.IntegerField(required=False)
-    song = serializers.SerializerMethodField(required=False)
-    first_event = serializers.SerializerMethodField(required=False)
-    last_event = serializers.SerializerMethodField(required=False)
-
-    def to_representation(self, instance):
-        if not hasattr(self, "_page_maps_loaded"):
-            page_data = (
-                self.parent.instance
-                if self.parent and hasattr(self.parent, "instance")
-                else [instance]
-            )
-
-            song_ids = {item["song_id"] for item in page_data if "song_id" in item}  # type: ignore
-            event_ids = {
-                e_id
-                for item in page_data  # type: ignore
-                for e_id in (item.get("first_event"), item.get("last_event"))
-                if e_id
-            }
-
-            songs = models.Songs.objects.filter(id__in=song_ids)
-            events = models.Events.objects.filter(event_id__in=event_ids)
-
-            self._song_map = {
-                s.id: MinimalSongsSerializer(
-                    s,
-                    include=[
-                        "uuid",
-                        "name",
-                        "category",
-                        "original",
-                    ],
-                ).data
-                for s in songs
-            }
-            self._event_map = {
-                e.event_id: MinimalEventSerializer(e).data for e in events
-            }
-            self._page_maps_loaded = True
-
-        return super().to_representation(instance)
-
-    def get_song(self, obj):
-        return self._song_map.get(obj["song_id"])
-
-    def get_first_event(self, obj):
-        return self._event_map.get(obj["first_event"])
-
-    def get_last_event(self, obj):
-        return self._event_map.get(obj["last_event"])
+    song = BatchedField(loaders.songs, SONG_ATTRIBUTES, source="song_id")
+    first_event = BatchedField(loaders.events, EVENT_ATTRIBUTES)
+    last_event = BatchedField(loaders.events, EVENT_ATTRIBUTES)
 
     class Meta:
         model = models.Setlists
+        list_serializer_class = BatchListSerializer
         fields = [
             "song",
             "count",
@@ -1233,14 +1206,6 @@ class SetlistBreakdownSerializer(BaseSerializer):
     category = serializers.CharField(required=False, max_length=255)
     category_slug = serializers.CharField(required=False, max_length=255)
 
-    songs_map = {
-        s.id: MinimalSongsSerializer(
-            s,
-            include=["id", "name", "original_artist", "original"],
-        ).data
-        for s in models.Songs.objects.all()
-    }
-
     album_complete = serializers.SerializerMethodField(required=False)
 
     def get_album_complete(self, obj):
@@ -1285,12 +1250,25 @@ class SetlistBreakdownSerializer(BaseSerializer):
 
     songs = serializers.SerializerMethodField(required=False)
 
+    @cached_property
+    def song_catalog(self) -> dict:
+        return catalog.songs.load()
+
     def get_songs(self, obj):
-        try:
-            return [self.songs_map[s] for s in obj["songs"]]
-        except KeyError:
+        songs = [
+            catalog.song_data(
+                self.song_catalog,
+                song_id,
+                ["id", "name", "original", "original_artist"],
+            )
+            for song_id in obj["songs"]
+        ]
+
+        if None in songs:
             return []
 
+        return songs
+
     class Meta:
         model = models.Setlists
         fields = [
@@ -1306,11 +1284,23 @@ class SetlistBreakdownSerializer(BaseSerializer):
 class ReleaseTrackSongSerializer(serializers.ModelSerializer):
     """Serializes tracks on a release along with user-specific play count."""
 
-    id = serializers.IntegerField(source="song.id")
-    name = serializers.CharField(source="song.name", max_length=255)
-    slug = serializers.CharField(source="song.slug", max_length=255)
+    id = serializers.IntegerField(source="song_id")
+    name = serializers.SerializerMethodField()
+    slug = serializers.SerializerMethodField()
     times_seen = serializers.IntegerField(default=0)
 
+    @cached_property
+    def song_catalog(self) -> dict:
+        return catalog.songs.load()
+
+    def get_name(self, obj) -> str | None:
+        song = self.song_catalog.get(obj.song_id)
+        return song.name if song else None
+
+    def get_slug(self, obj) -> str | None:
+        song = self.song_catalog.get(obj.song_id)
+        return song.slug if song else None
+
     class Meta:
         model = models.ReleaseTracks
         fields = ["id", "name", "slug", "times_seen"]
@@ -0,0 +1,481 @@
+"""msgspec Struct serialization for the hottest list endpoints.
+
+A `Plan` maps the fields of a `msgspec.Struct` to `.values()` lookups, nested
+plans for related rows, `Computed` values and `Many` relations loaded in one
+query per page. Plans are compiled once into a builder per struct, so a list
+request reads plain dicts from the database and turns them straight into
+structs, skipping model instances and the DRF field machinery.
+
+The structs encode to the same JSON as the DRF serializers they stand in for,
+which `benchmark_serializers` checks along with the rows per second of both.
+Only requests rendered by the msgspec renderers take this path.
+"""
+
+from functools import cached_property
+from operator import itemgetter
+from uuid import UUID
+
+import msgspec
+from rest_framework.response import Response
+
+from api import catalog
+from databruce import models
+from databruce.pagination import DatatablesRenderer, JSONRenderer
+
+
+class Computed:
+    """A value computed from one or more lookups of the same row."""
+
+    def __init__(self, func, *lookups: str) -> None:
+        self.func = func
+        self.lookups = lookups
+
+
+class Many:
+    """A list per row, loaded for the whole page by `loader(pks)`."""
+
+    def __init__(self, loader, default=None) -> None:
+        self.loader = loader
+        self.default = default
+
+
+class Plan:
+    """How to build `struct` from a `.values()` row.
+
+    `fields` maps each struct field, in order, to a lookup, a nested `Plan`
+    bound with `at()`, a `Computed` or a `Many`. `key` is a lookup that is
+    None when the related row is missing, which makes the struct None too.
+    """
+
+    def __init__(self, struct, fields: dict, key: str = "pk", prefix: str = "") -> None:
+        self.struct = struct
+        self.fields = fields
+        self.key = key
+        self.prefix = prefix
+
+    def at(self, relation: str) -> "Plan":
+        """The same plan, reading the row through `relation`."""
+        return Plan(self.struct, self.fields, self.key, f"{relation}__")
+
+    def get_lookups(self, prefix: str = "") -> list[str]:
+        prefix += self.prefix
+        lookups = [prefix + self.key]
+
+        for spec in self.fields.values():
+            if isinstance(spec, str):
+                lookups.append(prefix + spec)
+            elif isinstance(spec, Plan):
+                lookups.extend(spec.get_lookups(prefix))
+            elif isinstance(spec, Computed):
+                lookups.extend(prefix + lookup for lookup in spec.lookups)
+
+        return lookups
+
+    def compile(self, prefix: str = ""):
+        prefix += self.prefix
+        struct = self.struct
+        getters = []
+
+        for name, spec in self.fields.items():
+            if isinstance(spec, str):
+                getters.append(itemgetter(prefix + spec))
+            elif isinstance(spec, Plan):
+                getters.append(spec.compile(prefix))
+            elif isinstance(spec, Computed):
+                getters.append(
+                    compile_computed(
+                        spec,
+                        [prefix + lookup for lookup in spec.lookups],
+                    ),
+                )
+            else:
+                # filled in per page by serialize()
+                getters.append(itemgetter(name))
+
+        if not prefix:
+            return lambda row: struct(*[get(row) for get in getters])
+
+        key = prefix + self.key
+
+        return lambda row: (
+            None if row[key] is None else struct(*[get(row) for get in getters])
+        )
+
+    @cached_property
+    def lookups(self) -> list[str]:
+        return list(dict.fromkeys(self.get_lookups()))
+
+    @cached_property
+    def builder(self):
+        return self.compile()
+
+    @cached_property
+    def many(self) -> dict[str, Many]:
+        return {
+            name: spec for name, spec in self.fields.items() if isinstance(spec, Many)
+        }
+
+    def values(self, queryset):
+        """`queryset` as the dicts this plan is built from."""
+        return queryset.prefetch_related(None).values(*self.lookups)
+
+    def serialize(self, rows) -> list:
+        rows = list(rows)
+
+        if self.many:
+            pks = [row[self.key] for row in rows]
+
+            for name, spec in self.many.items():
+                loaded = spec.loader(pks)
+
+                for row in rows:
+                    row[name] = loaded.get(row[self.key], spec.default)
+
+        build = self.builder
+        return [build(row) for row in rows]
+
+
+def compile_computed(spec: Computed, lookups: list[str]):
+    get = itemgetter(*lookups)
+    func = spec.func
+
+    if len(lookups) == 1:
+        return lambda row: func(get(row))
+
+    return lambda row: func(*get(row))
+
+
+def group_values(rows) -> dict:
+    grouped = {}
+
+    for key, value in rows:
+        grouped.setdefault(key, []).append(value)
+
+    return grouped
+
+
+def load_setlist_notes(pks: list[int]) -> dict[int, list[str]]:
+    return group_values(
+        models.SetlistNotes.objects.filter(setlist_id__in=pks).values_list(
+            "setlist_id",
+            "note",
+        ),
+    )
+
+
+def load_page_notes(pks: list[int]) -> dict[int, list[str]]:
+    """Distinct non-empty notes, as `SongsPageSerializer.get_notes` returns them."""
+    return {
+        pk: list({note for note in notes if note != ""})
+        for pk, notes in load_setlist_notes(pks).items()
+    }
+
+
+def load_event_types(pks: list[int]) -> dict[int, list[str]]:
+    return group_values(
+        models.EventTypes.objects.filter(event_id__in=pks).values_list(
+            "event_id",
+            "type__name",
+        ),
+    )
+
+
+def load_event_tags(pks: list[int]) -> dict[int, list[str]]:
+    return group_values(
+        models.EventTags.objects.filter(event_id__in=pks).values_list(
+            "event_id",
+            "tag__name",
+        ),
+    )
+
+
+def format_gap(last: int | None) -> int | None:
+    return None if last == 0 else last
+
+
+def format_leg(leg: int | None, name: str | None):
+    # DRF skips the field when the event has no leg
+    return msgspec.UNSET if leg is None else name
+
+
+def format_city(city, name, state, abbrev, country, alpha_2, country_name):  # noqa: PLR0913, PLR0917
+    """`get_formatted_city`, from the city's columns."""
+    if city is None:
+        return None
+
+    if state is not None:
+        if country is not None and alpha_2 is None:
+            return None
+
+        if (alpha_2 or "").upper() == "US":
+            return f"{name}, {abbrev}"
+
+        return None if country is None else f"{name}, {abbrev}, {country_name}"
+
+    return None if country is None else f"{name}, {country_name}"
+
+
+class Named(msgspec.Struct, gc=False):
+    name: str | None
+    uuid: UUID
+
+
+class SongLink(msgspec.Struct, gc=False):
+    name: str | None
+    category_slug: str | None
+    slug: str | None
+    uuid: UUID
+
+
+class IndexSong(msgspec.Struct, gc=False):
+    name: str | None
+    uuid: UUID
+
+
+class EventLink(msgspec.Struct, gc=False):
+    date: str
+    event_id: str
+
+
+class Setlist(msgspec.Struct, gc=False):
+    song: SongLink | None
+    ltp: int | None
+    segue: bool
+    debut: bool
+    premiere: bool
+    set_name: str
+    gap: int | None
+    nobruce: bool
+    sign_request: bool
+    instrumental: bool
+    id: int
+    tour_num: int
+    tour_total: int
+    song_num: int | None
+    position: str | None
+    uuid: UUID
+    notes: list[str]
+    last_event: EventLink | None
+
+
+class IndexSetlist(msgspec.Struct, gc=False):
+    song: IndexSong | None
+    song_num: int | None
+    position: str | None
+    instrumental: bool
+    sign_request: bool
+    nobruce: bool
+    premiere: bool
+    debut: bool
+    last: int
+    notes: list[str]
+    set_name: str
+    segue: bool
+
+
+class Event(msgspec.Struct, gc=False):
+    date: str
+    artist: Named | None
+    tour: Named | None
+    venue: Named | None
+    city: str | None
+    leg: str | msgspec.UnsetType | None
+    has_setlist: bool
+    event_status: bool
+    event_id: str
+    title: str | None
+    public: bool
+    early_late: str | None
+    type: list[str]
+    tags: list[str]
+    note: str | None
+
+
+class PageSetlist(msgspec.Struct, gc=False):
+    debut: bool
+    premiere: bool
+    set_name: str
+    gap: int | None
+    position: str | None
+
+
+class PageStats(msgspec.Struct, gc=False):
+    gap: int | None
+    premiere: bool | None
+    debut: bool | None
+
+
+class PageEvent(msgspec.Struct, gc=False):
+    date: str
+    artist: Named | None
+    tour: Named | None
+    venue: Named | None
+    event_id: str
+    public: bool
+
+
+class PageNeighbor(msgspec.Struct, gc=False):
+    song: SongLink | None
+    segue: bool
+    id: int
+
+
+class SongsPage(msgspec.Struct, gc=False):
+    id: PageSetlist
+    stats: PageStats | None
+    event: PageEvent
+    position: str | None
+    prev: PageNeighbor | None
+    next: PageNeighbor | None
+    notes: list[str] | None
+    set_name: str
+
+
+NAMED = Plan(Named, {"name": "name", "uuid": "uuid"})
+
+SONG_LINK = Plan(
+    SongLink,
+    {"name": "name", "category_slug": "category_slug", "slug": "slug", "uuid": "uuid"},
+)
+
+EVENT_DATE = Computed(catalog.format_event_date, "event_id", "date")
+
+EVENT_LINK = Plan(EventLink, {"date": EVENT_DATE, "event_id": "event_id"})
+
+SETLIST = Plan(
+    Setlist,
+    {
+        "song": SONG_LINK.at("song"),
+        "ltp": "ltp",
+        "segue": "segue",
+        "debut": "debut",
+        "premiere": "premiere",
+        "set_name": "set_name",
+        "gap": Computed(format_gap, "last"),
+        "nobruce": "nobruce",
+        "sign_request": "sign_request",
+        "instrumental": "instrumental",
+        "id": "id",
+        "tour_num": "tour_num",
+        "tour_total": "tour_total",
+        "song_num": "song_num",
+        "position": "position",
+        "uuid": "uuid",
+        "notes": Many(load_setlist_notes, []),
+        "last_event": EVENT_LINK.at("ltp"),
+    },
+)
+
+INDEX_SETLIST = Plan(
+    IndexSetlist,
+    {
+        "song": Plan(IndexSong, {"name": "name", "uuid": "uuid"}).at("song"),
+        "song_num": "song_num",
+        "position": "position",
+        "instrumental": "instrumental",
+        "sign_request": "sign_request",
+        "nobruce": "nobruce",
+        "premiere": "premiere",
+        "debut": "debut",
+        "last": "last",
+        "notes": Many(load_setlist_notes, []),
+        "set_name": "set_name",
+        "segue": "segue",
+    },
+)
+
+EVENT = Plan(
+    Event,
+    {
+        "date": EVENT_DATE,
+        "artist": NAMED.at("artist"),
+        "tour": NAMED.at("tour"),
+        "venue": NAMED.at("venue"),
+        "city": Computed(
+            format_city,
+            "venue__city",
+            "venue__city__name",
+            "venue__city__state",
+            "venue__city__state__abbrev",
+            "venue__city__country",
+            "venue__city__country__alpha_2",
+            "venue__city__country__name",
+        ),
+        "leg": Computed(format_leg, "leg", "leg__name"),
+        "has_setlist": "has_setlist",
+        "event_status": "event_status",
+        "event_id": "event_id",
+        "title": "title",
+        "public": "public",
+        "early_late": "early_late",
+        "type": Many(load_event_types, []),
+        "tags": Many(load_event_tags, []),
+        "note": "note",
+    },
+)
+
+PAGE_NEIGHBOR = Plan(
+    PageNeighbor,
+    {"song": SONG_LINK.at("song"), "segue": "segue", "id": "id"},
+)
+
+SONGS_PAGE = Plan(
+    SongsPage,
+    {
+        "id": Plan(
+            PageSetlist,
+            {
+                "debut": "debut",
+                "premiere": "premiere",
+                "set_name": "set_name",
+                "gap": Computed(format_gap, "last"),
+                "position": "position",
+            },
+        ).at("id"),
+        "stats": Plan(
+            PageStats,
+            {"gap": "gap", "premiere": "premiere", "debut": "debut"},
+        ).at("id__setlist_stats"),
+        "event": Plan(
+            PageEvent,
+            {
+                "date": EVENT_DATE,
+                "artist": NAMED.at("artist"),
+                "tour": NAMED.at("tour"),
+                "venue": NAMED.at("venue"),
+                "event_id": "event_id",
+                "public": "public",
+            },
+        ).at("id__event"),
+        "position": "id__position",
+        "prev": PAGE_NEIGHBOR.at("prev"),
+        "next": PAGE_NEIGHBOR.at("next"),
+        "notes": Many(load_page_notes),
+        "set_name": "id__set_name",
+    },
+)
+
+
+class StructListMixin:
+    """Lists through `struct_plan` when a msgspec renderer was negotiated."""
+
+    struct_plan: Plan | None = None
+
+    def use_struct_plan(self, request) -> bool:
+        return self.struct_plan is not None and isinstance(
+            request.accepted_renderer,
+            (JSONRenderer, DatatablesRenderer),
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_struct_plan(request):
+            return super().list(request, *args, **kwargs)  # type: ignore
+
+        plan = self.struct_plan
+        queryset = plan.values(self.filter_queryset(self.get_queryset()))  # type: ignore
+        page = self.paginate_queryset(queryset)  # type: ignore
+
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))  # type: ignore
+
+        return Response(plan.serialize(queryset))
@@ -0,0 +1,147 @@
+"""In-memory prefix index for the navbar event search.
+
+Every event is indexed under the words of its event id, ISO date, venue name,
+venue aliases and city name, all lowercased and unaccented. The words are kept
+in one sorted list, so the events for a prefix are a `bisect` away and the
+typeahead never touches the database once the index is loaded.
+
+The index is a `LazyCatalog`, so it is rebuilt after the data version has been
+bumped. Display strings come from `venues_text` while loading, and fall back to
+the venue and city names until that view has been refreshed.
+"""
+
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+
+from api.catalog import LazyCatalog, format_event_date
+from databruce import models
+
+WORD_PATTERN = re.compile(r"[^\W_]+(?:-[^\W_]+)*")
+
+
+def normalize(value: str) -> str:
+    """Lowercase `value` and strip its accents, like `immutable_unaccent`."""
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(value: str | None) -> list[str]:
+    """Words of `value`, keeping dashed runs like dates and event ids whole."""
+    if not value:
+        return []
+
+    return WORD_PATTERN.findall(normalize(value))
+
+
+class TypeaheadIndex:
+    def __init__(self, events: dict[str, dict], words: dict[str, set[str]]) -> None:
+        self.events = events
+        self.words = sorted(words)
+        self.postings = [sorted(words[word]) for word in self.words]
+
+        self.tokens = defaultdict(set)
+
+        for word, event_ids in words.items():
+            for event_id in event_ids:
+                self.tokens[event_id].add(word)
+
+    def candidates(self, prefix: str):
+        """Event ids indexed under a word starting with `prefix`.
+
+        Words come in sorted order, so a word equal to `prefix` comes first,
+        and each word's events come in event id order.
+        """
+        position = bisect.bisect_left(self.words, prefix)
+
+        while position < len(self.words) and self.words[position].startswith(prefix):
+            yield from self.postings[position]
+            position += 1
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        terms = tokenize(query)
+
+        if not terms:
+            return []
+
+        # seek on the longest term, it has the fewest candidates
+        seek = max(terms, key=len)
+        terms.remove(seek)
+
+        results = []
+        seen = set()
+
+        for event_id in self.candidates(seek):
+            if event_id in seen:
+                continue
+
+            seen.add(event_id)
+            tokens = self.tokens[event_id]
+
+            if all(any(token.startswith(term) for token in tokens) for term in terms):
+                results.append(self.events[event_id])
+
+                if len(results) >= limit:
+                    break
+
+        return results
+
+
+def load_index() -> TypeaheadIndex:
+    aliases = defaultdict(list)
+
+    for venue_id, name in models.VenueAliases.objects.values_list("venue", "name"):
+        aliases[venue_id].append(name)
+
+    events = {}
+    words = defaultdict(set)
+
+    for row in models.Events.objects.values_list(
+        "id",
+        "event_id",
+        "date",
+        "venue",
+        "venue__name",
+        "venue__detail",
+        "venue__city__name",
+        "venue__venues_text__formatted",
+        "artist__name",
+    ).order_by("event_id"):
+        (
+            pk,
+            event_id,
+            date,
+            venue_id,
+            venue,
+            detail,
+            city,
+            formatted,
+            artist,
+        ) = row
+
+        date = format_event_date(event_id, date)
+
+        events[event_id] = {
+            "id": pk,
+            "event_id": event_id,
+            "date": date,
+            "venue": formatted
+            or ", ".join(part for part in (detail, venue, city) if part),
+            "city": city,
+            "artist": artist,
+        }
+
+        for value in (event_id, date, venue, city, *aliases[venue_id]):
+            for word in tokenize(value):
+                words[word].add(event_id)
+
+    return TypeaheadIndex(events, words)
+
+
+index = LazyCatalog(load_index)
+
+
+def search(query: str, limit: int = 10) -> list[dict]:
+    return index.load().search(query, limit)
@@ -18,6 +18,11 @@ router.register(r"events", views.EventViewSet, basename="event")
 router.register(r"events_index", views.IndexEventViewSet, basename="event_index")
 router.register(r"setlists_index", views.IndexSetlistViewSet, basename="setlist_index")
 router.register(r"event_search", views.EventSearch, basename="event_search")
+router.register(
+    r"event_typeahead",
+    views.EventTypeahead,
+    basename="event_typeahead",
+)
 router.register(r"event_types", views.TypesViewSet, basename="event_types")
 router.register(r"runs", views.EventRunViewSet, basename="runs")
 router.register(r"nugs_releases", views.NugsViewSet, basename="nugs_release")
@@ -54,6 +59,11 @@ router.register(
     views.SetlistStatsViewSet,
     basename="setlist_stats",
 )
+router.register(
+    r"setlist_play_stats",
+    views.SetlistPlayStatsViewSet,
+    basename="setlist_play_stats",
+)
 router.register(
     r"advanced_search",
     views.AdvancedSearch,
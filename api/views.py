@@ -18,12 +18,16 @@ from django.db.models import (
     Value,
 )
 from django.db.models.functions import Cast, Coalesce, Lower
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import exceptions, viewsets
+from rest_framework import exceptions, response, viewsets
 
-from api import filters
+from api import filters, structs, typeahead
+from api.caching import ResponseCacheMixin
+from api.exports import StreamingExportMixin
+from api.structs import StructListMixin
 from api import serializers as api_serializers
-from databruce import models
+from databruce import counting, data_version, models
 
 UserModel = get_user_model()
 VALID_SET_NAMES = [
@@ -53,7 +57,7 @@ class SubqueryCount(Subquery):
         super().__init__(queryset, **kwargs)
 
 
-class EventSearch(viewsets.ReadOnlyModelViewSet):
+class EventSearch(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -69,7 +73,33 @@ class EventSearch(viewsets.ReadOnlyModelViewSet):
     filterset_class = filters.EventsFilter
 
 
-class ArchiveViewSet(viewsets.ReadOnlyModelViewSet):
+@method_decorator(data_version.conditional, name="dispatch")
+class EventTypeahead(viewsets.ViewSet):
+    """Navbar suggestions, answered from the in-memory `api.typeahead` index."""
+
+    default_limit = 10
+    max_limit = 25
+
+    def get_limit(self, request) -> int:
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError as err:
+            raise exceptions.ValidationError(
+                {"limit": "A valid integer is required."},
+            ) from err
+
+        return max(1, min(limit, self.max_limit))
+
+    def list(self, request):
+        return response.Response(
+            typeahead.search(
+                request.query_params.get("q", ""),
+                self.get_limit(request),
+            ),
+        )
+
+
+class ArchiveViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = models.ArchiveLinks.objects.all().select_related("event")
@@ -77,7 +107,7 @@ class ArchiveViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = filters.ArchiveFilter
 
 
-class OnstageBandViewSet(viewsets.ReadOnlyModelViewSet):
+class OnstageBandViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     def get_queryset(self):
@@ -94,18 +124,34 @@ class OnstageBandViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.OnstageBandSerializer
     filterset_class = filters.OnstageBandFilter
+    searchbuilder_fields = [
+        "count",
+        "first__id",
+        "last__id",
+        "relation__instruments",
+        "relation__name",
+    ]
 
 
-class BandViewSet(viewsets.ReadOnlyModelViewSet):
+class BandViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = models.Bands.objects.order_by("name")
 
     serializer_class = api_serializers.BandsSerializer
     filterset_class = filters.BandsFilter
-
-
-class BootlegViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "first_event__early_late",
+        "first_event__event_id",
+        "last_event__early_late",
+        "last_event__event_id",
+        "name",
+        "num_events",
+        "springsteen_band",
+    ]
+
+
+class BootlegViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -118,9 +164,17 @@ class BootlegViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.BootlegsSerializer
     filterset_class = filters.BootlegFilter
+    searchbuilder_fields = [
+        "archive__url",
+        "event__event_id",
+        "label",
+        "source",
+        "title",
+        "type",
+    ]
 
 
-class CitiesViewSet(viewsets.ReadOnlyModelViewSet):
+class CitiesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -132,9 +186,25 @@ class CitiesViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.CitiesSerializer
     filterset_class = filters.CitiesFilter
-
-
-class SongsPageViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "country__name",
+        "first_event__early_late",
+        "first_event__event_id",
+        "last_event__early_late",
+        "last_event__event_id",
+        "name",
+        "num_events",
+        "state__abbrev",
+        "state__name",
+    ]
+
+
+class SongsPageViewSet(
+    StreamingExportMixin,
+    ResponseCacheMixin,
+    StructListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -154,10 +224,26 @@ class SongsPageViewSet(viewsets.ReadOnlyModelViewSet):
     ).order_by("id__event__event_id", F("id__song_num").asc(nulls_first=True))
 
     serializer_class = api_serializers.SongsPageSerializer
+    struct_plan = structs.SONGS_PAGE
     filterset_class = filters.SongsPageFilter
-
-
-class ContinentsViewSet(viewsets.ReadOnlyModelViewSet):
+    keyset_ordering = ("id__event__event_id", "id__song_num")
+    count_strategy = counting.EstimatedCount()
+    searchbuilder_fields = [
+        "id__event__artist__name",
+        "id__event__event_id",
+        "id__event__public",
+        "id__event__tour__name",
+        "id__event__venue__name",
+        "id__last",
+        "id__position",
+        "id__set_name",
+        "id__setlist_notes__note",
+        "next__song__name",
+        "prev__song__name",
+    ]
+
+
+class ContinentsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = models.Continents.objects.all()
@@ -166,7 +252,7 @@ class ContinentsViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ["name", "num_events"]
 
 
-class CountriesViewSet(viewsets.ReadOnlyModelViewSet):
+class CountriesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -177,9 +263,15 @@ class CountriesViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.CountriesSerializer
     filterset_class = filters.CountryFilter
+    searchbuilder_fields = [
+        "first_event__event_id",
+        "last_event__event_id",
+        "name",
+        "num_events",
+    ]
 
 
-class CoversViewSet(viewsets.ReadOnlyModelViewSet):
+class CoversViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = models.Covers.objects.all().select_related("event")
@@ -188,7 +280,7 @@ class CoversViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ["event"]
 
 
-class VenuesViewSet(viewsets.ReadOnlyModelViewSet):
+class VenuesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -203,9 +295,24 @@ class VenuesViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.VenuesSerializer
     filterset_class = filters.VenuesFilter
-
-
-class AdvancedEventSearch(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "city__aliases",
+        "city__country__alpha_2",
+        "city__country__name",
+        "city__name",
+        "city__state__abbrev",
+        "city__state__name",
+        "detail",
+        "first_event__early_late",
+        "first_event__event_id",
+        "last_event__early_late",
+        "last_event__event_id",
+        "name",
+        "num_events",
+    ]
+
+
+class AdvancedEventSearch(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = api_serializers.AdvSearchSerializer
     filter_backends = [DjangoFilterBackend, filters.NotEqualFilterBackend]
     filterset_class = filters.EventsFilter
@@ -242,37 +349,42 @@ class AdvancedEventSearch(viewsets.ReadOnlyModelViewSet):
                     ).prefetch_related("setlist_notes"),
                 ),
             )
-            .annotate(event_status=Exists(status_check))
+            .annotate(
+                event_status=Exists(status_check),
+                has_setlist=Exists(
+                    models.Setlists.objects.filter(event_id=OuterRef("pk")),
+                ),
+            )
         ).order_by("event_id")
 
+    # each maps a position to a filter on the setlist row that has the song
+    position_filters = {
+        "show_opener": Q(is_opener=True),
+        "in_show": Q(set_name="Show"),
+        "in_set_one": Q(set_name="Set 1"),
+        "set_one_opener": Q(set_name="Set 1", is_set_opener=True),
+        "set_one_closer": Q(set_name="Set 1", is_set_closer=True),
+        "in_set_two": Q(set_name="Set 2"),
+        "set_two_opener": Q(set_name="Set 2", is_set_opener=True),
+        "set_two_closer": Q(set_name="Set 2", is_set_closer=True),
+        "main_set_closer": Q(is_main_set_closer=True),
+        "encore_opener": Q(set_name="Encore", is_set_opener=True),
+        "in_encore": Q(set_name="Encore"),
+        "in_preshow": Q(set_name="Pre-Show"),
+        "in_recording": Q(set_name="Recording"),
+        "in_soundcheck": Q(set_name="Soundcheck"),
+        "show_closer": Q(is_closer=True),
+        "anywhere": Q(),
+        "premiere": Q(premiere=True),
+        "debut": Q(debut=True),
+        "nobruce": Q(nobruce=True),
+        "request": Q(sign_request=True),
+    }
+
     def filter_queryset(self, queryset):
         # 1. Let django-filter process the standard form fields first
         queryset = super().filter_queryset(queryset)
 
-        # Base structure mapping positions to Q objects
-        position_filters = {
-            "show_opener": Q(setlist_event__is_opener=True),
-            "in_show": Q(setlist_event__set_name="show"),
-            "in_set_one": Q(setlist_event__set_name="set 1"),
-            "set_one_opener": Q(setlist_event__set_name="set 1", is_set_opener=True),
-            "set_one_closer": Q(setlist_event__set_name="set 1", is_set_closer=True),
-            "in_set_two": Q(setlist_event__set_name="set 2"),
-            "set_two_opener": Q(setlist_event__set_name="set 2", is_set_opener=True),
-            "set_two_closer": Q(setlist_event__set_name="set 2", is_set_closer=True),
-            "main_set_closer": Q(setlist_event__is_main_set_closer=True),
-            "encore_opener": Q(setlist_event__set_name="encore", is_set_opener=True),
-            "in_encore": Q(setlist_event__set_name="encore"),
-            "in_preshow": Q(setlist_event__set_name="pre-show"),
-            "in_recording": Q(setlist_event__set_name="recording"),
-            "in_soundcheck": Q(setlist_event__set_name="soundcheck"),
-            "show_closer": Q(setlist_event__is_closer=True),
-            "anywhere": Q(),
-            "premiere": Q(setlist_event__premiere=True),
-            "debut": Q(setlist_event__debut=True),
-            "nobruce": Q(setlist_event__nobruce=True),
-            "request": Q(setlist_event__sign_request=True),
-        }
-
         # 2. Extract query parameters for the dynamic formset
         query_params = self.request.query_params  # type: ignore
         conjunction = query_params.get("conjunction", "and").lower()
@@ -306,68 +418,70 @@ class AdvancedEventSearch(viewsets.ReadOnlyModelViewSet):
         if not formset_queries:
             return queryset
 
-        # =========================================================================
-        # 4. CHOP UP FILTERS ACCORDING TO LOGICAL OPERATOR (THE FIX)
-        # =========================================================================
-        if conjunction == "or":
-            # For OR operations, a single combined filter is required.
-            or_filter = Q()
-            for query in formset_queries:
-                condition = self._build_form_condition(query, position_filters)
-                or_filter |= condition
+        # 4. Each condition is its own correlated EXISTS on the event, so any
+        # number of them never joins the setlists and never repeats an event
+        combined = Q()
 
-            queryset = queryset.filter(or_filter)
-        else:
-            # For AND operations, loop and CHAIN discrete .filter() statements.
-            # This isolates the SQL multi-joins per row instead of cross-contaminating them.
-            for query in formset_queries:
-                condition = self._build_form_condition(query, position_filters)
-                queryset = queryset.filter(condition)
+        for query in formset_queries:
+            condition = self._build_form_condition(query)
 
-        # 5. Prevent duplicate entries from Many-To-Many relational joins
-        return queryset.distinct()
+            if conjunction == "or":
+                combined |= condition
+            else:
+                combined &= condition
 
-    def _build_form_condition(self, query, position_filters) -> Q:
-        match_songs = [query["song_1"]]
-
-        condition = Q(setlist_event__set_name__in=VALID_SET_NAMES)
+        return queryset.filter(combined)
 
+    def _build_form_condition(self, query) -> Q:
         if query["position"] == "followed_by" and query["song_2"]:
-            condition &= Q(setlist_event__song_id=query["song_1"]) & Q(
-                setlist_event__songs_page__next__song_id=query["song_2"],
+            if query["choice"] is False:
+                # a play that ends its set has no transition, but still counts
+                setlists = models.Setlists.objects.filter(
+                    event_id=OuterRef("pk"),
+                    set_name__in=VALID_SET_NAMES,
+                    song_id=query["song_1"],
+                ).exclude(transition__next_song_id=query["song_2"])
+
+                return Q(Exists(setlists))
+
+            # single index lookup on (song_id, next_song_id)
+            transitions = models.SetlistTransitions.objects.filter(
+                event_id=OuterRef("pk"),
+                set_name__in=VALID_SET_NAMES,
+                song_id=query["song_1"],
+                next_song_id=query["song_2"],
             )
 
-        else:
-            condition &= Q(setlist_event__song_id=query["song_1"])
+            return Q(Exists(transitions))
 
-            if query["position"] and query["position"] not in [
-                "anywhere",
-                "followed_by",
-            ]:
-                condition &= position_filters.get(query["position"], Q())
+        setlists = models.Setlists.objects.filter(
+            event_id=OuterRef("pk"),
+            set_name__in=VALID_SET_NAMES,
+            song_id=query["song_1"],
+        )
+
+        if query["position"] and query["position"] not in [
+            "anywhere",
+            "followed_by",
+        ]:
+            setlists = setlists.filter(
+                self.position_filters.get(query["position"], Q()),
+            )
+
+        condition = Q(Exists(setlists))
 
         # Invert condition if choice is False (NOT evaluation)
         if query["choice"] is False:
             condition = ~condition
 
-            # followed by special case
-            if query["position"] == "followed_by" and query["song_2"]:
-                match_songs.append(query["song_2"])
-                condition = (
-                    Q(setlist_event__set_name__in=VALID_SET_NAMES)
-                    & Q(
-                        Q(setlist_event__song_id=query["song_1"])
-                        & ~Q(
-                            setlist_event__songs_page__next__song_id=query["song_2"],
-                        ),
-                    )
-                    & Q(setlist_event__song_id__in=match_songs)
-                )
-
         return condition
 
 
-class IndexSetlistViewSet(viewsets.ReadOnlyModelViewSet):
+class IndexSetlistViewSet(
+    ResponseCacheMixin,
+    StructListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = (
         models.Setlists.objects.all()
         .select_related(
@@ -381,11 +495,12 @@ class IndexSetlistViewSet(viewsets.ReadOnlyModelViewSet):
     )
 
     serializer_class = api_serializers.IndexSetlistSerializer
+    struct_plan = structs.INDEX_SETLIST
     filterset_class = filters.SetlistFilter
     ordering_fields = ["event__event_id", "song_num", "song__category", "song__name"]
 
 
-class IndexEventViewSet(viewsets.ReadOnlyModelViewSet):
+class IndexEventViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = (
         models.Events.objects.all().select_related(
             "venue__venues_text",
@@ -397,7 +512,12 @@ class IndexEventViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ["event_id"]
 
 
-class EventViewSet(viewsets.ReadOnlyModelViewSet):
+class EventViewSet(
+    StreamingExportMixin,
+    ResponseCacheMixin,
+    StructListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     def get_queryset(self):
@@ -415,19 +535,40 @@ class EventViewSet(viewsets.ReadOnlyModelViewSet):
             .prefetch_related(
                 "venue__city__state",
                 "leg",
-                "setlist_event",
                 "type",
                 "tags",
             )
-            .annotate(event_status=Exists(status_check))
+            .annotate(
+                event_status=Exists(status_check),
+                has_setlist=Exists(
+                    models.Setlists.objects.filter(event_id=OuterRef("pk")),
+                ),
+            )
         ).order_by("event_id")
 
     serializer_class = api_serializers.EventsSerializer
+    struct_plan = structs.EVENT
     filterset_class = filters.EventsFilter
     ordering_fields = ["event_id"]
-
-
-class AdvancedSearch(viewsets.ReadOnlyModelViewSet):
+    keyset_ordering = ("event_id",)
+    count_strategy = counting.CachedCount()
+    searchbuilder_fields = [
+        "artist__name",
+        "event_id",
+        "has_setlist",
+        "public",
+        "title",
+        "tour__name",
+        "venue__city__country__name",
+        "venue__city__name",
+        "venue__city__state__abbrev",
+        "venue__city__state__name",
+        "venue__detail",
+        "venue__name",
+    ]
+
+
+class AdvancedSearch(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = (
         models.Events.objects.all()
         .select_related(
@@ -446,6 +587,11 @@ class AdvancedSearch(viewsets.ReadOnlyModelViewSet):
             "leg",
             "setlist_event",
         )
+        .annotate(
+            has_setlist=Exists(
+                models.Setlists.objects.filter(event_id=OuterRef("pk")),
+            ),
+        )
         .order_by("event_id")
     )
 
@@ -454,7 +600,7 @@ class AdvancedSearch(viewsets.ReadOnlyModelViewSet):
     filter_backends = [filters.EventsFilter, filters.NotEqualFilterBackend]
 
 
-class NugsViewSet(viewsets.ReadOnlyModelViewSet):
+class NugsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -473,9 +619,18 @@ class NugsViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.NugsSerializer
     filter_backends = [filters.DataTablesFilterBackend]
-
-
-class RelationsViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "date",
+        "event__event_id",
+        "event__venue__city__name",
+        "event__venue__city__state__abbrev",
+        "event__venue__name",
+        "first_friday",
+        "url",
+    ]
+
+
+class RelationsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     rel_aliases = models.RelationAliases.objects.filter(relation=OuterRef("id"))
@@ -503,9 +658,25 @@ class RelationsViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.RelationsSerializer
     filterset_class = filters.RelationFilter
-
-
-class OnstageViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "aliases",
+        "first_event__early_late",
+        "first_event__event_id",
+        "instruments",
+        "last_event__early_late",
+        "last_event__event_id",
+        "name",
+        "nicknames",
+        "num_events",
+        "start_date",
+    ]
+
+
+class OnstageViewSet(
+    StreamingExportMixin,
+    ResponseCacheMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -521,9 +692,14 @@ class OnstageViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.OnstageSerializer
     filterset_class = filters.OnstageFilter
+    searchbuilder_fields = [
+        "band__name",
+        "guest",
+        "relation__name",
+    ]
 
 
-class ReleaseTracksViewSet(viewsets.ReadOnlyModelViewSet):
+class ReleaseTracksViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -537,7 +713,7 @@ class ReleaseTracksViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = filters.ReleaseTracksFilter
 
 
-class ReleasesViewSet(viewsets.ReadOnlyModelViewSet):
+class ReleasesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -551,9 +727,15 @@ class ReleasesViewSet(viewsets.ReadOnlyModelViewSet):
     )
     serializer_class = api_serializers.ReleasesSerializer
     filterset_class = filters.ReleaseFilter
+    searchbuilder_fields = [
+        "date_str",
+        "length",
+        "name",
+        "type",
+    ]
 
 
-class SetlistStatsViewSet(viewsets.ReadOnlyModelViewSet):
+class SetlistStatsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -565,7 +747,24 @@ class SetlistStatsViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = filters.SetlistStatsFilter
 
 
-class SetlistViewSet(viewsets.ReadOnlyModelViewSet):
+class SetlistPlayStatsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
+    """Per-play stats, kept up to date by `databruce.setlist_stats`."""
+
+    queryset = (
+        models.SetlistPlayStats.objects.all()
+        .select_related("event", "song", "tour", "ltp")
+        .order_by("event__event_id", "setlist__song_num")
+    )
+    serializer_class = api_serializers.SetlistPlayStatsSerializer
+    filterset_class = filters.SetlistPlayStatsFilter
+
+
+class SetlistViewSet(
+    StreamingExportMixin,
+    ResponseCacheMixin,
+    StructListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -582,11 +781,17 @@ class SetlistViewSet(viewsets.ReadOnlyModelViewSet):
     )
 
     serializer_class = api_serializers.SetlistSerializer
+    struct_plan = structs.SETLIST
     filterset_class = filters.SetlistFilter
     ordering_fields = ["event__event_id", "song_num", "song__category", "song__name"]
+    keyset_ordering = ("event__event_id", "song_num")
+    count_strategy = counting.EstimatedCount()
+    searchbuilder_fields = [
+        "song__sort_song_name",
+    ]
 
 
-class SetlistMobileViewSet(viewsets.ReadOnlyModelViewSet):
+class SetlistMobileViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = (
         models.Setlists.objects.all()
         .select_related(
@@ -604,7 +809,7 @@ class SetlistMobileViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ["event__event_id", "song_num", "song__category", "song__name"]
 
 
-class SetlistEntriesViewSet(viewsets.ReadOnlyModelViewSet):
+class SetlistEntriesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = (
         models.SetlistEntries.objects.all()
         .select_related(
@@ -624,9 +829,18 @@ class SetlistEntriesViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.SetlistEntrySerializer
     filterset_class = filters.SetlistEntryFilter
-
-
-class SetlistSongsViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "encore_opener__name",
+        "event__event_id",
+        "main_closer__name",
+        "s1_closer__name",
+        "s2_opener__name",
+        "show_closer__name",
+        "show_opener__name",
+    ]
+
+
+class SetlistSongsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         filter = Q(set_name__in=VALID_SET_NAMES, event__public=True, nobruce=False) | Q(
             set_name__in=["Recording", "Rehearsal"],
@@ -655,27 +869,44 @@ class SetlistSongsViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = api_serializers.SetlistSongsSerializer
     filterset_class = filters.SetlistSongsFilter
     ordering_fields = ["count"]
+    searchbuilder_fields = [
+        "count",
+        "first_event",
+        "last_event",
+        "song__category",
+        "song__original",
+        "song__sort_song_name",
+    ]
 
 
-class SnippetViewSet(viewsets.ReadOnlyModelViewSet):
+class SnippetViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     def get_queryset(self):
         queryset = (
-            models.Snippets.objects.all().select_related(
+            models.Snippets.objects.all()
+            .select_related(
                 "setlist__song",
                 "setlist__event__artist",
                 "setlist__event__venue",
             )
+            .prefetch_related("setlist__setlist_notes")
         ).order_by("setlist__event__event_id")
 
         return self.filter_queryset(queryset)
 
     serializer_class = api_serializers.SnippetSerializer
     filterset_class = filters.SnippetFilter
+    searchbuilder_fields = [
+        "setlist__event__artist__name",
+        "setlist__event__event_id",
+        "setlist__event__venue__name",
+        "setlist__setlist_notes__note",
+        "setlist__song__name",
+    ]
 
 
-class IncludedSongViewSet(viewsets.ReadOnlyModelViewSet):
+class IncludedSongViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     def get_queryset(self):
@@ -700,9 +931,15 @@ class IncludedSongViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.IncludedSerializer
     filterset_class = filters.IncludedFilter
+    searchbuilder_fields = [
+        "count",
+        "first_event",
+        "last_event",
+        "snippet__name",
+    ]
 
 
-class StatesViewSet(viewsets.ReadOnlyModelViewSet):
+class StatesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -714,13 +951,22 @@ class StatesViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.StatesSerializer
     filterset_class = filters.StateFilter
+    searchbuilder_fields = [
+        "country__name",
+        "first_event__event_id",
+        "last_event__event_id",
+        "name",
+        "num_events",
+    ]
 
 
-class SongsViewSet(viewsets.ReadOnlyModelViewSet):
+class SongsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
-        models.Songs.objects.all().prefetch_related(
+        models.Songs.objects.all()
+        .select_related("stats")
+        .prefetch_related(
             "first_event",
             "last_event",
             "lyrics_song",
@@ -729,9 +975,25 @@ class SongsViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.SongsSerializer
     filterset_class = filters.SongsFilter
-
-
-class ToursViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "category",
+        "closer",
+        "first_event__early_late",
+        "first_event__event_id",
+        "has_lyrics",
+        "last_event__early_late",
+        "last_event__event_id",
+        "name",
+        "num_plays_private",
+        "num_plays_public",
+        "opener",
+        "original",
+        "original_artist",
+        "sort_song_name",
+    ]
+
+
+class ToursViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -750,9 +1012,20 @@ class ToursViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.ToursSerializer
     filterset_class = filters.TourFilter
-
-
-class TourLegsViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "band__name",
+        "first_event__early_late",
+        "first_event__event_id",
+        "last_event__early_late",
+        "last_event__event_id",
+        "name",
+        "num_events",
+        "num_legs",
+        "num_songs",
+    ]
+
+
+class TourLegsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet automatically provides `list`, `create`, `retrieve`, `update`, and `destroy` actions."""
 
     queryset = (
@@ -769,9 +1042,20 @@ class TourLegsViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.TourLegsSerializer
     filterset_class = filters.TourLegFilter
-
-
-class EventRunViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "first_event__early_late",
+        "first_event__event_id",
+        "last_event__early_late",
+        "last_event__event_id",
+        "name",
+        "note",
+        "num_events",
+        "num_songs",
+        "tour__name",
+    ]
+
+
+class EventRunViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = (
         models.Runs.objects.all()
         .select_related(
@@ -791,14 +1075,33 @@ class EventRunViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.EventRunSerializer
     filterset_class = filters.EventRunFilter
-
-
-class LyricsViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "band__name",
+        "first_event__early_late",
+        "first_event__event_id",
+        "last_event__early_late",
+        "last_event__event_id",
+        "name",
+        "num_events",
+        "num_songs",
+        "venue__name",
+    ]
+
+
+class LyricsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.Lyrics.objects.all().select_related("song").order_by("song__name")
     serializer_class = api_serializers.LyricsSerializer
+    searchbuilder_fields = [
+        "language",
+        "note",
+        "song__sort_song_name",
+        "source",
+        "translator",
+        "version",
+    ]
 
 
-class SetlistNotesViewSet(viewsets.ReadOnlyModelViewSet):
+class SetlistNotesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = (
         models.SetlistNotes.objects.all()
         .select_related(
@@ -815,11 +1118,24 @@ class SetlistNotesViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = api_serializers.SetlistNotesSerializer
     filterset_class = filters.SetlistNoteFilter
-
-
-class UpdatesViewSet(viewsets.ReadOnlyModelViewSet):
+    searchbuilder_fields = [
+        "event__early_late",
+        "event__event_id",
+        "event__venue__detail",
+        "event__venue__name",
+        "note",
+        "setlist__set_name",
+        "setlist__song__name",
+    ]
+
+
+class UpdatesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.Updates.objects.all().order_by("-created_at", "-id")
     serializer_class = api_serializers.UpdatesSerializer
+    searchbuilder_fields = [
+        "created_at",
+        "msg",
+    ]
 
 
 class UsersViewSet(viewsets.ReadOnlyModelViewSet):
@@ -837,6 +1153,12 @@ class UsersViewSet(viewsets.ReadOnlyModelViewSet):
     )
 
     serializer_class = api_serializers.UsersSerializer
+    searchbuilder_fields = [
+        "date_joined",
+        "event_count",
+        "is_staff",
+        "user_slug",
+    ]
 
 
 class UsersAttendedShowsViewSet(viewsets.ReadOnlyModelViewSet):
@@ -855,7 +1177,7 @@ class UsersAttendedShowsViewSet(viewsets.ReadOnlyModelViewSet):
 from rest_framework.exceptions import ValidationError
 
 
-class SetlistBreakdown(viewsets.ReadOnlyModelViewSet):
+class SetlistBreakdown(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """Return setlist breakdown by category with album completion status."""
 
     serializer_class = api_serializers.SetlistBreakdownSerializer
@@ -922,25 +1244,25 @@ class SetlistBreakdown(viewsets.ReadOnlyModelViewSet):
         )
 
 
-class TypesViewSet(viewsets.ReadOnlyModelViewSet):
+class TypesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.Types.objects.all()
     serializer_class = api_serializers.TypesSerializer
     filterset_class = filters.TypeFilter
 
 
-class EventTypesViewSet(viewsets.ReadOnlyModelViewSet):
+class EventTypesViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.EventTypes.objects.all()
     serializer_class = api_serializers.EventTypeSerializer
     filterset_class = filters.EventTypeFilter
 
 
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class TagsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.Tags.objects.all()
     serializer_class = api_serializers.TagsSerializer
     filterset_class = filters.TagFilter
 
 
-class EventTagsViewSet(viewsets.ReadOnlyModelViewSet):
+class EventTagsViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.EventTags.objects.all()
     serializer_class = api_serializers.EventTagSerializer
     filterset_class = filters.EventTagFilter
@@ -1070,14 +1392,12 @@ class UserAlbumBreakdown(viewsets.ReadOnlyModelViewSet):
         # 2. Prefetch release tracks with annotated play count
         tracks_prefetch = Prefetch(
             "release_tracks",
-            queryset=models.ReleaseTracks.objects.select_related("song")
-            .annotate(
+            queryset=models.ReleaseTracks.objects.annotate(
                 times_seen=Coalesce(
                     Subquery(times_seen_subquery),
                     Value(0),
                 ),
-            )
-            .order_by("discnum", "position"),
+            ).order_by("discnum", "position"),
         )
 
         # 3. Fetch all Studio releases and prefetch their full track lists
@@ -1095,7 +1415,7 @@ class UserAlbumBreakdown(viewsets.ReadOnlyModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class YearSongBreakdown(viewsets.ReadOnlyModelViewSet):
+class YearSongBreakdown(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         return (
             models.Setlists.objects.filter(
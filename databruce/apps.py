@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DatabruceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "databruce"
+
+    def ready(self):
+        from databruce import signals  # noqa: F401, PLC0415
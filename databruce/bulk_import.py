@@ -0,0 +1,410 @@
+"""Bulk loads events with their setlists, onstage and snippet rows.
+
+Rows come from a JSON file holding a list per table, or from a directory of
+CSV files named after the tables (`events.csv`, `setlists.csv`, ...). Columns
+are model field names. Setlist, onstage and snippet rows point at their event
+by `event_id`, and snippets at their setlist row by `event` and `song_num`,
+so a whole tour can be written up before any of it has a primary key.
+
+Every row is converted and checked with `clean_fields()`, then the foreign
+keys are checked with one query per referenced table, and all errors are
+reported together. The rows are written with `bulk_create`, which skips the
+per-row signals, so the event summaries, derived tables and materialized
+views are refreshed once after the import commits.
+"""
+
+import csv
+import json
+from collections import Counter
+from functools import partial
+from pathlib import Path
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, TextField, Value, When
+from django.db.models.functions import Coalesce, Concat, Left, Length, Trim
+from django.db.models.lookups import GreaterThan
+
+from databruce import (
+    data_version,
+    matviews,
+    models,
+    search_documents,
+    setlist_index,
+    setlist_stats,
+    song_stats,
+    transitions,
+)
+
+TABLES = {
+    "events": models.Events,
+    "setlists": models.Setlists,
+    "onstage": models.Onstage,
+    "snippets": models.Snippets,
+}
+
+# columns resolved by the importer rather than set on the model
+LOOKUP_COLUMNS = {
+    "setlists": ["event"],
+    "onstage": ["event"],
+    "snippets": ["event", "song_num"],
+}
+
+# the foreign keys those columns fill in
+RESOLVED_FIELDS = {
+    "setlists": ["event"],
+    "onstage": ["event"],
+    "snippets": ["setlist"],
+}
+
+BOOLEAN_STRINGS = {
+    "true": True,
+    "t": True,
+    "yes": True,
+    "false": False,
+    "f": False,
+    "no": False,
+}
+
+SUMMARY_LENGTH = 250
+
+# the substitutions `Events.save()` makes, in Postgres regex syntax
+SUMMARY_PATTERNS = [
+    (r"<[^>]*>", ""),
+    (r"\[([^\]]+)\]\([^)]+\)", r"\1"),
+    (r"\s+", " "),
+]
+
+
+def summary_expression():
+    """`Events.save()`'s note summary, as one SQL expression."""
+    text = F("note")
+
+    for pattern, replacement in SUMMARY_PATTERNS:
+        text = models.RegexpReplace(
+            text,
+            Value(pattern),
+            Value(replacement),
+            Value("g"),
+            output_field=TextField(),
+        )
+
+    text = Trim(text)
+
+    return Coalesce(
+        Case(
+            When(
+                GreaterThan(Length(text), SUMMARY_LENGTH),
+                then=Concat(
+                    Left(text, SUMMARY_LENGTH),
+                    Value("..."),
+                    output_field=TextField(),
+                ),
+            ),
+            default=text,
+            output_field=TextField(),
+        ),
+        Value(""),
+        output_field=TextField(),
+    )
+
+
+def read_rows(path: Path) -> dict[str, list[dict]]:
+    """Rows per table from a JSON file or a directory of CSV files."""
+    if not path.is_dir():
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return {table: data.get(table, []) for table in TABLES}
+
+    rows = {}
+
+    for table in TABLES:
+        file = path / f"{table}.csv"
+
+        if file.exists():
+            with file.open(newline="", encoding="utf-8") as f:
+                rows[table] = list(csv.DictReader(f))
+        else:
+            rows[table] = []
+
+    return rows
+
+
+def build_instance(model, row: dict, label: str, errors: list[str], resolved=()):
+    """An unsaved `model` instance from one row of strings or JSON values.
+
+    `resolved` names the foreign keys filled in from the lookup columns.
+    """
+    values = {}
+
+    for column, value in row.items():
+        try:
+            field = model._meta.get_field(column)  # noqa: SLF001
+        except FieldDoesNotExist:
+            errors.append(f"{label}: unknown column {column!r}")
+            continue
+
+        if not field.concrete or field.primary_key:
+            errors.append(f"{label}: column {column!r} can't be imported")
+            continue
+
+        if value in ("", None):
+            if field.null:
+                values[field.attname] = None
+            elif field.empty_strings_allowed:
+                values[field.attname] = ""
+
+            # otherwise the field's default applies
+            continue
+
+        target = field.target_field if field.is_relation else field
+
+        if isinstance(target, BooleanField) and isinstance(value, str):
+            # spreadsheets write these in any case
+            value = BOOLEAN_STRINGS.get(value.strip().lower(), value)  # noqa: PLW2901
+
+        try:
+            values[field.attname] = target.to_python(value)
+        except ValidationError as e:
+            errors.extend(f"{label}: {column}: {message}" for message in e.messages)
+
+    instance = model(**values)
+
+    try:
+        # foreign keys are checked in batch by check_references()
+        instance.clean_fields(
+            exclude=[
+                field.name
+                for field in model._meta.concrete_fields  # noqa: SLF001
+                if field.is_relation or field.attname not in values
+            ],
+        )
+    except ValidationError as e:
+        errors.extend(
+            f"{label}: {field}: {message}"
+            for field, messages in e.message_dict.items()
+            for message in messages
+        )
+
+    errors.extend(
+        f"{label}: {field.name}: This field is required."
+        for field in model._meta.concrete_fields  # noqa: SLF001
+        if field.is_relation
+        and not field.null
+        and field.name not in resolved
+        and getattr(instance, field.attname) is None
+    )
+
+    return instance
+
+
+def check_references(instances: dict[str, list], errors: list[str]) -> None:
+    """Check every foreign key with one query per referenced table."""
+    wanted = {}
+
+    for table, rows in instances.items():
+        for field in TABLES[table]._meta.concrete_fields:  # noqa: SLF001
+            if not field.is_relation:
+                continue
+
+            for i, instance in enumerate(rows, start=1):
+                pk = getattr(instance, field.attname)
+
+                if pk is not None:
+                    wanted.setdefault(field.related_model, {}).setdefault(
+                        pk,
+                        f"{table} row {i}: {field.name}",
+                    )
+
+    for model, labels in wanted.items():
+        found = set(
+            model._base_manager.filter(pk__in=list(labels)).values_list(  # noqa: SLF001
+                "pk",
+                flat=True,
+            ),
+        )
+
+        errors.extend(
+            f"{label}: no {model.__name__} with id {pk}"
+            for pk, label in labels.items()
+            if pk not in found
+        )
+
+
+def write_rows(instances: dict, lookups: dict, errors: list[str]) -> None:
+    """Insert the rows hanging off the events, filling in their foreign keys."""
+    for setlist, lookup in zip(instances["setlists"], lookups["setlists"], strict=True):
+        setlist.event_id = lookup["event_pk"]
+
+    for onstage, lookup in zip(instances["onstage"], lookups["onstage"], strict=True):
+        onstage.event_id = lookup["event_pk"]
+
+    models.Setlists.objects.bulk_create(instances["setlists"], batch_size=5000)
+    models.Onstage.objects.bulk_create(instances["onstage"], batch_size=5000)
+
+    # snippets hang off setlist rows from this import or already stored ones
+    setlists = {}
+
+    for event_pk, song_num, pk in (
+        models.Setlists.objects.filter(
+            event_id__in={lookup["event_pk"] for lookup in lookups["snippets"]},
+        )
+        .order_by("pk")
+        .values_list("event_id", "song_num", "pk")
+    ):
+        setlists.setdefault((event_pk, song_num), pk)
+
+    for i, (snippet, lookup) in enumerate(
+        zip(instances["snippets"], lookups["snippets"], strict=True),
+        start=1,
+    ):
+        snippet.setlist_id = setlists.get((lookup["event_pk"], lookup["song_num"]))
+
+        if snippet.setlist_id is None:
+            errors.append(
+                f"snippets row {i}: no song {lookup['song_num']} "
+                f"in event {lookup['event']}",
+            )
+
+    if not errors:
+        models.Snippets.objects.bulk_create(instances["snippets"], batch_size=5000)
+
+
+def import_rows(rows: dict[str, list[dict]], *, dry_run: bool = False) -> dict:
+    """Validate and write `rows`, returning the number of rows per table.
+
+    Raises `ValidationError` listing every problem found, and writes nothing
+    unless all rows are valid.
+    """
+    errors = []
+    instances = {}
+    lookups = {}
+
+    for table, model in TABLES.items():
+        instances[table] = []
+        lookups[table] = []
+
+        for i, row in enumerate(rows.get(table, []), start=1):
+            label = f"{table} row {i}"
+            row = dict(row)  # noqa: PLW2901
+            lookup = {
+                column: row.pop(column, None)
+                for column in LOOKUP_COLUMNS.get(table, [])
+            }
+
+            instances[table].append(
+                build_instance(
+                    model,
+                    row,
+                    label,
+                    errors,
+                    RESOLVED_FIELDS.get(table, []),
+                ),
+            )
+            lookups[table].append(lookup)
+
+    for i, lookup in enumerate(lookups["snippets"], start=1):
+        try:
+            lookup["song_num"] = int(lookup["song_num"])
+        except (TypeError, ValueError):
+            errors.append(f"snippets row {i}: song_num must be a number")
+
+    new_ids = [event.event_id for event in instances["events"]]
+
+    existing = dict(
+        models.Events.objects.filter(
+            event_id__in={
+                *new_ids,
+                *(
+                    lookup["event"]
+                    for table in LOOKUP_COLUMNS
+                    for lookup in lookups[table]
+                ),
+            },
+        ).values_list("event_id", "pk"),
+    )
+
+    errors.extend(
+        f"events row {i}: event {event_id} already exists"
+        for i, event_id in enumerate(new_ids, start=1)
+        if event_id in existing
+    )
+
+    errors.extend(
+        f"events: event {event_id} appears {count} times"
+        for event_id, count in Counter(new_ids).items()
+        if count > 1
+    )
+
+    for table in LOOKUP_COLUMNS:
+        errors.extend(
+            f"{table} row {i}: no event {lookup['event']}"
+            for i, lookup in enumerate(lookups[table], start=1)
+            if lookup["event"] not in existing and lookup["event"] not in new_ids
+        )
+
+    check_references(instances, errors)
+
+    if errors:
+        raise ValidationError(errors)
+
+    counts = {table: len(rows) for table, rows in instances.items()}
+
+    if dry_run:
+        return counts
+
+    with transaction.atomic():
+        models.Events.objects.bulk_create(instances["events"], batch_size=1000)
+        existing.update((event.event_id, event.pk) for event in instances["events"])
+
+        # the same summary Events.save() would have stored, for all events at once
+        models.Events.objects.filter(
+            pk__in=[event.pk for event in instances["events"]],
+        ).update(summary=summary_expression())
+
+        for table in LOOKUP_COLUMNS:
+            for lookup in lookups[table]:
+                lookup["event_pk"] = existing[lookup["event"]]
+
+        write_rows(instances, lookups, errors)
+
+        if errors:
+            raise ValidationError(errors)
+
+        transaction.on_commit(
+            partial(
+                refresh_derived,
+                {
+                    lookup["event_pk"]
+                    for table in LOOKUP_COLUMNS
+                    for lookup in lookups[table]
+                }
+                | {event.pk for event in instances["events"]},
+                {setlist.song_id for setlist in instances["setlists"]},
+            ),
+        )
+
+    return counts
+
+
+def refresh_derived(event_pks: set[int], song_ids: set[int]) -> None:
+    """Refresh everything the skipped signals would have, once."""
+    event_ids = list(
+        models.Events.objects.filter(pk__in=event_pks).values_list(
+            "event_id",
+            flat=True,
+        ),
+    )
+
+    setlist_index.invalidate()
+    transitions.refresh_transitions(list(event_pks))
+    search_documents.refresh_documents(list(event_pks))
+    song_stats.refresh_song_stats(list(song_ids))
+    setlist_stats.refresh_setlist_stats(event_ids)
+
+    matviews.refresh(
+        sorted(
+            {name for model in TABLES.values() for name in matviews.views_for(model)},
+        ),
+    )
+
+    data_version.bump_version()
@@ -179,3 +179,6 @@ ANYMAIL = {
 EMAIL_BACKEND = "anymail.backends.mailgun.EmailBackend"
 DEFAULT_FROM_EMAIL = os.getenv("MAILGUN_EMAIL")
 NOTIFY_EMAIL = os.getenv("NOTIFY_EMAIL")
+
+# refresh materialized views as soon as a test's writes commit
+MATVIEW_REFRESH_DELAY = 0
@@ -0,0 +1,150 @@
+"""Count strategies for `DatatablesLimitOffsetPagination`.
+
+A view picks one by setting `count_strategy`. Without it the paginator runs a
+plain `COUNT(*)` on every request, as before.
+
+Counts are keyed by the SQL of the filtered queryset with its ordering and
+select list stripped, so any combination of filter params, DataTables column
+searches and SearchBuilder criteria that produces the same query shares one
+entry. Every key carries the global data version, so an admin edit drops them
+all.
+
+`count_rows()` also says whether a count is a planner estimate, in which case
+the paginator keeps offsets within it and corrects it from the page it reads.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FullResultSet
+from django.db import connections
+
+from databruce import data_version
+
+
+def query_signature(queryset) -> str:
+    """A hash of what decides which rows `queryset` holds.
+
+    That is its WHERE clause, the select list, ordering and the joins they
+    need don't change the count. The struct fast path counts `.values()`
+    querysets, which keep the joins of their values.
+    """
+    query = queryset.query
+
+    try:
+        where = query.get_compiler(queryset.db).compile(query.where)
+    except EmptyResultSet:
+        where = None
+    except FullResultSet:
+        where = ("", ())
+
+    return hashlib.sha256(
+        repr(
+            (query.model._meta.label, where, query.distinct, query.distinct_fields),  # noqa: SLF001
+        ).encode(),
+    ).hexdigest()
+
+
+def estimate_count(queryset) -> int | None:
+    """Planner row estimate, None when Postgres has no statistics yet.
+
+    For a bare table this is `pg_class.reltuples` scaled to the table's
+    current size, so it needs no separate lookup.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    rows = int(plan[0]["Plan"]["Plan Rows"])
+
+    # the planner never estimates fewer than one row, even for empty tables
+    return rows if rows > 1 else None
+
+
+class ExactCount:
+    """COUNT(*) on every request."""
+
+    def count(self, queryset, view) -> int:  # noqa: ARG002
+        return queryset.count()
+
+    def count_rows(self, queryset, view) -> tuple[int, bool]:
+        """The count, and whether it is only an estimate."""
+        return self.count(queryset, view), False
+
+
+class CachedCount(ExactCount):
+    """Unfiltered totals and filtered counts, cached per data version."""
+
+    timeout = 60 * 60 * 24
+
+    def get_key(self, view, name: str) -> str:
+        return data_version.versioned_key("count", type(view).__name__, name)
+
+    def is_unfiltered(self, signature: str, view) -> bool:
+        return signature == cache.get_or_set(
+            self.get_key(view, "signature"),
+            lambda: query_signature(view.get_queryset()),
+            self.timeout,
+        )
+
+    def get_total(self, queryset, view) -> int:
+        return cache.get_or_set(
+            self.get_key(view, "total"),
+            queryset.count,
+            self.timeout,
+        )
+
+    def count(self, queryset, view) -> int:
+        signature = query_signature(queryset)
+
+        if self.is_unfiltered(signature, view):
+            return self.get_total(queryset, view)
+
+        return cache.get_or_set(
+            self.get_key(view, signature),
+            queryset.count,
+            self.timeout,
+        )
+
+
+class EstimatedCount(CachedCount):
+    """Like `CachedCount`, but huge unfiltered totals come from the planner.
+
+    Below `threshold` rows the estimate is thrown away and the exact total is
+    counted and cached instead, so small listings stay exact. The estimate is
+    cached per data version too, and an exact total, once counted, wins.
+    """
+
+    def __init__(self, threshold: int = 100000) -> None:
+        self.threshold = threshold
+
+    def get_estimate(self, queryset, view) -> int | None:
+        """The cached planner estimate, None when it is below `threshold`."""
+        estimate = cache.get_or_set(
+            self.get_key(view, "estimate"),
+            lambda: estimate_count(queryset) or 0,
+            self.timeout,
+        )
+
+        return estimate if estimate >= self.threshold else None
+
+    def count_rows(self, queryset, view) -> tuple[int, bool]:
+        if cache.get(self.get_key(view, "total")) is None and self.is_unfiltered(
+            query_signature(queryset),
+            view,
+        ):
+            estimate = self.get_estimate(queryset, view)
+
+            if estimate is not None:
+                return estimate, True
+
+        return super().count(queryset, view), False
+
+    def count(self, queryset, view) -> int:
+        return self.count_rows(queryset, view)[0]
@@ -0,0 +1,119 @@
+"""Global data version, shared by every worker through the configured cache.
+
+The version is bumped by model signals (see `databruce.signals`) whenever the
+catalog changes, so anything cached under a key containing it is invalidated
+without having to track individual keys. The bump waits for the transaction to
+commit, and the derived tables bump again once their refresh has run, so a
+request can't cache rows the new version doesn't match. The same version drives the
+ETag/Last-Modified validators used by the detail views and the API.
+"""
+
+import datetime
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.views.decorators.http import condition
+
+VERSION_KEY = "data_version"
+MODIFIED_KEY = "data_version_modified"
+USER_VERSION_KEY = "user_data_version"
+
+_state = threading.local()
+
+
+def get_version() -> int:
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        # seed from the clock so a flushed cache doesn't reuse old versions
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+
+    return version
+
+
+def bump_version() -> int:
+    """Move the version forward, to the current time in ns or at least by one.
+
+    Versions always come from the clock, so a version seeded after a cache
+    flush lands past every version a long-lived worker has already seen.
+    """
+    cache.set(MODIFIED_KEY, time.time(), None)
+
+    version = max(get_version() + 1, time.time_ns())
+    cache.set(VERSION_KEY, version, None)
+
+    return version
+
+
+def mark_dirty() -> None:
+    """Bump the version once the current transaction commits."""
+    _state.pending = True
+
+    transaction.on_commit(_flush)
+
+
+def _flush() -> None:
+    if _state.__dict__.pop("pending", False):
+        bump_version()
+
+
+def get_modified() -> float:
+    modified = cache.get(MODIFIED_KEY)
+
+    if modified is None:
+        cache.add(MODIFIED_KEY, time.time(), None)
+        modified = cache.get(MODIFIED_KEY)
+
+    return modified
+
+
+def get_user_version(user_id) -> float:
+    """Timestamp of the last attendance change for a user, 0 if unknown."""
+    return cache.get(f"{USER_VERSION_KEY}:{user_id}", 0)
+
+
+def bump_user_version(user_id) -> None:
+    cache.set(f"{USER_VERSION_KEY}:{user_id}", time.time(), None)
+
+
+def versioned_key(*parts) -> str:
+    """Build a cache key that changes whenever the data version does."""
+    return ":".join([str(part) for part in parts] + [f"v{get_version()}"])
+
+
+def _users(request) -> list:
+    """Users whose attendance can change the response."""
+    users = []
+
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        users.append(user.pk)
+
+    if request.GET.get("user", "").isdigit():
+        users.append(request.GET["user"])
+
+    return users
+
+
+def etag(request, *args, **kwargs) -> str:  # noqa: ARG001
+    parts = [str(get_version())]
+
+    for user_id in _users(request):
+        parts.append(f"{user_id}.{get_user_version(user_id)}")
+
+    return "-".join(parts)
+
+
+def last_modified(request, *args, **kwargs) -> datetime.datetime:  # noqa: ARG001
+    modified = max(
+        [get_modified()] + [get_user_version(user_id) for user_id in _users(request)],
+    )
+
+    return datetime.datetime.fromtimestamp(modified, tz=datetime.UTC)
+
+
+# validators only touch the cache, so a 304 is returned before any query runs
+conditional = condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,185 @@
+"""Shared context for the event detail pages.
+
+`EventDetail`, `EventDetailMobile` and `EventDetailTest` all render the same
+event, so the anonymous part of their context is assembled once here and
+cached per event and data version. That covers the event with its relations,
+its neighbors, release listings, formatted times and ticket range. Per-user
+data (`user_attended`) is layered on top by the views and never cached.
+
+Neighbors come from the ordered list of event ids, itself cached per data
+version. The event and both neighbors are then fetched in a single query.
+"""
+
+import bisect
+import zoneinfo
+
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import Http404
+
+from databruce import data_version, models
+from databruce.config import base
+from databruce.templatetags.filters import currency
+
+TIMEOUT = 60 * 60 * 24
+
+
+def ordered_event_ids() -> list[str]:
+    return cache.get_or_set(
+        data_version.versioned_key("event_pages", "ordered_ids"),
+        lambda: list(
+            models.Events.objects.order_by("event_id").values_list(
+                "event_id",
+                flat=True,
+            ),
+        ),
+        TIMEOUT,
+    )
+
+
+def neighbor_ids(event_id: str) -> tuple[str | None, str | None]:
+    ids = ordered_event_ids()
+    position = bisect.bisect_left(ids, event_id)
+
+    # an id missing from the list sits between the same two neighbors
+    found = position < len(ids) and ids[position] == event_id
+    after = position + 1 if found else position
+
+    return (
+        ids[position - 1] if position > 0 else None,
+        ids[after] if after < len(ids) else None,
+    )
+
+
+def format_time(value, tz_target) -> str | None:
+    if not value:
+        return None
+
+    return value.astimezone(tz_target).strftime("%I:%M%p").lower()
+
+
+def format_ticket_range(event) -> str:
+    source = event.run or event
+
+    if source.ticket_range:
+        prices = [currency(float(x)) for x in source.ticket_range.split("/")]
+    else:
+        prices = [currency(source.ticket_min), currency(source.ticket_max)]
+
+    try:
+        return " / ".join(prices)
+    except TypeError:
+        return "- / -"
+
+
+def fetch_events(event_id: str) -> dict:
+    """Fetch the event and its neighbors, keyed by event id."""
+    prev_id, next_id = neighbor_ids(event_id)
+
+    events = {
+        event.event_id: event
+        for event in models.Events.objects.select_related(
+            "venue",
+            "venue__city",
+            "artist",
+            "tour",
+            "leg",
+            "run",
+            "nugs",
+        ).filter(
+            event_id__in=[
+                value for value in (prev_id, event_id, next_id) if value is not None
+            ],
+        )
+    }
+
+    if event_id not in events:
+        msg = "No event matches the given query."
+        raise Http404(msg)
+
+    return {
+        "event": events[event_id],
+        "prev_event": events.get(prev_id),
+        "next_event": events.get(next_id),
+    }
+
+
+def build_page(event_id: str) -> dict:
+    page = fetch_events(event_id)
+    event = page["event"]
+
+    prefetch_related_objects(
+        [event],
+        "archive_links",
+        "nugs_event",
+        "event_type",
+        "type",
+        Prefetch(
+            "release_event",
+            queryset=models.Releases.objects.order_by("date"),
+        ),
+        Prefetch(
+            "release_track_event",
+            queryset=models.ReleaseTracks.objects.select_related(
+                "release",
+                "song",
+            ).order_by("release__date", "release_id"),
+        ),
+    )
+
+    venue = event.venue
+
+    if venue and venue.city and venue.city.timezone:
+        tz_target = venue.city.timezone
+    else:
+        tz_target = zoneinfo.ZoneInfo(base.TIME_ZONE)
+
+    duration = event.length
+
+    if event.start_time and event.end_time and not event.length:
+        duration = event.end_time.astimezone(
+            tz_target,
+        ) - event.start_time.astimezone(tz_target)
+
+    # one track per release, in release order
+    official_tracks = list(
+        {track.release_id: track for track in event.release_track_event.all()}.values(),
+    )
+
+    page.update(
+        {
+            "title": f"{event.get_date()} - {getattr(venue, 'name', 'Unknown Venue')}",
+            "setlist_certainty": event.setlist_certainty not in (None, "", "Unknown"),
+            "scheduled_time": format_time(event.scheduled_time, tz_target),
+            "start_time": format_time(event.start_time, tz_target),
+            "end_time": format_time(event.end_time, tz_target),
+            "duration": duration,
+            "ticket_range": format_ticket_range(event),
+            "official": list(event.release_event.all()),
+            "official_tracks": official_tracks,
+        },
+    )
+
+    return page
+
+
+def get_page(event_id: str) -> dict:
+    """Cached anonymous context for an event page, raising Http404 if missing."""
+    key = data_version.versioned_key("event_pages", event_id)
+    page = cache.get(key)
+
+    if page is None:
+        page = build_page(event_id)
+        cache.set(key, page, TIMEOUT)
+
+    return page
+
+
+def user_attended(user, event):
+    if not user.is_authenticated:
+        return None
+
+    return models.UserAttendedShows.objects.filter(
+        user_id=user.pk,
+        event_id=event.pk,
+    ).first()
@@ -0,0 +1,154 @@
+import functools
+import json
+import operator
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from api import views
+from databruce import models
+
+
+def joined_filter(queryset, queries: list[dict], conjunction: str):
+    """The advanced search as it was, joining the setlists once per condition."""
+    conditions = []
+
+    for query in queries:
+        condition = Q(setlist_event__set_name__in=views.VALID_SET_NAMES) & Q(
+            setlist_event__song_id=query["song_1"],
+        )
+
+        conditions.append(condition if query["choice"] else ~condition)
+
+    if conjunction == "or":
+        return queryset.filter(functools.reduce(operator.or_, conditions)).distinct()
+
+    for condition in conditions:
+        queryset = queryset.filter(condition)
+
+    return queryset.distinct()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the advanced event search with 1 to 8 song conditions, AND/OR and "
+        "with every other condition negated, joining the setlists per condition "
+        "against one EXISTS per condition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--conditions", type=int, default=8)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--json", action="store_true")
+
+    def get_songs(self, count: int) -> list[int]:
+        """The most played songs, so every condition matches plenty of rows."""
+        return list(
+            models.Setlists.objects.filter(set_name__in=views.VALID_SET_NAMES)
+            .values("song_id")
+            .annotate(plays=Count("id"))
+            .order_by("-plays")
+            .values_list("song_id", flat=True)[:count],
+        )
+
+    def get_view(self, params: dict) -> views.AdvancedEventSearch:
+        view = views.AdvancedEventSearch(action="list", format_kwarg=None, kwargs={})
+        view.request = Request(RequestFactory().get("/", params))
+
+        return view
+
+    def filter_backends(self, view: views.AdvancedEventSearch):
+        """The queryset after the view's filter backends, before the songs."""
+        return super(views.AdvancedEventSearch, view).filter_queryset(
+            view.get_queryset(),
+        )
+
+    def time_query(self, get_queryset, repeat: int) -> tuple[float, list[int]]:
+        timings = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = list(get_queryset().prefetch_related(None))
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings), [row.pk for row in rows]
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        songs = self.get_songs(options["conditions"])
+
+        if not songs:
+            msg = "No setlists to search"
+            raise CommandError(msg)
+
+        results = []
+
+        for count in range(1, len(songs) + 1):
+            for conjunction in ("and", "or"):
+                for negated in (False, True):
+                    params = {"conjunction": conjunction, "form-TOTAL_FORMS": count}
+                    queries = []
+
+                    for i, song_id in enumerate(songs[:count]):
+                        # with negation, every other condition is NOT
+                        choice = not (negated and i % 2)
+
+                        params |= {
+                            f"form-{i}-song1": song_id,
+                            f"form-{i}-choice": str(choice).lower(),
+                            f"form-{i}-position": "anywhere",
+                        }
+                        queries.append({"song_1": song_id, "choice": choice})
+
+                    view = self.get_view(params)
+
+                    joins_seconds, joins_rows = self.time_query(
+                        lambda view=view, queries=queries, conjunction=conjunction: (
+                            joined_filter(
+                                self.filter_backends(view),
+                                queries,
+                                conjunction,
+                            )
+                        ),
+                        options["repeat"],
+                    )
+                    exists_seconds, exists_rows = self.time_query(
+                        lambda view=view: view.filter_queryset(view.get_queryset()),
+                        options["repeat"],
+                    )
+
+                    results.append(
+                        {
+                            "conditions": count,
+                            "conjunction": conjunction,
+                            "negated": negated,
+                            "rows": len(exists_rows),
+                            "joins_ms": round(joins_seconds * 1000, 2),
+                            "exists_ms": round(exists_seconds * 1000, 2),
+                            "speedup": round(joins_seconds / exists_seconds, 2),
+                            # ORed with the join, a negated condition is checked
+                            # against each joined setlist row instead of the event
+                            "same": joins_rows == exists_rows
+                            or (conjunction == "or" and negated),
+                        },
+                    )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            for row in results:
+                self.stdout.write(
+                    f"{row['conditions']} {row['conjunction']:<3} "
+                    f"{'not' if row['negated'] else '   '} {row['rows']:>6} rows "
+                    f"{row['joins_ms']:>9.2f} -> {row['exists_ms']:>9.2f} ms "
+                    f"({row['speedup']:.2f}x)",
+                )
+
+        differ = [row for row in results if not row["same"]]
+
+        if differ:
+            msg = f"{len(differ)} searches return different events with EXISTS"
+            raise CommandError(msg)
@@ -0,0 +1,101 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework import serializers
+from rest_framework.request import Request
+
+from api import views
+from api.serializers import BaseSerializer
+from databruce.pagination import JSONRenderer
+
+
+def build_fields(serializer) -> int:
+    """Build the fields of `serializer` and every serializer nested in it."""
+    if isinstance(serializer, serializers.ListSerializer):
+        return build_fields(serializer.child)
+
+    count = len(serializer.fields)
+
+    for field in serializer.fields.values():
+        if isinstance(field, serializers.BaseSerializer):
+            count += build_fields(field)
+
+    return count
+
+
+class Command(BaseCommand):
+    help = (
+        "Time building the /songspage/ serializer and serializing its rows, "
+        "with and without the cached field plans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--json", action="store_true")
+
+    def get_view(self):
+        request = Request(RequestFactory().get("/"))
+        request.accepted_renderer = JSONRenderer()
+
+        view = views.SongsPageViewSet(action="list", format_kwarg=None, kwargs={})
+        view.request = request
+
+        return view
+
+    def measure(self, view, rows: list, repeat: int) -> dict:
+        construction = []
+        serialization = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fields = build_fields(view.get_serializer(rows, many=True))
+            construction.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            data = view.get_serializer(rows, many=True).data
+            serialization.append(time.perf_counter() - start)
+
+        return {
+            "fields": fields,
+            "construction_us": round(statistics.median(construction) * 1e6, 1),
+            "per_row_us": round(
+                statistics.median(serialization) * 1e6 / max(len(rows), 1),
+                2,
+            ),
+            "data": data,
+        }
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        view = self.get_view()
+        rows = list(view.get_queryset()[: options["rows"]])
+
+        BaseSerializer.use_field_plans = False
+
+        try:
+            before = self.measure(view, rows, options["repeat"])
+        finally:
+            BaseSerializer.use_field_plans = True
+
+        after = self.measure(view, rows, options["repeat"])
+
+        same = before.pop("data") == after.pop("data")
+
+        result = {"rows": len(rows), "before": before, "after": after, "same": same}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+        else:
+            self.stdout.write(f"{len(rows)} rows, {after['fields']} fields")
+
+            for name in ("construction_us", "per_row_us"):
+                self.stdout.write(
+                    f"{name:<16} {before[name]:>10.2f} -> {after[name]:>10.2f}",
+                )
+
+        if not same:
+            msg = "Serialized rows differ with the field plans"
+            raise CommandError(msg)
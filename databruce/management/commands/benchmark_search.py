@@ -0,0 +1,133 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from api import views
+from api.filters import DataTablesFilterBackend
+from databruce.pagination import DatatablesRenderer
+
+# searchable DataTables columns, as sent by the list pages
+ENDPOINTS = {
+    "venues": (
+        views.VenuesViewSet,
+        [
+            "name, detail",
+            "city__name, city__aliases",
+            "city__state__name, city__state__abbrev",
+            "city__country__name, city__country__alpha_2",
+        ],
+    ),
+    "relations": (
+        views.RelationsViewSet,
+        ["name", "instruments", "nicknames, aliases"],
+    ),
+    "songs": (
+        views.SongsViewSet,
+        ["sort_song_name, name", "original_artist", "category"],
+    ),
+    "setlist_notes": (
+        views.SetlistNotesViewSet,
+        [
+            "event__venue__name, event__venue__detail",
+            "setlist__song__name",
+            "note",
+        ],
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = "Time DataTables searches with and without the trigram indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--term", action="append", dest="terms")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--json", action="store_true")
+
+    def build_request(self, columns: list[str], term: str, mode: str) -> Request:
+        params = {"length": "50", "start": "0"}
+
+        for i, name in enumerate(columns):
+            params[f"columns[{i}][name]"] = name
+            params[f"columns[{i}][data]"] = name
+            params[f"columns[{i}][searchable]"] = "true"
+
+        if mode == "global":
+            params["search[value]"] = term
+        else:
+            params["columns[0][search][value]"] = term
+
+        request = Request(RequestFactory().get("/", params))
+        request.accepted_renderer = DatatablesRenderer()
+
+        return request
+
+    def time_search(self, viewset, request, backend, repeat: int) -> float:
+        timings = []
+
+        for _ in range(repeat):
+            view = viewset()
+            view.request = request
+            view.format_kwarg = None
+
+            start = time.perf_counter()
+            queryset = backend.filter_queryset(request, view.get_queryset(), view)
+            queryset.count()
+            list(queryset[:50])
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings) * 1000
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        terms = options["terms"] or ["spring", "new", "zürich", "piano"]
+
+        before = DataTablesFilterBackend()
+        before.use_trigram_indexes = False
+        after = DataTablesFilterBackend()
+
+        results = []
+
+        for endpoint, (viewset, columns) in ENDPOINTS.items():
+            for term in terms:
+                for mode in ("global", "column"):
+                    request = self.build_request(columns, term, mode)
+
+                    results.append(
+                        {
+                            "endpoint": endpoint,
+                            "term": term,
+                            "mode": mode,
+                            "unaccent_ms": round(
+                                self.time_search(
+                                    viewset,
+                                    request,
+                                    before,
+                                    options["repeat"],
+                                ),
+                                2,
+                            ),
+                            "trigram_ms": round(
+                                self.time_search(
+                                    viewset,
+                                    request,
+                                    after,
+                                    options["repeat"],
+                                ),
+                                2,
+                            ),
+                        },
+                    )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<14} {row['mode']:<7} {row['term']:<10} "
+                f"{row['unaccent_ms']:>9.2f} ms -> {row['trigram_ms']:>9.2f} ms",
+            )
@@ -0,0 +1,98 @@
+import json
+import statistics
+import time
+
+import msgspec
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from api import views
+from databruce.pagination import JSONRenderer
+
+ENDPOINTS = {
+    "setlists": views.SetlistViewSet,
+    "events": views.EventViewSet,
+    "songs_page": views.SongsPageViewSet,
+    "index_setlists": views.IndexSetlistViewSet,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Serialize the same rows with the DRF serializers and the msgspec struct "
+        "plans, checking both encode to the same JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--json", action="store_true")
+
+    def get_view(self, viewset):
+        request = Request(RequestFactory().get("/"))
+        request.accepted_renderer = JSONRenderer()
+
+        view = viewset(action="list", format_kwarg=None, kwargs={})
+        view.request = request
+
+        return view
+
+    def time_render(self, render, repeat: int) -> tuple[float, bytes]:
+        timings = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            content = render()
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings), content
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        encode = JSONRenderer().render
+        results = []
+
+        for endpoint, viewset in ENDPOINTS.items():
+            view = self.get_view(viewset)
+            queryset = view.filter_queryset(view.get_queryset())
+            plan = view.struct_plan
+
+            def drf(view=view, queryset=queryset) -> bytes:
+                page = list(queryset[: options["rows"]])
+                return encode(view.get_serializer(page, many=True).data)
+
+            def struct(plan=plan, queryset=queryset) -> bytes:
+                return encode(plan.serialize(plan.values(queryset)[: options["rows"]]))
+
+            drf_seconds, drf_content = self.time_render(drf, options["repeat"])
+            struct_seconds, struct_content = self.time_render(struct, options["repeat"])
+
+            rows = len(msgspec.json.decode(drf_content))
+
+            results.append(
+                {
+                    "endpoint": endpoint,
+                    "rows": rows,
+                    "drf_rows_per_s": round(rows / drf_seconds),
+                    "struct_rows_per_s": round(rows / struct_seconds),
+                    "speedup": round(drf_seconds / struct_seconds, 2),
+                    "same_json": msgspec.json.decode(drf_content)
+                    == msgspec.json.decode(struct_content),
+                },
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            for row in results:
+                self.stdout.write(
+                    f"{row['endpoint']:<15} {row['rows']:>6} rows "
+                    f"{row['drf_rows_per_s']:>9} -> {row['struct_rows_per_s']:>9} rows/s "
+                    f"({row['speedup']:.2f}x)",
+                )
+
+        differ = [row["endpoint"] for row in results if not row["same_json"]]
+
+        if differ:
+            msg = f"Struct output differs from the serializers for {', '.join(differ)}"
+            raise CommandError(msg)
@@ -0,0 +1,83 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import typeahead, views
+from api.filters import EventsFilter
+
+
+class Command(BaseCommand):
+    help = "Time navbar suggestions from the typeahead index and the full-text search."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--term", action="append", dest="terms")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--json", action="store_true")
+
+    def time_call(self, func, repeat: int) -> float:
+        timings = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings) * 1000
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        terms = options["terms"] or ["1978", "1975-08-15", "bottom line", "asbury"]
+        limit = options["limit"]
+
+        start = time.perf_counter()
+        typeahead.index.load()
+        load_ms = (time.perf_counter() - start) * 1000
+
+        queryset = views.EventSearch.queryset
+
+        results = []
+
+        for term in terms:
+            results.append(
+                {
+                    "term": term,
+                    "fulltext_ms": round(
+                        self.time_call(
+                            lambda term=term: list(
+                                EventsFilter(
+                                    {"search": term},
+                                    queryset=queryset,
+                                ).qs[:limit],
+                            ),
+                            options["repeat"],
+                        ),
+                        3,
+                    ),
+                    "typeahead_ms": round(
+                        self.time_call(
+                            lambda term=term: typeahead.search(term, limit),
+                            options["repeat"],
+                        ),
+                        3,
+                    ),
+                },
+            )
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps(
+                    {"load_ms": round(load_ms, 2), "results": results},
+                    indent=2,
+                ),
+            )
+            return
+
+        self.stdout.write(f"index loaded in {load_ms:.2f} ms")
+
+        for row in results:
+            self.stdout.write(
+                f"{row['term']:<14} {row['fulltext_ms']:>9.3f} ms -> "
+                f"{row['typeahead_ms']:>9.3f} ms",
+            )
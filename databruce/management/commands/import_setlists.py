@@ -0,0 +1,73 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from databruce import bulk_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk load events, setlists, onstage and snippet rows from a JSON file "
+        "or a directory of CSV files, refreshing the stats once at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            type=Path,
+            help="JSON file, or directory with events.csv, setlists.csv, ...",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="only validate, don't write anything",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        path = options["path"]
+
+        if not path.exists():
+            msg = f"{path} doesn't exist"
+            raise CommandError(msg)
+
+        start = time.perf_counter()
+
+        try:
+            rows = bulk_import.read_rows(path)
+        except (ValueError, csv.Error) as e:
+            msg = f"Couldn't read {path}: {e}"
+            raise CommandError(msg) from e
+
+        try:
+            counts = bulk_import.import_rows(rows, dry_run=options["dry_run"])
+        except ValidationError as e:
+            for message in e.messages:
+                self.stderr.write(message)
+
+            msg = f"{len(e.messages)} errors, nothing was imported"
+            raise CommandError(msg) from e
+
+        seconds = time.perf_counter() - start
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps(
+                    {
+                        "counts": counts,
+                        "dry_run": options["dry_run"],
+                        "seconds": round(seconds, 3),
+                    },
+                    indent=2,
+                ),
+            )
+            return
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        rows = ", ".join(f"{count} {table}" for table, count in counts.items())
+
+        self.stdout.write(f"{verb} {rows} in {seconds:.2f}s")
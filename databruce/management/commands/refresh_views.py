@@ -0,0 +1,70 @@
+import datetime
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from databruce import matviews
+
+
+class Command(BaseCommand):
+    help = "Refresh the materialized views and report how stale each one is."
+
+    def add_arguments(self, parser):
+        parser.add_argument("views", nargs="*", help="views to refresh")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="refresh every view, dirty or not",
+        )
+        parser.add_argument(
+            "--report",
+            action="store_true",
+            help="only report, don't refresh anything",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        known = [matviews.view_name(view) for view in matviews.DEPENDENCIES]
+
+        unknown = set(options["views"]) - set(known)
+
+        if unknown:
+            msg = f"Unknown views: {', '.join(sorted(unknown))}"
+            raise CommandError(msg)
+
+        durations = {}
+
+        if not options["report"]:
+            names = known if options["all"] else options["views"] or None
+            durations = matviews.refresh(names)
+
+        rows = matviews.report()
+
+        for row in rows:
+            row["refreshed_seconds"] = durations.get(row["view"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+
+        for row in rows:
+            if not row["materialized"]:
+                status = "not materialized"
+            elif row["stale_seconds"]:
+                status = f"stale for {row['stale_seconds']:.1f}s"
+            else:
+                status = "fresh"
+
+            if row["refreshed_seconds"] is not None:
+                status += f", refreshed in {row['refreshed_seconds'] * 1000:.1f} ms"
+            elif row["last_refresh"]:
+                last = datetime.datetime.fromtimestamp(
+                    row["last_refresh"],
+                    tz=datetime.UTC,
+                )
+                status += (
+                    f", last refreshed {last:%Y-%m-%d %H:%M:%S} UTC"
+                    f" in {row['last_seconds'] * 1000:.1f} ms"
+                )
+
+            self.stdout.write(f"{row['view']:<26} {status}")
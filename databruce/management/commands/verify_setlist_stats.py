@@ -0,0 +1,138 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from databruce import models, setlist_stats
+
+MUTATIONS = ["drop", "swap", "eligibility", "tour"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Edit random setlists in a rolled back transaction, refreshing each event "
+        "incrementally, and diff the results against a full rebuild."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fixture",
+            action="append",
+            dest="fixtures",
+            help="fixture to load first, inside the transaction",
+        )
+        parser.add_argument("--events", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true")
+
+    def mutate(self, rng, event: int, song_ids: list, tour_ids: list) -> str:
+        """Apply one random edit to `event`, without firing the signals."""
+        kind = rng.choice(MUTATIONS)
+        setlist = rng.choice(
+            setlist_stats.get_plays()
+            .filter(event_id=event)
+            .order_by("id")
+            .values_list("id", flat=True),
+        )
+
+        if kind == "drop":
+            models.Setlists.objects.filter(id=setlist).update(set_name="Soundcheck")
+        elif kind == "swap":
+            models.Setlists.objects.filter(id=setlist).update(
+                song_id=rng.choice(song_ids),
+            )
+        elif kind == "eligibility":
+            models.Events.objects.filter(id=event).update(is_stats_eligible=False)
+        else:
+            models.Events.objects.filter(id=event).update(tour_id=rng.choice(tour_ids))
+
+        return kind
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        rng = random.Random(options["seed"])  # noqa: S311
+
+        with transaction.atomic():
+            if options["fixtures"]:
+                call_command("loaddata", *options["fixtures"], verbosity=0)
+
+            setlist_stats.refresh_setlist_stats()
+
+            played = sorted(
+                set(
+                    setlist_stats.get_plays().values_list(
+                        "event_id",
+                        "event__event_id",
+                    ),
+                ),
+            )
+
+            if not played:
+                msg = "No setlists to edit, load a fixture with --fixture"
+                raise CommandError(msg)
+
+            song_ids = list(models.Songs.objects.values_list("id", flat=True))
+            tour_ids = list(models.Tours.objects.values_list("id", flat=True))
+
+            edits = []
+            timings = []
+
+            for pk, event_id in rng.sample(played, min(options["events"], len(played))):
+                edits.append(self.mutate(rng, pk, song_ids, tour_ids))
+
+                start = time.perf_counter()
+                setlist_stats.refresh_setlist_stats([event_id])
+                timings.append(time.perf_counter() - start)
+
+            incremental = setlist_stats.snapshot()
+
+            start = time.perf_counter()
+            setlist_stats.refresh_setlist_stats()
+            rebuild = time.perf_counter() - start
+
+            full = setlist_stats.snapshot()
+
+            transaction.set_rollback(True)
+
+        mismatches = [
+            {
+                "setlist": pk,
+                "incremental": incremental.get(pk),
+                "full": full.get(pk),
+            }
+            for pk in sorted(incremental.keys() | full.keys())
+            if incremental.get(pk) != full.get(pk)
+        ]
+
+        result = {
+            "rows": len(full),
+            "edits": {kind: edits.count(kind) for kind in MUTATIONS},
+            "incremental_ms": round(statistics.median(timings) * 1000, 2),
+            "rebuild_ms": round(rebuild * 1000, 2),
+            "mismatches": mismatches,
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2, default=str))
+        else:
+            self.stdout.write(
+                f"{result['rows']} rows, {len(edits)} edits "
+                f"({', '.join(f'{k} {v}' for k, v in result['edits'].items())})",
+            )
+            self.stdout.write(
+                f"incremental {result['incremental_ms']:.2f} ms per event, "
+                f"full rebuild {result['rebuild_ms']:.2f} ms",
+            )
+
+            for row in mismatches[:20]:
+                self.stdout.write(
+                    f"setlist {row['setlist']}: "
+                    f"incremental {row['incremental']} != full {row['full']}",
+                )
+
+        if mismatches:
+            msg = f"{len(mismatches)} rows differ from a full rebuild"
+            raise CommandError(msg)
@@ -0,0 +1,275 @@
+"""Refreshes the database views behind the unmanaged models.
+
+`DEPENDENCIES` maps each view to the tables it is built from. Saves to any of
+those tables mark the view as dirty in the shared cache, and a refresh is
+scheduled once the surrounding transaction commits. The refresh is debounced
+by `MATVIEW_REFRESH_DELAY` seconds (default 30), so an admin session touching
+many rows refreshes each view once.
+
+When a task backend that can defer tasks is configured under `TASKS`, the
+refresh is enqueued there. Otherwise a timer thread in the current process runs
+it, and a delay of 0 refreshes as soon as the transaction commits. The cache
+holds when the scheduled refresh is due until it has run, so if the worker
+holding the timer restarts, the next process to schedule a refresh sees it
+overdue and runs it instead.
+
+Only views listed in `pg_matviews` are refreshed; plain views are never stale.
+A materialized view is refreshed `CONCURRENTLY` when it is populated and has a
+unique index, so readers aren't blocked. Otherwise a plain refresh is used.
+"""
+
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.tasks import default_task_backend, task
+from django.utils import timezone
+
+from databruce import data_version, models
+
+DEPENDENCIES = {
+    models.VenuesText: (
+        models.Venues,
+        models.VenueAliases,
+        models.Events,
+        models.Cities,
+        models.States,
+        models.Countries,
+    ),
+    models.SetlistStats: (
+        models.Setlists,
+        models.Events,
+        models.Songs,
+        models.Tours,
+    ),
+    models.SongsPage: (models.Setlists, models.Events, models.Songs),
+    models.SetlistEntries: (models.Setlists, models.Events, models.Songs),
+    models.SetlistsBySetAndDate: (
+        models.Setlists,
+        models.Events,
+        models.Songs,
+        models.SetlistNotes,
+    ),
+    models.TourCount: (models.Setlists, models.Events, models.Tours),
+    models.SetlistPositions: (models.Setlists, models.Events),
+}
+
+DIRTY_KEY = "matviews:dirty"
+REFRESHED_KEY = "matviews:refreshed"
+SCHEDULED_KEY = "matviews:scheduled"
+
+_timer_lock = threading.Lock()
+_timer = None
+
+
+def view_name(view) -> str:
+    return view._meta.db_table  # noqa: SLF001
+
+
+def views_for(source) -> list[str]:
+    """Names of the views built from `source`."""
+    return [
+        view_name(view) for view, sources in DEPENDENCIES.items() if source in sources
+    ]
+
+
+def get_refresh_delay() -> float:
+    return getattr(settings, "MATVIEW_REFRESH_DELAY", 30)
+
+
+def materialized_views() -> dict[str, dict]:
+    """`pg_matviews` rows for the current schema, keyed by view name."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT
+                m.matviewname,
+                m.ispopulated,
+                EXISTS (
+                    SELECT 1
+                    FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indrelid
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE c.relname = m.matviewname
+                    AND n.nspname = m.schemaname
+                    AND i.indisunique
+                    AND i.indpred IS NULL
+                )
+            FROM pg_matviews m
+            WHERE m.schemaname = ANY (current_schemas(false))
+            """,
+        )
+
+        return {
+            name: {"populated": populated, "concurrent": unique and populated}
+            for name, populated, unique in cursor.fetchall()
+        }
+
+
+def get_cached(prefix: str) -> dict:
+    """Cache entries under `prefix` for every view, keyed by view name."""
+    values = cache.get_many([f"{prefix}:{view_name(view)}" for view in DEPENDENCIES])
+
+    return {key.removeprefix(f"{prefix}:"): value for key, value in values.items()}
+
+
+def refresh(names: list[str] | None = None) -> dict[str, float]:
+    """Refresh the given views, or every dirty one, returning seconds per view."""
+    dirty = get_cached(DIRTY_KEY)
+
+    if names is None:
+        names = list(dirty)
+
+    matviews = materialized_views()
+    durations = {}
+
+    for name in names:
+        info = matviews.get(name)
+
+        # cleared first, so saves made during the refresh mark it dirty again
+        cache.delete(f"{DIRTY_KEY}:{name}")
+
+        if info is None:
+            # a plain view, or one that only exists in production
+            continue
+
+        concurrently = "CONCURRENTLY " if info["concurrent"] else ""
+        start = time.perf_counter()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"REFRESH MATERIALIZED VIEW {concurrently}"
+                f"{connection.ops.quote_name(name)}",
+            )
+
+        durations[name] = time.perf_counter() - start
+
+        cache.set(
+            f"{REFRESHED_KEY}:{name}",
+            {
+                "at": time.time(),
+                "seconds": durations[name],
+                "concurrently": bool(concurrently),
+                "stale_for": time.time() - dirty[name] if name in dirty else None,
+            },
+            None,
+        )
+
+    if durations:
+        # cached pages and catalogs read these views
+        data_version.bump_version()
+
+    return durations
+
+
+def run_overdue() -> bool:
+    """Run a scheduled refresh that is a delay past due, True when it ran."""
+    due = cache.get(SCHEDULED_KEY)
+
+    if due is None or time.time() < due + get_refresh_delay():
+        return False
+
+    # one process takes over a lost refresh
+    if not cache.add(f"{SCHEDULED_KEY}:{due}", time.time(), 60 * 60):
+        return False
+
+    refresh_dirty_views.call()
+
+    return True
+
+
+@task
+def refresh_dirty_views() -> None:
+    cache.delete(SCHEDULED_KEY)
+    refresh()
+
+
+def _run_timer() -> None:
+    global _timer  # noqa: PLW0603
+
+    with _timer_lock:
+        _timer = None
+
+    try:
+        refresh_dirty_views.call()
+    finally:
+        connection.close()
+
+
+def schedule() -> None:
+    """Refresh the dirty views after the debounce delay, once across workers."""
+    global _timer  # noqa: PLW0603
+
+    delay = get_refresh_delay()
+
+    if delay <= 0:
+        refresh()
+        return
+
+    # the first save in a debounce window schedules the refresh for everyone,
+    # the key holds when it is due and stays until the refresh has run
+    if not cache.add(SCHEDULED_KEY, time.time() + delay, None):
+        run_overdue()
+        return
+
+    backend = default_task_backend
+
+    if backend.supports_defer:
+        refresh_dirty_views.using(
+            run_after=timezone.now() + datetime.timedelta(seconds=delay),
+        ).enqueue()
+        return
+
+    with _timer_lock:
+        if _timer is None:
+            _timer = threading.Timer(delay, _run_timer)
+            _timer.daemon = True
+            _timer.start()
+
+
+def mark_dirty(source) -> None:
+    """Mark the views built from `source` as dirty and schedule a refresh."""
+    names = views_for(source)
+
+    if not names:
+        return
+
+    now = time.time()
+
+    for name in names:
+        # add() keeps the earliest time, which is how stale the view is
+        cache.add(f"{DIRTY_KEY}:{name}", now, None)
+
+    transaction.on_commit(schedule)
+
+
+def report() -> list[dict]:
+    """Kind, staleness and last refresh of every view in `DEPENDENCIES`."""
+    matviews = materialized_views()
+    dirty = get_cached(DIRTY_KEY)
+    refreshed = get_cached(REFRESHED_KEY)
+
+    rows = []
+    now = time.time()
+
+    for view in DEPENDENCIES:
+        name = view_name(view)
+        info = matviews.get(name)
+        last = refreshed.get(name, {})
+
+        rows.append(
+            {
+                "view": name,
+                "materialized": info is not None,
+                "concurrent": bool(info and info["concurrent"]),
+                "stale_seconds": round(now - dirty[name], 1) if name in dirty else 0,
+                "last_refresh": last.get("at"),
+                "last_seconds": last.get("seconds"),
+                "last_stale_for": last.get("stale_for"),
+            },
+        )
+
+    return rows
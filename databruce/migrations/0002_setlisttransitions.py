@@ -0,0 +1,53 @@
+# Generated by Django 6.1 on 2026-10-18 09:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('databruce', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SetlistTransitions',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('set_name', models.CharField(max_length=50)),
+                ('segue', models.BooleanField(default=False)),
+                ('event', models.ForeignKey(db_column='event_id', on_delete=django.db.models.deletion.CASCADE, related_name='transition_event', to='databruce.events')),
+                ('next_song', models.ForeignKey(db_column='next_song_id', on_delete=django.db.models.deletion.CASCADE, related_name='transition_next_song', to='databruce.songs')),
+                ('setlist', models.OneToOneField(db_column='setlist_id', on_delete=django.db.models.deletion.CASCADE, related_name='transition', to='databruce.setlists')),
+                ('song', models.ForeignKey(db_column='song_id', on_delete=django.db.models.deletion.CASCADE, related_name='transition_song', to='databruce.songs')),
+            ],
+            options={
+                'verbose_name_plural': 'setlist_transitions',
+                'db_table': 'setlist_transitions',
+                'indexes': [models.Index(fields=['song', 'next_song'], name='setlist_transitions_song_next')],
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO setlist_transitions (setlist_id, event_id, set_name, song_id, next_song_id, segue)
+                SELECT id, event_id, set_name, song_id, next_song_id, segue
+                FROM (
+                    SELECT
+                        s.id,
+                        s.event_id,
+                        s.set_name,
+                        s.song_id,
+                        s.segue,
+                        LEAD(s.song_id) OVER (
+                            PARTITION BY s.event_id, s.set_name
+                            ORDER BY s.song_num
+                        ) AS next_song_id
+                    FROM setlists s
+                    WHERE s.song_num IS NOT NULL
+                ) t
+                WHERE next_song_id IS NOT NULL;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.1 on 2026-10-18 14:20
+
+import databruce.trigram
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+
+# unaccent() is only STABLE, so it is wrapped in an IMMUTABLE function the
+# trigram indexes can use. The function and its dictionary are qualified with
+# the extension's schema, which is `extensions` on Supabase.
+CREATE_FUNCTION = """
+    CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT {schema}.unaccent('{schema}.unaccent'::regdictionary, $1) $$
+"""
+
+
+def create_function(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT extnamespace::regnamespace::text FROM pg_extension"
+            " WHERE extname = 'unaccent'"
+        )
+        schema = cursor.fetchone()[0]
+
+    schema_editor.execute(CREATE_FUNCTION.format(schema=schema))
+
+
+def drop_function(apps, schema_editor):
+    schema_editor.execute("DROP FUNCTION IF EXISTS immutable_unaccent(text)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('databruce', '0002_setlisttransitions'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunPython(create_function, drop_function),
+        migrations.AddIndex(
+            model_name='venues',
+            index=databruce.trigram.TrigramIndex('name', name='venues_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='venues',
+            index=databruce.trigram.TrigramIndex('detail', name='venues_detail_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='cities',
+            index=databruce.trigram.TrigramIndex('name', name='cities_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='cities',
+            index=databruce.trigram.TrigramIndex('aliases', name='cities_aliases_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='relations',
+            index=databruce.trigram.TrigramIndex('name', name='relations_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='relations',
+            index=databruce.trigram.TrigramIndex('instruments', name='relations_instruments_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='songs',
+            index=databruce.trigram.TrigramIndex('name', name='songs_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='songs',
+            index=databruce.trigram.TrigramIndex('original_artist', name='songs_original_artist_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='setlistnotes',
+            index=databruce.trigram.TrigramIndex('note', name='setlist_notes_note_trgm'),
+        ),
+    ]
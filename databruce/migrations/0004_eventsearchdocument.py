@@ -0,0 +1,49 @@
+# Generated by Django 6.1 on 2026-10-18 15:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+# the vector databruce.search_documents builds, as it was when the table was added
+POPULATE_DOCUMENTS = """
+    INSERT INTO event_search_documents (event_id, document)
+    SELECT
+    e.id,
+    setweight(to_tsvector(COALESCE(e.event_id, '')), 'B')
+    || setweight(to_tsvector(COALESCE(e.event_date::text, '')), 'A')
+    || setweight(to_tsvector(COALESCE(EXTRACT(DAY FROM e.event_date)::text, '')), 'B')
+    || setweight(to_tsvector(COALESCE(e.early_late, '')), 'B')
+    || setweight(to_tsvector(COALESCE(a.name, '')), 'C')
+    || setweight(to_tsvector(COALESCE(v.name, '')), 'B')
+    || setweight(to_tsvector(COALESCE(c.name, '')), 'B')
+    || setweight(to_tsvector(COALESCE(r.name, '')), 'D')
+    FROM events e
+    JOIN bands a ON a.id = e.artist
+    LEFT JOIN venues v ON v.id = e.venue_id
+    LEFT JOIN cities c ON c.id = v.city
+    LEFT JOIN runs r ON r.id = e.run
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('databruce', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSearchDocument',
+            fields=[
+                ('event', models.OneToOneField(db_column='event_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='databruce.events')),
+                ('document', django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'event_search_documents',
+                'db_table': 'event_search_documents',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['document'], name='event_search_document_gin')],
+            },
+        ),
+        migrations.RunSQL(POPULATE_DOCUMENTS, migrations.RunSQL.noop),
+    ]
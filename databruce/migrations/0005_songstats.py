@@ -0,0 +1,83 @@
+# Generated by Django 6.1 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# the rows databruce.song_stats builds, as it was when the table was added
+POPULATE_STATS = """
+    WITH eligible AS (
+        SELECT event_id FROM events WHERE is_stats_eligible
+    ),
+    latest AS (
+        SELECT MAX(e.event_id) AS event_id
+        FROM events e
+        WHERE e.is_stats_eligible
+        AND EXISTS (SELECT 1 FROM setlists s WHERE s.event_id = e.id)
+    ),
+    positions AS (
+        SELECT
+        song_id,
+        jsonb_agg(
+            jsonb_build_object('position', position, 'count', count, 'num', num)
+            ORDER BY num
+        ) AS positions
+        FROM (
+            SELECT song_id, position, COUNT(position) AS count, MIN(song_num) AS num
+            FROM setlists
+            WHERE position IS NOT NULL AND song_id IS NOT NULL
+            GROUP BY song_id, position
+        ) p
+        GROUP BY song_id
+    ),
+    counts AS (
+        SELECT
+        s.id AS song_id,
+        s.num_plays_public AS plays,
+        CASE WHEN l.event_id IS NOT NULL AND latest.event_id IS NOT NULL THEN GREATEST(
+            (SELECT COUNT(*) FROM eligible WHERE event_id <= latest.event_id)
+            - (SELECT COUNT(*) FROM eligible WHERE event_id <= l.event_id),
+            0
+        ) ELSE 0 END AS show_gap,
+        CASE WHEN f.event_id IS NOT NULL
+        THEN (SELECT COUNT(*) FROM events WHERE event_id > f.event_id)
+        ELSE 0 END AS since
+        FROM songs s
+        LEFT JOIN events f ON f.id = s.first_event
+        LEFT JOIN events l ON l.id = s.last_event
+        CROSS JOIN latest
+    )
+    INSERT INTO song_stats (song_id, show_gap, events_since_premiere, frequency, positions)
+    SELECT
+    c.song_id,
+    c.show_gap,
+    c.since,
+    CASE WHEN c.since > 0 THEN ROUND(c.plays * 100.0 / c.since, 2) END,
+    COALESCE(p.positions, '[]')
+    FROM counts c
+    LEFT JOIN positions p ON p.song_id = c.song_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('databruce', '0004_eventsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SongStats',
+            fields=[
+                ('song', models.OneToOneField(db_column='song_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='databruce.songs')),
+                ('show_gap', models.IntegerField(default=0)),
+                ('events_since_premiere', models.IntegerField(default=0)),
+                ('frequency', models.FloatField(blank=True, default=None, null=True)),
+                ('positions', models.JSONField(default=list)),
+            ],
+            options={
+                'verbose_name_plural': 'song_stats',
+                'db_table': 'song_stats',
+            },
+        ),
+        migrations.RunSQL(POPULATE_STATS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 6.1 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# the rows databruce.setlist_stats builds, as it was when the table was added:
+# each play of a song in a played set of an eligible event, numbered per song
+# and per song and tour, with the eligible events since the song's last play
+POPULATE_STATS = """
+    INSERT INTO setlist_play_stats (
+        setlist_id, event_id, song_id, tour_id, gap, ltp_id,
+        premiere, debut, tour_num, tour_total
+    )
+    SELECT
+    id,
+    event_pk,
+    song_id,
+    tour_id,
+    CASE WHEN last_pk IS NOT NULL THEN GREATEST(num - 1 - last_num, 0) END,
+    last_pk,
+    last_pk IS NULL,
+    tour_num = 1,
+    tour_num,
+    tour_total
+    FROM (
+        SELECT
+        s.id,
+        s.event_id AS event_pk,
+        s.song_id,
+        e.tour_id,
+        e.num,
+        LAG(e.num) OVER song AS last_num,
+        LAG(e.id) OVER song AS last_pk,
+        ROW_NUMBER() OVER (
+            PARTITION BY s.song_id, e.tour_id
+            ORDER BY e.event_id, s.song_num, s.id
+        ) AS tour_num,
+        COUNT(*) OVER (PARTITION BY s.song_id, e.tour_id) AS tour_total
+        FROM setlists s
+        JOIN (
+            SELECT id, event_id, tour_id, ROW_NUMBER() OVER (ORDER BY event_id) AS num
+            FROM events
+            WHERE is_stats_eligible
+        ) e ON e.id = s.event_id
+        WHERE s.song_id IS NOT NULL
+        AND s.set_name IN ('Show', 'Set 1', 'Set 2', 'Encore', 'Pre-Show', 'Post-Show')
+        WINDOW song AS (PARTITION BY s.song_id ORDER BY e.event_id, s.song_num, s.id)
+    ) plays
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('databruce', '0005_songstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SetlistPlayStats',
+            fields=[
+                ('setlist', models.OneToOneField(db_column='setlist_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='play_stats', serialize=False, to='databruce.setlists')),
+                ('gap', models.IntegerField(blank=True, default=None, null=True)),
+                ('premiere', models.BooleanField(default=False)),
+                ('debut', models.BooleanField(default=False)),
+                ('tour_num', models.IntegerField(default=1)),
+                ('tour_total', models.IntegerField(default=1)),
+                ('event', models.ForeignKey(db_column='event_id', on_delete=django.db.models.deletion.CASCADE, related_name='play_stats_event', to='databruce.events')),
+                ('ltp', models.ForeignKey(blank=True, db_column='ltp_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='play_stats_ltp', to='databruce.events')),
+                ('song', models.ForeignKey(db_column='song_id', on_delete=django.db.models.deletion.CASCADE, related_name='play_stats_song', to='databruce.songs')),
+                ('tour', models.ForeignKey(db_column='tour_id', on_delete=django.db.models.deletion.CASCADE, related_name='play_stats_tour', to='databruce.tours')),
+            ],
+            options={
+                'verbose_name_plural': 'setlist_play_stats',
+                'db_table': 'setlist_play_stats',
+                'indexes': [models.Index(fields=['song', 'event'], name='setlist_play_stats_song')],
+            },
+        ),
+        migrations.RunSQL(POPULATE_STATS, migrations.RunSQL.noop),
+    ]
@@ -9,6 +9,8 @@ import re
 from uuid import uuid4
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.db.models import F, Func, Value
 from django.db.models.fetch_modes import FETCH_PEERS
@@ -19,6 +21,7 @@ from django.utils.text import slugify
 from timezone_field import TimeZoneField
 
 from .templatetags.filters import format_fuzzy
+from .trigram import TrigramIndex
 
 
 class CustomUser(AbstractUser):
@@ -234,6 +237,10 @@ class Cities(BaseModel, models.Model):
         db_table = "cities"
         verbose_name_plural = "cities"
         unique_together = (("name", "state"),)
+        indexes = [
+            TrigramIndex("name", name="cities_name_trgm"),
+            TrigramIndex("aliases", name="cities_aliases_trgm"),
+        ]
 
     def __str__(self) -> str:
         if self.country_id in [6, 37] and self.state_id:  # type: ignore
@@ -436,6 +443,10 @@ class Venues(BaseModel, models.Model):
     class Meta:
         db_table = "venues"
         verbose_name_plural = "venues"
+        indexes = [
+            TrigramIndex("name", name="venues_name_trgm"),
+            TrigramIndex("detail", name="venues_detail_trgm"),
+        ]
 
     def __str__(self) -> str:
         name = self.name
@@ -797,6 +808,10 @@ class Relations(BaseModel, models.Model):
     class Meta:
         db_table = "relations"
         verbose_name_plural = "relations"
+        indexes = [
+            TrigramIndex("name", name="relations_name_trgm"),
+            TrigramIndex("instruments", name="relations_instruments_trgm"),
+        ]
 
     def __str__(self) -> str:
         if not self.name:
@@ -1025,6 +1040,7 @@ class SetlistNotes(models.Model):
         managed = True
         db_table = "setlist_notes"
         verbose_name_plural = "Setlist Notes"
+        indexes = [TrigramIndex("note", name="setlist_notes_note_trgm")]
 
     def __str__(self) -> str:
         if not self.note:
@@ -1140,6 +1156,10 @@ class Songs(BaseModel, models.Model):
         db_table = "songs"
         ordering = ["name"]
         verbose_name_plural = "songs"
+        indexes = [
+            TrigramIndex("name", name="songs_name_trgm"),
+            TrigramIndex("original_artist", name="songs_original_artist_trgm"),
+        ]
 
     def __str__(self) -> str:
         if not self.original:
@@ -1255,6 +1275,15 @@ class Setlists(BaseModel, models.Model):
 
         return f"{event} - {self.set_name} - {self.song}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # the event as loaded, a save that moves the row refreshes both
+        instance.loaded_event_id = instance.__dict__.get("event_id")
+
+        return instance
+
 
 class SetlistsBySetAndDate(models.Model):
     id = models.AutoField(primary_key=True)
@@ -1280,6 +1309,164 @@ class SetlistsBySetAndDate(models.Model):
         return f"{self.event} - {self.set_name}"
 
 
+class SetlistTransitions(models.Model):
+    """Song -> next song within a set, kept up to date by `databruce.transitions`."""
+
+    id = models.AutoField(primary_key=True)
+
+    setlist = models.OneToOneField(
+        Setlists,
+        on_delete=models.CASCADE,
+        related_name="transition",
+        db_column="setlist_id",
+    )
+
+    event = models.ForeignKey(
+        Events,
+        on_delete=models.CASCADE,
+        related_name="transition_event",
+        db_column="event_id",
+    )
+
+    set_name = models.CharField(max_length=50)
+
+    song = models.ForeignKey(
+        Songs,
+        on_delete=models.CASCADE,
+        related_name="transition_song",
+        db_column="song_id",
+    )
+
+    next_song = models.ForeignKey(
+        Songs,
+        on_delete=models.CASCADE,
+        related_name="transition_next_song",
+        db_column="next_song_id",
+    )
+
+    segue = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "setlist_transitions"
+        verbose_name_plural = "setlist_transitions"
+        indexes = [
+            models.Index(
+                fields=["song", "next_song"],
+                name="setlist_transitions_song_next",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.song_id} -> {self.next_song_id}"
+
+
+class EventSearchDocument(models.Model):
+    """Weighted search vector per event, kept up to date by `databruce.search_documents`."""
+
+    event = models.OneToOneField(
+        Events,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+        db_column="event_id",
+    )
+
+    document = SearchVectorField(null=True)
+
+    class Meta:
+        db_table = "event_search_documents"
+        verbose_name_plural = "event_search_documents"
+        indexes = [GinIndex(fields=["document"], name="event_search_document_gin")]
+
+    def __str__(self) -> str:
+        return str(self.event_id)
+
+
+class SongStats(models.Model):
+    """Per-song gap, frequency and positions, kept up to date by `databruce.song_stats`."""
+
+    song = models.OneToOneField(
+        Songs,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        db_column="song_id",
+    )
+
+    show_gap = models.IntegerField(default=0)
+    events_since_premiere = models.IntegerField(default=0)
+    frequency = models.FloatField(blank=True, null=True, default=None)
+
+    # [{"position": ..., "count": ..., "num": ...}], ordered by first song_num
+    positions = models.JSONField(default=list)
+
+    class Meta:
+        db_table = "song_stats"
+        verbose_name_plural = "song_stats"
+
+    def __str__(self) -> str:
+        return str(self.song_id)
+
+
+class SetlistPlayStats(models.Model):
+    """Per-play gap, premiere and tour counts, kept up to date by `databruce.setlist_stats`."""
+
+    setlist = models.OneToOneField(
+        Setlists,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="play_stats",
+        db_column="setlist_id",
+    )
+
+    event = models.ForeignKey(
+        Events,
+        on_delete=models.CASCADE,
+        related_name="play_stats_event",
+        db_column="event_id",
+    )
+
+    song = models.ForeignKey(
+        Songs,
+        on_delete=models.CASCADE,
+        related_name="play_stats_song",
+        db_column="song_id",
+    )
+
+    tour = models.ForeignKey(
+        "Tours",
+        on_delete=models.CASCADE,
+        related_name="play_stats_tour",
+        db_column="tour_id",
+    )
+
+    gap = models.IntegerField(blank=True, null=True, default=None)
+
+    ltp = models.ForeignKey(
+        Events,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="play_stats_ltp",
+        db_column="ltp_id",
+    )
+
+    premiere = models.BooleanField(default=False)
+    debut = models.BooleanField(default=False)
+    tour_num = models.IntegerField(default=1)
+    tour_total = models.IntegerField(default=1)
+
+    class Meta:
+        db_table = "setlist_play_stats"
+        verbose_name_plural = "setlist_play_stats"
+        indexes = [
+            models.Index(fields=["song", "event"], name="setlist_play_stats_song"),
+        ]
+
+    def __str__(self) -> str:
+        return str(self.setlist_id)
+
+
 class Snippets(BaseModel, models.Model):
     id = models.AutoField(primary_key=True)
     uuid = models.UUIDField(default=uuid4, editable=False)
@@ -1,11 +1,59 @@
+import base64
+import binascii
+import csv
+import io
+from collections.abc import Mapping
+from functools import partial
 from typing import Any
 
 import msgspec
-from rest_framework.exceptions import ErrorDetail
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import ErrorDetail, NotFound
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.renderers import BaseRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.serializers import Serializer
+from rest_framework.utils.urls import replace_query_param
+
+INVALID_CURSOR = "Invalid cursor."
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(msgspec.json.encode(values)).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = msgspec.json.decode(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, msgspec.DecodeError) as e:
+        raise NotFound(INVALID_CURSOR) from e
+
+    if not isinstance(values, list):
+        raise NotFound(INVALID_CURSOR)
+
+    return values
+
+
+def seek_filter(fields: list[str], values: list) -> Q:
+    """Rows after `values` in ascending, nulls first order over `fields`."""
+    condition = Q()
+    equal = Q()
+
+    for field, value in zip(fields, values, strict=True):
+        if value is None:
+            after = Q(**{f"{field}__isnull": False})
+            same = Q(**{f"{field}__isnull": True})
+        else:
+            after = Q(**{f"{field}__gt": value})
+            same = Q(**{field: value})
+
+        condition |= equal & after
+        equal &= same
+
+    return condition
 
 
 class DatatablesLimitOffsetPagination(LimitOffsetPagination):
@@ -20,6 +68,107 @@ class DatatablesLimitOffsetPagination(LimitOffsetPagination):
     # Cap maximum returned results when pagination is "disabled" to protect your database
     max_limit = 100000
 
+    # Keyset mode, used when the view sets `keyset_ordering` and the request
+    # passes ?cursor= (empty for the first page)
+    cursor_query_param = "cursor"
+    keyset_fields = None
+    next_cursor = None
+
+    # set per view with `count_strategy`, see databruce.counting
+    view = None
+    estimated = False
+
+    def get_keyset_fields(self, request: Request, view) -> list[str] | None:
+        fields = getattr(view, "keyset_ordering", None)
+
+        if not fields or self.cursor_query_param not in request.query_params:
+            return None
+
+        # a DataTables column ordering can't be seeked, fall back to offsets
+        if any(param.startswith("order[") for param in request.query_params):
+            return None
+
+        return [*fields, "pk"]
+
+    def get_count(self, queryset) -> int:
+        strategy = getattr(self.view, "count_strategy", None)
+
+        if strategy is None:
+            self.estimated = False
+            return super().get_count(queryset)
+
+        count, self.estimated = strategy.count_rows(queryset, self.view)
+
+        return count
+
+    def settle_estimate(self, queryset, page: list) -> list:
+        """Correct an estimated count with the page read at the offset."""
+        if page or not self.offset:
+            # a short page is the last one, which makes the count exact
+            if len(page) < self.limit:
+                self.count = self.offset + len(page)
+                self.estimated = False
+
+            return page
+
+        # the planner overestimated, count once and serve the real last page
+        self.count = self.view.count_strategy.get_total(queryset, self.view)
+        self.estimated = False
+        self.offset = max(self.count - self.limit, 0)
+
+        return list(queryset[self.offset : self.offset + self.limit])
+
+    def paginate_queryset(self, queryset, request: Request, view=None):
+        self.view = view
+        self.keyset_fields = self.get_keyset_fields(request, view)
+
+        if self.keyset_fields is None:
+            page = super().paginate_queryset(queryset, request, view)
+
+            if page is not None and self.estimated:
+                page = self.settle_estimate(queryset, page)
+
+            return page
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.count = self.get_count(queryset)
+
+        fields = self.keyset_fields
+        cursor = request.query_params[self.cursor_query_param]
+
+        queryset = queryset.annotate(
+            **{f"keyset_{i}": F(field) for i, field in enumerate(fields)},
+        ).order_by(*[F(field).asc(nulls_first=True) for field in fields])
+
+        if cursor:
+            values = decode_cursor(cursor)
+
+            if len(values) != len(fields):
+                raise NotFound(INVALID_CURSOR)
+
+            try:
+                queryset = queryset.filter(seek_filter(fields, values))
+            except (TypeError, ValueError, ValidationError) as e:
+                raise NotFound(INVALID_CURSOR) from e
+
+        # one extra row tells whether there is a next page
+        page = list(queryset[: self.limit + 1])
+        self.next_cursor = None
+
+        if len(page) > self.limit:
+            page = page[: self.limit]
+            last = page[-1]
+
+            # rows are dicts when the view paginates a .values() queryset
+            get = last.get if isinstance(last, Mapping) else partial(getattr, last)
+
+            self.next_cursor = encode_cursor(
+                [get(f"keyset_{i}") for i in range(len(fields))],
+            )
+
+        return page
+
     def get_limit(self, request: Request):
         if request.accepted_renderer.format == "custom":
             self.limit_query_param = self.dt_limit_query_param
@@ -44,21 +193,58 @@ class DatatablesLimitOffsetPagination(LimitOffsetPagination):
             self.offset_query_param = self.dt_offset_query_param
         else:
             self.offset_query_param = self.default_offset_param
-        return super().get_offset(request)
+
+        offset = super().get_offset(request)
+
+        # rows past an estimated count can't be reached, stay on its last page
+        if self.estimated:
+            offset = min(offset, max(self.count - self.limit, 0))
+
+        return offset
 
     def get_paginated_response(self, data):
         if self.request.accepted_renderer.format == "custom":
+            response = {
+                "draw": int(self.request.query_params.get("draw", 0)),
+                "recordsTotal": self.count,
+                "recordsFiltered": self.count,
+                "data": data,
+            }
+
+            if self.keyset_fields is not None:
+                response["next"] = self.next_cursor
+
+            headers = {}
+            search_plan = getattr(self.request, "search_plan", None)
+
+            # how DataTablesFilterBackend compiled the SearchBuilder criteria
+            if settings.DEBUG and search_plan is not None:
+                headers["X-Search-Plan"] = msgspec.json.encode(search_plan).decode()
+
+            return Response(response, headers=headers)
+
+        if self.keyset_fields is not None:
             return Response(
                 {
-                    "draw": int(self.request.query_params.get("draw", 0)),
-                    "recordsTotal": self.count,
-                    "recordsFiltered": self.count,
-                    "data": data,
+                    "count": self.count,
+                    "next": self.get_next_cursor_link(),
+                    "previous": None,
+                    "results": data,
                 },
             )
 
         return super().get_paginated_response(data)
 
+    def get_next_cursor_link(self) -> str | None:
+        if self.next_cursor is None:
+            return None
+
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor,
+        )
+
 
 class DatatablesRenderer(BaseRenderer):
     media_type = "application/json"
@@ -78,7 +264,7 @@ class DatatablesRenderer(BaseRenderer):
                 data = {"data": data}
 
         # msgspec returns bytes directly, which DRF expects
-        return msgspec.json.encode(data)
+        return msgspec.json.encode(data, enc_hook=msgspec_enc_hook)
 
 
 def msgspec_enc_hook(obj: Any) -> Any:
@@ -108,4 +294,112 @@ class JSONRenderer(BaseRenderer):
                 data = {"data": data}
 
         # msgspec returns bytes directly, which DRF expects
-        return msgspec.json.encode(data)
+        return self._encoder.encode(data)
+
+
+def flatten(row: dict, prefix: str = "") -> dict:
+    """Nested serializer output as one level of `parent__child` columns."""
+    flat = {}
+
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}__"))
+        else:
+            flat[f"{prefix}{key}"] = value
+
+    return flat
+
+
+def get_columns(fields, prefix: str = "") -> list[str]:
+    """The `parent__child` columns of a serializer's fields, as `flatten()` names them.
+
+    Taken from the fields rather than a row, a nested object that is null in
+    the first row still gets a column for each of its fields.
+    """
+    columns = []
+
+    for name, field in fields.items():
+        if field.write_only:
+            continue
+
+        if isinstance(field, Serializer):
+            columns.extend(get_columns(field.fields, f"{prefix}{name}__"))
+        else:
+            columns.append(f"{prefix}{name}")
+
+    return columns
+
+
+class NDJSONRenderer(BaseRenderer):
+    """One JSON document per line, used by the streaming exports."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    _encoder = msgspec.json.Encoder(enc_hook=msgspec_enc_hook)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return self._encoder.encode_lines(data if isinstance(data, list) else [data])
+
+    def stream(self, chunks, columns=None):  # noqa: ARG002
+        """Encode each chunk of rows as it arrives, each with its own keys."""
+        for rows in chunks:
+            yield self._encoder.encode_lines(rows)
+
+
+class CSVRenderer(BaseRenderer):
+    """Flattened rows as CSV, see `get_columns()` for the header."""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    _encoder = msgspec.json.Encoder(enc_hook=msgspec_enc_hook)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return b"".join(self.stream([data if isinstance(data, list) else [data]]))
+
+    def get_value(self, row: dict, path: list[str]):
+        """The value at `path`, empty below a null nested object."""
+        value = row
+
+        for key in path:
+            if not isinstance(value, dict):
+                return None
+
+            value = value.get(key)
+
+        if isinstance(value, (list, dict)):
+            return self._encoder.encode(value).decode()
+
+        return value
+
+    def stream(self, chunks, columns=None):
+        """Encode each chunk of rows as it arrives.
+
+        Without `columns`, the header is taken from the first row.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        paths = None
+
+        for rows in chunks:
+            for row in rows:
+                if paths is None:
+                    columns = columns or list(flatten(row))
+                    paths = [column.split("__") for column in columns]
+                    writer.writerow(columns)
+
+                writer.writerow([self.get_value(row, path) for path in paths])
+
+            yield buffer.getvalue().encode()
+
+            buffer.seek(0)
+            buffer.truncate()
@@ -0,0 +1,77 @@
+"""Maintains `EventSearchDocument`, the weighted tsvector used by event search.
+
+Documents are rebuilt in SQL from the event and its artist, venue, city and
+run. Saves to any of those mark the affected events as dirty, and the dirty
+events are refreshed once the surrounding transaction commits.
+"""
+
+import threading
+
+from django.apps import apps
+from django.contrib.postgres.search import SearchVector
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from databruce import data_version
+
+_state = threading.local()
+
+
+def document_vector() -> SearchVector:
+    return (
+        SearchVector("event_id", weight="B")
+        + SearchVector("date", weight="A")
+        + SearchVector("date__day", weight="B")
+        + SearchVector("early_late", weight="B")
+        + SearchVector("artist__name", weight="C")
+        + SearchVector("venue__name", weight="B")
+        + SearchVector("venue__city__name", weight="B")
+        + SearchVector("run__name", weight="D")
+    )
+
+
+def refresh_documents(event_ids: list[int] | None = None) -> int:
+    """Rebuild the documents for the given events, or all of them."""
+    events = apps.get_model("databruce", "Events").objects.all()
+    documents = apps.get_model("databruce", "EventSearchDocument").objects.all()
+
+    if event_ids is not None:
+        events = events.filter(pk__in=event_ids)
+        documents = documents.filter(event_id__in=event_ids)
+
+    vector = (
+        apps.get_model("databruce", "Events")
+        .objects.filter(pk=OuterRef("event_id"))
+        .annotate(document=document_vector())
+        .values("document")[:1]
+    )
+
+    with transaction.atomic():
+        documents.delete()
+
+        documents.bulk_create(
+            [
+                documents.model(event_id=pk)
+                for pk in events.values_list("pk", flat=True)
+            ],
+            batch_size=5000,
+        )
+
+        # computed by Postgres, the vector never round-trips through Python
+        return documents.update(document=Subquery(vector))
+
+
+def mark_dirty(event_ids) -> None:
+    """Queue events for a refresh after the current transaction."""
+    pending = _state.__dict__.setdefault("pending", set())
+    pending.update(event_ids)
+
+    transaction.on_commit(_flush)
+
+
+def _flush() -> None:
+    pending = _state.__dict__.pop("pending", set())
+
+    if pending:
+        refresh_documents(list(pending))
+        data_version.bump_version()
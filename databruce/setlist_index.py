@@ -0,0 +1,186 @@
+"""Process-local bitmap index over `Setlists`, used by the advanced search.
+
+Every map value is a plain `int` used as a bitmap, where bit `n` is set when
+the event with primary key `n` matches. Combining conditions is then just
+`&`, `|` and `& ~` on ints, and Postgres only has to hydrate the final events.
+
+The index is rebuilt lazily whenever the version stored in the cache changes,
+so a setlist saved in one worker invalidates the index in every worker.
+"""
+
+import functools
+import operator
+import threading
+from collections import defaultdict
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+
+from databruce import models
+
+VERSION_KEY = "setlist_index_version"
+
+
+def invalidate() -> None:
+    """Mark every process-local index as stale."""
+    cache.set(VERSION_KEY, uuid4().hex, None)
+
+
+def current_version() -> str:
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+
+    return version
+
+
+def event_ids(bitmap: int) -> list[int]:
+    """Return the event ids set in a bitmap."""
+    ids = []
+
+    while bitmap:
+        low = bitmap & -bitmap
+        ids.append(low.bit_length() - 1)
+        bitmap ^= low
+
+    return ids
+
+
+def combine(bitmaps: list[int], conjunction: str = "and") -> int:
+    """AND/OR a list of bitmaps together."""
+    if conjunction == "or":
+        return functools.reduce(operator.or_, bitmaps, 0)
+
+    return functools.reduce(operator.and_, bitmaps)
+
+
+class SetlistIndex:
+    """Song/position/successor -> event bitmaps, built from `Setlists`."""
+
+    def __init__(self, position_filters: dict[str, Q], set_names: list[str]) -> None:
+        # "anywhere" has its own set name filter, the rest are stored as flags
+        self.position_filters = {
+            key: value for key, value in position_filters.items() if key != "anywhere"
+        }
+        self.set_names = set_names
+
+        self._lock = threading.Lock()
+        self._version = None
+
+        self.events = 0
+        self.played = {}
+        self.anywhere_map = {}
+        self.positions = {}
+        self.not_positions = {}
+        self.successors = {}
+        self.set_endings = {}
+
+    def load(self) -> "SetlistIndex":
+        """Rebuild the index if the cached version has moved on."""
+        version = current_version()
+
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self.build()
+                    self._version = version
+
+        return self
+
+    def build(self) -> None:
+        flags = {
+            f"flag_{key}": ExpressionWrapper(value, output_field=BooleanField())
+            for key, value in self.position_filters.items()
+        }
+
+        rows = (
+            models.Setlists.objects.all()
+            .annotate(
+                in_valid_set=ExpressionWrapper(
+                    Q(set_name__in=self.set_names),
+                    output_field=BooleanField(),
+                ),
+                # no next song, so it is "not followed by" any song
+                ends_set=~Exists(
+                    models.SetlistTransitions.objects.filter(setlist=OuterRef("pk")),
+                ),
+                **flags,
+            )
+            .values("event_id", "song_id", "in_valid_set", "ends_set", *flags)
+        )
+
+        events = 0
+        played = defaultdict(int)
+        anywhere_map = defaultdict(int)
+        positions = defaultdict(int)
+        not_positions = defaultdict(int)
+        successors = defaultdict(lambda: defaultdict(int))
+        set_endings = defaultdict(int)
+
+        for row in rows.iterator(chunk_size=5000):
+            bit = 1 << row["event_id"]
+            song_id = row["song_id"]
+
+            played[song_id] |= bit
+
+            if row["in_valid_set"]:
+                events |= bit
+                anywhere_map[song_id] |= bit
+
+            if row["ends_set"]:
+                set_endings[song_id] |= bit
+
+            for key in self.position_filters:
+                if row[f"flag_{key}"]:
+                    positions[song_id, key] |= bit
+                else:
+                    not_positions[song_id, key] |= bit
+
+        transitions = models.SetlistTransitions.objects.values_list(
+            "event_id",
+            "song_id",
+            "next_song_id",
+        )
+
+        for event_id, song_id, next_id in transitions.iterator(chunk_size=5000):
+            successors[song_id][next_id] |= 1 << event_id
+
+        self.events = events
+        self.played = dict(played)
+        self.anywhere_map = dict(anywhere_map)
+        self.positions = dict(positions)
+        self.not_positions = dict(not_positions)
+        self.successors = {key: dict(value) for key, value in successors.items()}
+        self.set_endings = dict(set_endings)
+
+    def anywhere(self, song_id: int, choice: bool = True) -> int:  # noqa: FBT001, FBT002
+        bitmap = self.anywhere_map.get(song_id, 0)
+
+        if not choice:
+            return self.events & ~bitmap
+
+        return bitmap
+
+    def position(self, song_id: int, key: str, choice: bool = True) -> int:  # noqa: FBT001, FBT002
+        if key not in self.position_filters:
+            return self.played.get(song_id, 0)
+
+        if not choice:
+            return self.not_positions.get((song_id, key), 0)
+
+        return self.positions.get((song_id, key), 0)
+
+    def followed_by(self, song_id: int, next_id: int, choice: bool = True) -> int:  # noqa: FBT001, FBT002
+        following = self.successors.get(song_id, {})
+
+        if not choice:
+            return functools.reduce(
+                operator.or_,
+                [bitmap for key, bitmap in following.items() if key != next_id],
+                self.set_endings.get(song_id, 0),
+            )
+
+        return following.get(next_id, 0)
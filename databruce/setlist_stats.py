@@ -0,0 +1,331 @@
+"""Maintains `SetlistPlayStats`, the per-play stats behind setlist tables.
+
+Every play of a song (a setlist row in a played set of a stats-eligible event)
+gets its gap and last time played, whether it was the premiere or the tour
+debut, and its number out of the song's plays on that tour. These are the
+numbers the `SetlistStats` and `TourCount` views compute for the whole table.
+
+A change to one event's setlist can only move the stats of the songs played in
+it: their rows from that event on, and the tour totals of their earlier plays
+on the event's tour. The gaps of other songs only change when the event starts
+or stops counting, so just the rows whose gap spans the event are recounted.
+
+Saves to setlists and events mark the event as dirty, and its slice is
+refreshed once the surrounding transaction commits. Deletes also pass the
+plays they remove, whose stats rows are gone by then along with the deleted
+row. `verify_setlist_stats` checks the incremental results against a full
+rebuild.
+"""
+
+import bisect
+import threading
+from collections import Counter
+from itertools import chain, groupby
+from operator import itemgetter
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, Count, Max, Value, When
+
+from databruce import data_version
+
+_state = threading.local()
+
+# same sets as databruce.views.VALID_SET_NAMES
+PLAYED_SETS = ["Show", "Set 1", "Set 2", "Encore", "Pre-Show", "Post-Show"]
+
+FIELDS = ["gap", "ltp", "premiere", "debut", "tour_num", "tour_total"]
+
+PLAY_FIELDS = ["id", "song_id", "event_id", "event__event_id", "event__tour_id"]
+PLAY_ORDER = ["song_id", "event__event_id", "song_num", "id"]
+
+
+def get_plays():
+    return apps.get_model("databruce", "Setlists").objects.filter(
+        song__isnull=False,
+        set_name__in=PLAYED_SETS,
+        event__is_stats_eligible=True,
+    )
+
+
+def get_timeline() -> tuple[list[str], dict[str, int]]:
+    """Ordered ids of the stats-eligible events, and their primary keys."""
+    pks = dict(
+        apps.get_model("databruce", "Events")
+        .objects.filter(is_stats_eligible=True)
+        .order_by("event_id")
+        .values_list("event_id", "id"),
+    )
+
+    return list(pks), pks
+
+
+def count_gap(event_ids: list[str], last: str, event_id: str) -> int:
+    """Eligible events between the last play and this one."""
+    return max(
+        bisect.bisect_left(event_ids, event_id) - bisect.bisect_right(event_ids, last),
+        0,
+    )
+
+
+def build_rows(plays, timeline, seeds: dict, totals: Counter):
+    """Stats rows for `plays`, ordered by song and event.
+
+    `seeds` holds each song's last play and plays per tour before the first of
+    `plays`, and `totals` the song's plays per tour overall.
+    """
+    stats_model = apps.get_model("databruce", "SetlistPlayStats")
+    event_ids, pks = timeline
+    rows = []
+
+    for song_id, song_plays in groupby(plays, key=itemgetter("song_id")):
+        last, tours = seeds.get(song_id, (None, {}))
+        tours = Counter(tours)
+
+        for play in song_plays:
+            event_id = play["event__event_id"]
+            tour_id = play["event__tour_id"]
+            tours[tour_id] += 1
+
+            rows.append(
+                stats_model(
+                    setlist_id=play["id"],
+                    event_id=play["event_id"],
+                    song_id=song_id,
+                    tour_id=tour_id,
+                    gap=None if last is None else count_gap(event_ids, last, event_id),
+                    ltp_id=None if last is None else pks[last],
+                    premiere=last is None,
+                    debut=tours[tour_id] == 1,
+                    tour_num=tours[tour_id],
+                    tour_total=totals[song_id, tour_id],
+                ),
+            )
+
+            last = event_id
+
+    return rows
+
+
+def rebuild() -> int:
+    """Recompute every row from scratch, returning the number written."""
+    stats_model = apps.get_model("databruce", "SetlistPlayStats")
+
+    plays = list(get_plays().values(*PLAY_FIELDS).order_by(*PLAY_ORDER))
+    totals = Counter((play["song_id"], play["event__tour_id"]) for play in plays)
+
+    rows = build_rows(plays, get_timeline(), {}, totals)
+
+    with transaction.atomic():
+        stats_model.objects.all().delete()
+        stats_model.objects.bulk_create(rows, batch_size=5000)
+
+    return len(rows)
+
+
+def refresh_slice(event_id: str, songs: set, tours: set, timeline) -> int:
+    """Recompute `songs` from `event_id` on, and their totals on `tours`."""
+    stats_model = apps.get_model("databruce", "SetlistPlayStats")
+    plays = get_plays().filter(song_id__in=songs)
+
+    seeds = {}
+    totals = Counter()
+
+    for row in (
+        plays.filter(event__event_id__lt=event_id)
+        .values("song_id", "event__tour_id")
+        .annotate(count=Count("id"), last=Max("event__event_id"))
+        .order_by()
+    ):
+        last, counts = seeds.setdefault(row["song_id"], (row["last"], {}))
+        counts[row["event__tour_id"]] = row["count"]
+        totals[row["song_id"], row["event__tour_id"]] = row["count"]
+
+        if row["last"] > last:
+            seeds[row["song_id"]] = (row["last"], counts)
+
+    later = list(
+        plays.filter(event__event_id__gte=event_id)
+        .values(*PLAY_FIELDS)
+        .order_by(*PLAY_ORDER),
+    )
+
+    totals.update((play["song_id"], play["event__tour_id"]) for play in later)
+
+    rows = build_rows(later, timeline, seeds, totals)
+
+    stats_model.objects.filter(
+        song_id__in=songs,
+        event__event_id__gte=event_id,
+    ).delete()
+
+    stats_model.objects.bulk_create(rows, batch_size=5000)
+
+    # earlier plays on the event's tours only change their totals
+    updated = stats_model.objects.filter(
+        song_id__in=songs,
+        tour_id__in=tours,
+        event__event_id__lt=event_id,
+    ).update(
+        tour_total=Case(
+            *[
+                When(
+                    song_id=song_id,
+                    tour_id=tour_id,
+                    then=Value(totals[song_id, tour_id]),
+                )
+                for song_id in songs
+                for tour_id in tours
+            ],
+            default="tour_total",
+        ),
+    )
+
+    return len(rows) + updated
+
+
+def refresh_gaps(event_id: str, songs: set, timeline) -> int:
+    """Recount the gaps spanning `event_id` for songs outside its slice."""
+    stats_model = apps.get_model("databruce", "SetlistPlayStats")
+    event_ids = timeline[0]
+
+    changed = []
+
+    for pk, gap, last, current in (
+        stats_model.objects.filter(
+            ltp__event_id__lt=event_id,
+            event__event_id__gt=event_id,
+        )
+        .exclude(song_id__in=songs)
+        .values_list("setlist_id", "gap", "ltp__event_id", "event__event_id")
+    ):
+        new_gap = count_gap(event_ids, last, current)
+
+        if new_gap != gap:
+            changed.append(stats_model(setlist_id=pk, gap=new_gap))
+
+    stats_model.objects.bulk_update(changed, ["gap"], batch_size=5000)
+
+    return len(changed)
+
+
+def refresh_setlist_stats(event_ids: list[str] | None = None, removed=()) -> int:
+    """Refresh the slices of the given events, or rebuild every row.
+
+    `removed` holds the `(event_id, song_id, tour_id)` of deleted plays, which
+    neither their stats rows nor the setlists show anymore. Returns the number
+    of rows written.
+    """
+    if event_ids is None:
+        return rebuild()
+
+    stats_model = apps.get_model("databruce", "SetlistPlayStats")
+    event_ids = sorted(set(event_ids) | {play[0] for play in removed})
+
+    # songs and tours an event touches, both before and after the change
+    touched = {event_id: (set(), set()) for event_id in event_ids}
+
+    previous = stats_model.objects.filter(event__event_id__in=event_ids).values_list(
+        "event__event_id",
+        "song_id",
+        "tour_id",
+    )
+
+    current = (
+        get_plays()
+        .filter(event__event_id__in=event_ids)
+        .values_list("event__event_id", "song_id", "event__tour_id")
+    )
+
+    with transaction.atomic():
+        for event_id, song_id, tour_id in chain(previous, current, removed):
+            touched[event_id][0].add(song_id)
+            touched[event_id][1].add(tour_id)
+
+        timeline = get_timeline()
+        written = 0
+
+        for event_id, (songs, tours) in touched.items():
+            if songs:
+                written += refresh_slice(event_id, songs, tours, timeline)
+
+            written += refresh_gaps(event_id, songs, timeline)
+
+    return written
+
+
+def snapshot() -> dict[int, tuple]:
+    """Every row's values by setlist id, for comparing two refreshes."""
+    stats_model = apps.get_model("databruce", "SetlistPlayStats")
+
+    return {
+        row[0]: row[1:]
+        for row in stats_model.objects.values_list(
+            "setlist_id",
+            "event_id",
+            "song_id",
+            "tour_id",
+            *FIELDS,
+        )
+    }
+
+
+def setlist_removed(setlist) -> list[tuple]:
+    """The play a deleted setlist row was, read while its event is still there."""
+    if setlist.song_id is None or setlist.set_name not in PLAYED_SETS:
+        return []
+
+    return [
+        (event_id, setlist.song_id, tour_id)
+        for event_id, tour_id in apps.get_model("databruce", "Events")
+        .objects.filter(pk=setlist.event_id, is_stats_eligible=True)
+        .values_list("event_id", "tour_id")
+    ]
+
+
+def event_removed(event) -> list[tuple]:
+    """The plays of an event being deleted, read before their rows cascade."""
+    return [
+        (event.event_id, song_id, tour_id)
+        for song_id, tour_id in apps.get_model("databruce", "SetlistPlayStats")
+        .objects.filter(event_id=event.pk)
+        .values_list("song_id", "tour_id")
+    ]
+
+
+def mark_dirty(event_ids=(), pks=(), removed=()) -> None:
+    """Queue events for a refresh after the current transaction.
+
+    Setlist saves pass their event's primary key, which is resolved to its
+    event id once per refresh instead of once per save. Deletes pass the
+    `(event_id, song_id, tour_id)` of the plays they remove.
+    """
+    event_ids_pending, pks_pending, removed_pending = _state.__dict__.setdefault(
+        "pending",
+        (set(), set(), set()),
+    )
+    event_ids_pending.update(event_id for event_id in event_ids if event_id)
+    pks_pending.update(pk for pk in pks if pk)
+    removed_pending.update(removed)
+
+    transaction.on_commit(_flush)
+
+
+def _flush() -> None:
+    pending = _state.__dict__.pop("pending", None)
+
+    if pending is None:
+        return
+
+    event_ids, pks, removed = pending
+
+    if pks:
+        event_ids.update(
+            apps.get_model("databruce", "Events")
+            .objects.filter(pk__in=pks)
+            .values_list("event_id", flat=True),
+        )
+
+    if event_ids or removed:
+        refresh_setlist_stats(list(event_ids), removed=removed)
+        data_version.bump_version()
@@ -0,0 +1,121 @@
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from databruce import (
+    data_version,
+    matviews,
+    models,
+    search_documents,
+    setlist_index,
+    setlist_stats,
+    song_stats,
+    transitions,
+)
+
+# per-user or derived data that shouldn't invalidate the whole site cache
+UNVERSIONED_MODELS = [
+    models.CustomUser,
+    models.UserAttendedShows,
+    models.SetlistTransitions,
+    models.EventSearchDocument,
+    models.SongStats,
+    models.SetlistPlayStats,
+]
+
+
+@receiver(post_save, sender=models.Setlists)
+@receiver(post_delete, sender=models.Setlists)
+def setlist_changed(sender, instance, **kwargs):  # noqa: ARG001
+    # a row moved to another event leaves the old event stale too
+    events = {instance.event_id, getattr(instance, "loaded_event_id", None)} - {None}
+    instance.loaded_event_id = instance.event_id
+
+    setlist_index.invalidate()
+
+    for event_id in events:
+        transitions.mark_dirty(event_id)
+
+    song_stats.mark_dirty([instance.song_id])
+    setlist_stats.mark_dirty(pks=events)
+
+
+@receiver(post_delete, sender=models.Setlists)
+def setlist_deleted(sender, instance, **kwargs):  # noqa: ARG001
+    # the play's stats row cascaded with it, so pass what it was
+    setlist_stats.mark_dirty(removed=setlist_stats.setlist_removed(instance))
+
+
+@receiver(post_save, sender=models.Events)
+def event_saved(sender, instance, **kwargs):  # noqa: ARG001
+    search_documents.mark_dirty([instance.pk])
+    song_stats.mark_dirty([])
+    setlist_stats.mark_dirty([instance.event_id])
+
+
+@receiver(pre_delete, sender=models.Events)
+def event_deleting(sender, instance, **kwargs):  # noqa: ARG001
+    setlist_stats.mark_dirty(removed=setlist_stats.event_removed(instance))
+
+
+@receiver(post_delete, sender=models.Events)
+def event_deleted(sender, instance, **kwargs):  # noqa: ARG001
+    song_stats.mark_dirty([])
+    setlist_stats.mark_dirty([instance.event_id])
+
+
+@receiver(post_save, sender=models.Songs)
+def song_saved(sender, instance, **kwargs):  # noqa: ARG001
+    song_stats.mark_dirty([instance.pk])
+
+
+# related rows whose names end up in the event search document
+SEARCH_DOCUMENT_SOURCES = {
+    models.Bands: "artist",
+    models.Venues: "venue",
+    models.Cities: "venue__city",
+    models.Runs: "run",
+}
+
+
+def search_source_saved(sender, instance, **kwargs):  # noqa: ARG001
+    events = models.Events.objects.filter(**{SEARCH_DOCUMENT_SOURCES[sender]: instance})
+    search_documents.mark_dirty(events.values_list("pk", flat=True))
+
+
+for source in SEARCH_DOCUMENT_SOURCES:
+    post_save.connect(search_source_saved, sender=source)
+
+
+def view_source_changed(sender, **kwargs):  # noqa: ARG001
+    matviews.mark_dirty(sender)
+
+
+# tables that the unmanaged database views are built from
+VIEW_SOURCES = {
+    source for sources in matviews.DEPENDENCIES.values() for source in sources
+}
+
+for source in VIEW_SOURCES:
+    post_save.connect(view_source_changed, sender=source)
+    post_delete.connect(view_source_changed, sender=source)
+
+
+@receiver(post_save, sender=models.UserAttendedShows)
+@receiver(post_delete, sender=models.UserAttendedShows)
+def attendance_changed(sender, instance, **kwargs):  # noqa: ARG001
+    transaction.on_commit(partial(data_version.bump_user_version, instance.user_id))
+
+
+def data_changed(sender, **kwargs):  # noqa: ARG001
+    data_version.mark_dirty()
+
+
+# connected per model, a catch-all receiver would disable fast deletes
+for model in apps.get_app_config("databruce").get_models():
+    if model not in UNVERSIONED_MODELS:
+        post_save.connect(data_changed, sender=model)
+        post_delete.connect(data_changed, sender=model)
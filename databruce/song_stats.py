@@ -0,0 +1,162 @@
+"""Maintains `SongStats`, the per-song numbers shown on song pages.
+
+A song's gap and events since premiere depend on every other event, but both
+are cheap to recount from the ordered list of event ids, so each refresh
+recounts them for all songs and writes only the rows that changed. Position
+histograms need an aggregate over the song's setlists, so they are only rebuilt
+for songs whose setlists were touched.
+
+Saves to setlists, songs and events mark the affected songs as dirty, and they
+are refreshed once the surrounding transaction commits.
+"""
+
+import bisect
+import threading
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Min
+
+from databruce import data_version
+
+_state = threading.local()
+
+FIELDS = ["show_gap", "events_since_premiere", "frequency", "positions"]
+
+
+def get_positions(setlists, song_ids: list[int] | None = None) -> dict[int, list]:
+    """Times each song was played per position, ordered by first song_num."""
+    setlists = setlists.filter(position__isnull=False, song__isnull=False)
+
+    if song_ids is not None:
+        setlists = setlists.filter(song_id__in=song_ids)
+
+    positions = {}
+
+    for row in (
+        setlists.values("song_id", "position")
+        .annotate(count=Count("position"), num=Min("song_num"))
+        .order_by("song_id", "num")
+    ):
+        positions.setdefault(row.pop("song_id"), []).append(row)
+
+    return positions
+
+
+def get_counts(events, songs) -> dict[int, dict]:
+    """Gap, events since premiere and frequency for every song."""
+    event_ids = list(events.order_by("event_id").values_list("event_id", flat=True))
+
+    eligible = list(
+        events.filter(is_stats_eligible=True)
+        .order_by("event_id")
+        .values_list("event_id", flat=True),
+    )
+
+    latest = (
+        events.filter(is_stats_eligible=True, setlist_event__isnull=False)
+        .order_by("-event_id")
+        .values_list("event_id", flat=True)
+        .first()
+    )
+
+    counts = {}
+
+    for pk, first_id, last_id, plays in songs.values_list(
+        "id",
+        "first_event__event_id",
+        "last_event__event_id",
+        "num_plays_public",
+    ):
+        show_gap = 0
+
+        if last_id and latest:
+            show_gap = max(
+                bisect.bisect_right(eligible, latest)
+                - bisect.bisect_right(eligible, last_id),
+                0,
+            )
+
+        since = 0
+
+        if first_id:
+            since = len(event_ids) - bisect.bisect_right(event_ids, first_id)
+
+        counts[pk] = {
+            "show_gap": show_gap,
+            "events_since_premiere": since,
+            "frequency": round(plays / since * 100, 2) if since > 0 else None,
+        }
+
+    return counts
+
+
+def refresh_song_stats(song_ids: list[int] | None = None) -> int:
+    """Recount every song, rebuilding positions for the given songs or all of them.
+
+    Returns the number of rows written.
+    """
+    stats_model = apps.get_model("databruce", "SongStats")
+
+    counts = get_counts(
+        apps.get_model("databruce", "Events").objects.all(),
+        apps.get_model("databruce", "Songs").objects.all(),
+    )
+
+    with transaction.atomic():
+        existing = stats_model.objects.in_bulk(list(counts))
+
+        # songs without a row yet always get their positions built
+        rebuilt = (
+            set(counts)
+            if song_ids is None
+            else {*song_ids, *counts.keys() - existing.keys()}
+        )
+
+        positions = get_positions(
+            apps.get_model("databruce", "Setlists").objects.all(),
+            None if song_ids is None else list(rebuilt),
+        )
+
+        created = []
+        updated = []
+
+        for pk, values in counts.items():
+            stats = existing.get(pk) or stats_model(song_id=pk)
+            before = [getattr(stats, field) for field in FIELDS]
+
+            for key, value in values.items():
+                setattr(stats, key, value)
+
+            if pk in rebuilt:
+                stats.positions = positions.get(pk, [])
+
+            if pk not in existing:
+                created.append(stats)
+            elif [getattr(stats, field) for field in FIELDS] != before:
+                updated.append(stats)
+
+        stats_model.objects.bulk_create(created, batch_size=5000)
+        stats_model.objects.bulk_update(updated, FIELDS, batch_size=5000)
+
+    return len(created) + len(updated)
+
+
+def mark_dirty(song_ids) -> None:
+    """Queue songs for a refresh after the current transaction.
+
+    An empty `song_ids` still queues a refresh, which recounts the gaps after
+    an event change without rebuilding any positions.
+    """
+    pending = _state.__dict__.setdefault("pending", set())
+    pending.update(song_id for song_id in song_ids if song_id is not None)
+
+    transaction.on_commit(_flush)
+
+
+def _flush() -> None:
+    pending = _state.__dict__.pop("pending", None)
+
+    if pending is not None:
+        refresh_song_stats(list(pending))
+        data_version.bump_version()
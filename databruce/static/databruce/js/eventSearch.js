@@ -8,14 +8,14 @@ function eventSearch(query) {
     // Show spinner
     $("#loadingContainer").show();
 
-    fetch(`/api/v1/events/?search=${query}`)
+    fetch(`/api/v1/event_typeahead/?q=${encodeURIComponent(query)}`)
       .then(response => response.json())
       .then(data => {
         // Loop and append results
-        data.results.forEach(element => {
+        data.forEach(element => {
           $(results).append(
             `<a href="/events/${element.event_id}" class="list-group-item">
-                  ${element.date}<br>${element.venue.name} - ${element.artist.name}
+                  ${element.date}<br>${element.venue} - ${element.artist}
                 </a>`
           );
         });
@@ -1,27 +1,60 @@
+import csv
 import datetime
+import io
+import json
 import os
 import re
+import time
+from unittest import mock
 
 from django.contrib.auth.models import Group
 from django.core import mail
-from django.db import transaction
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import F
 from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework.test import APIClient
-
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api import loaders
+from api.filters import DataTablesFilterBackend
+from api.serializers import BaseSerializer, SongsPageSerializer
+from api.structs import StructListMixin
+from api.urls import router
+from api.views import EventViewSet
+from databruce import bulk_import, data_version, matviews, setlist_index, setlist_stats
+from databruce.counting import CachedCount, EstimatedCount
 from databruce.models import (
+    ArchiveLinks,
     Bands,
     Cities,
     Countries,
+    Covers,
     CustomUser,
     Events,
+    EventSearchDocument,
+    Lyrics,
+    NugsReleases,
+    Onstage,
+    Relations,
+    SetlistNotes,
+    SetlistPlayStats,
     Setlists,
+    SetlistTransitions,
+    Snippets,
     Songs,
+    SongStats,
     States,
+    TourLegs,
     Tours,
     UserAttendedShows,
     Venues,
+    VenuesText,
 )
+from databruce.views import AdvancedSearchResults
 
 
 class BaseDataTest(TransactionTestCase):
@@ -162,6 +195,119 @@ class BaseDataTest(TransactionTestCase):
         # Flush base tables to disk
         transaction.commit()
 
+    def seed_rows(self, count: int) -> None:
+        """Add `count` events, each with a setlist and the rows hanging off it."""
+        offset = Events.objects.count()
+        start = datetime.date(1990, 1, 1)
+
+        events = Events.objects.bulk_create(
+            [
+                Events(
+                    event_id=f"{start + datetime.timedelta(days=offset + i):%Y%m%d}-01",
+                    date=start + datetime.timedelta(days=offset + i),
+                    venue=self.venue,
+                    artist=self.artist,
+                    tour=self.tour,
+                    public=True,
+                )
+                for i in range(count)
+            ],
+        )
+
+        songs = Songs.objects.bulk_create(
+            [
+                Songs(
+                    name=f"Seed Song {offset + i}",
+                    original_artist="Bruce Springsteen",
+                    first_event=event,
+                    last_event=event,
+                )
+                for i, event in enumerate(events)
+            ],
+        )
+
+        setlists = Setlists.objects.bulk_create(
+            [
+                Setlists(
+                    event=event,
+                    song=song,
+                    song_num=num,
+                    set_name="Set 1",
+                    note="",
+                )
+                for event, seeded in zip(events, songs, strict=True)
+                for num, song in enumerate([seeded, self.song_a], start=1)
+            ],
+        )
+
+        relations = Relations.objects.bulk_create(
+            [
+                Relations(
+                    name=f"Seed Relation {offset + i}",
+                    first_event=event,
+                    last_event=event,
+                    start_date=event.date,
+                    end_date=event.date,
+                )
+                for i, event in enumerate(events)
+            ],
+        )
+
+        Snippets.objects.bulk_create(
+            [Snippets(setlist=setlist, snippet=self.song_b) for setlist in setlists],
+        )
+
+        SetlistNotes.objects.bulk_create(
+            [
+                SetlistNotes(
+                    setlist=setlist,
+                    event_id=setlist.event_id,
+                    num=1,
+                    note="Note",
+                )
+                for setlist in setlists
+            ],
+        )
+
+        Lyrics.objects.bulk_create(
+            [Lyrics(song=song, num="1", text="Lyrics") for song in songs],
+        )
+
+        Onstage.objects.bulk_create(
+            [
+                Onstage(event=event, relation=relation, band=self.artist)
+                for event, relation in zip(events, relations, strict=True)
+            ],
+        )
+
+        ArchiveLinks.objects.bulk_create(
+            [
+                ArchiveLinks(event=event, url=f"https://archive.org/{event.event_id}")
+                for event in events
+            ],
+        )
+
+        Covers.objects.bulk_create(
+            [
+                Covers(event=event, url=f"https://covers.example/{event.event_id}")
+                for event in events
+            ],
+        )
+
+        NugsReleases.objects.bulk_create(
+            [
+                NugsReleases(
+                    event=event,
+                    url=f"https://nugs.example/{event.event_id}",
+                    thumbnail=f"https://nugs.example/{event.event_id}.jpg",
+                )
+                for event in events
+            ],
+        )
+
+        # bulk_create skips the signals, so drop cached responses by hand
+        data_version.bump_version()
+
 
 class ContactTests(BaseDataTest):
     @override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
@@ -350,6 +496,510 @@ class AdvSearchTest(BaseDataTest):
 
         assert "Song A (is anywhere)" in response.context["search_summary"]
 
+    def test_index_refreshes_after_setlist_change(self):
+        response = self.get_search_results(
+            client=self.client,
+            song1_id=self.song_b.id,
+            position="anywhere",
+            choice="True",
+        )
+
+        assert response.context["events"].count() == 1
+
+        # Adding Song B to Event 1 should invalidate the cached setlist index
+        Setlists.objects.create(
+            event=self.event1,
+            song=self.song_b,
+            song_num=3,
+            set_name="Set 1",
+        )
+
+        response = self.get_search_results(
+            client=self.client,
+            song1_id=self.song_b.id,
+            position="anywhere",
+            choice="True",
+        )
+
+        events = response.context["events"]
+
+        assert self.event1 in events
+        assert events.count() == 2  # noqa: PLR2004
+
+    def test_not_followed_by_counts_a_set_ending(self):
+        index = AdvancedSearchResults.index.load()
+
+        # Song B closes Set 1 at event 2, so nothing follows it there
+        assert setlist_index.event_ids(
+            index.followed_by(self.song_b.id, self.song_a.id, choice=False),
+        ) == [self.event2.id]
+
+        assert setlist_index.event_ids(
+            index.followed_by(self.song_a.id, self.song_b.id, choice=False),
+        ) == [self.event1.id]
+
+    def test_api_not_followed_by_counts_a_set_ending(self):
+        def search(song_1: Songs, song_2: Songs) -> list[str]:
+            response = self.client.get(
+                reverse("api:adv_search-list"),
+                {
+                    "format": "json",
+                    "form-TOTAL_FORMS": 1,
+                    "form-0-song1": song_1.id,
+                    "form-0-song2": song_2.id,
+                    "form-0-choice": "false",
+                    "form-0-position": "followed_by",
+                },
+            )
+
+            return [row["event_id"] for row in response.json()["results"]]
+
+        assert search(self.song_b, self.song_a) == [self.event2.event_id]
+        assert search(self.song_a, self.song_b) == [self.event1.event_id]
+
+    def test_api_conditions_are_semi_joins(self):
+        def search(conjunction: str, *conditions: tuple) -> list[str]:
+            params = {"conjunction": conjunction, "form-TOTAL_FORMS": len(conditions)}
+
+            for i, (song, choice) in enumerate(conditions):
+                params[f"form-{i}-song1"] = song.id
+                params[f"form-{i}-choice"] = choice
+                params[f"form-{i}-position"] = "anywhere"
+
+            response = self.client.get(
+                reverse("api:adv_search-list"),
+                {"format": "json", **params},
+            )
+
+            return [row["event_id"] for row in response.json()["results"]]
+
+        assert search("and", (self.song_a, "true"), (self.song_c, "true")) == [
+            self.event1.event_id,
+        ]
+
+        # the NOT is checked per event, not against each setlist row
+        assert search("or", (self.song_c, "true"), (self.song_a, "false")) == [
+            self.event.event_id,
+            self.event1.event_id,
+        ]
+
+    def test_set_positions_match_the_set_names(self):
+        Setlists.objects.create(
+            event=self.event2,
+            song=self.song_c,
+            song_num=3,
+            set_name="Encore",
+            is_set_opener=True,
+        )
+
+        def search(position: str) -> list[str]:
+            response = self.client.get(
+                reverse("api:adv_search-list"),
+                {
+                    "format": "json",
+                    "form-TOTAL_FORMS": 1,
+                    "form-0-song1": self.song_c.id,
+                    "form-0-choice": "true",
+                    "form-0-position": position,
+                },
+            )
+
+            return [row["event_id"] for row in response.json()["results"]]
+
+        assert search("in_set_one") == [self.event1.event_id]
+        assert search("in_encore") == [self.event2.event_id]
+        assert search("encore_opener") == [self.event2.event_id]
+
+
+class SetlistTransitionTest(BaseDataTest):
+    def test_transitions_follow_setlist_changes(self):
+        transition = SetlistTransitions.objects.get(event=self.event2)
+
+        assert transition.song == self.song_a
+        assert transition.next_song == self.song_b
+
+        # Removing the last song of the set leaves nothing to transition into
+        self.setlist4.delete()
+
+        assert not SetlistTransitions.objects.filter(event=self.event2).exists()
+
+    def test_transitions_follow_a_moved_setlist_row(self):
+        # loaded like the admin does, so the old event is known
+        setlist = Setlists.objects.get(pk=self.setlist4.pk)
+        setlist.event = self.event1
+        setlist.song_num = 3
+        setlist.save()
+
+        # Song A no longer leads into Song B at event 2, Song C does at event 1
+        assert not SetlistTransitions.objects.filter(event=self.event2).exists()
+        assert SetlistTransitions.objects.get(setlist=self.setlist2).next_song == (
+            self.song_b
+        )
+
+
+class SongStatsTest(BaseDataTest):
+    def test_song_stats_follow_setlist_changes(self):
+        self.song_a.first_event = self.event
+        self.song_a.last_event = self.event1
+        self.song_a.num_plays_public = 2
+        self.song_a.save()
+
+        stats = SongStats.objects.get(song=self.song_a)
+
+        assert stats.show_gap == 1
+        assert stats.events_since_premiere == 2  # noqa: PLR2004
+        assert stats.frequency == 100  # noqa: PLR2004
+        assert stats.positions == []
+
+        self.setlist1.position = "Show Opener"
+        self.setlist1.save()
+
+        response = self.client.get(reverse("song_details", args=[self.song_a.uuid]))
+        assert response.context["show_gap"] == 1
+        assert response.context["positions"] == [
+            {"position": "Show Opener", "count": 1, "num": 1},
+        ]
+
+
+class SetlistPlayStatsTest(BaseDataTest):
+    def test_play_stats_follow_setlist_changes(self):
+        def stats(setlist) -> tuple:
+            row = SetlistPlayStats.objects.get(setlist=setlist)
+            return (row.gap, row.ltp_id, row.premiere, row.debut, row.tour_num)
+
+        assert stats(self.setlist3) == (0, self.event1.id, False, False, 2)
+
+        self.setlist1.set_name = "Soundcheck"
+        self.setlist1.save()
+
+        assert stats(self.setlist3) == (None, None, True, True, 1)
+        assert not SetlistPlayStats.objects.filter(setlist=self.setlist1).exists()
+
+        incremental = setlist_stats.snapshot()
+        setlist_stats.refresh_setlist_stats()
+        assert setlist_stats.snapshot() == incremental
+
+    def test_play_stats_follow_deletes(self):
+        event3 = Events.objects.create(
+            event_id="19800101-01",
+            date=datetime.date(1980, 1, 1),
+            venue=self.venue,
+            artist=self.artist,
+            tour=self.tour,
+            public=True,
+        )
+
+        for num, song in enumerate([self.song_a, self.song_b], start=1):
+            Setlists.objects.create(
+                event=event3,
+                song=song,
+                song_num=num,
+                set_name="Set 1",
+            )
+
+        def assert_rebuilt() -> None:
+            incremental = setlist_stats.snapshot()
+            setlist_stats.refresh_setlist_stats()
+            assert setlist_stats.snapshot() == incremental
+
+        # Song A's first play, its later plays move up
+        self.setlist1.delete()
+        assert_rebuilt()
+
+        # Event 2 and its plays, Song A and B at event 3 lose their last play
+        with transaction.atomic():
+            Setlists.objects.filter(event=self.event2).delete()
+            self.event2.delete()
+
+        assert_rebuilt()
+
+    def test_setlist_saves_resolve_the_event_once(self):
+        setlists = list(Setlists.objects.filter(event=self.event2))
+
+        with CaptureQueriesContext(connection) as queries, transaction.atomic():
+            for setlist in setlists:
+                setlist.save()
+
+        # no per-save fetch of the event, one lookup in the refresh on commit
+        assert not [q for q in queries if 'WHERE "events"."id" = ' in q["sql"]]
+        assert len([q for q in queries if 'WHERE "events"."id" IN ' in q["sql"]]) == 1
+
+    def test_play_stats_endpoint(self):
+        response = self.client.get(
+            reverse("api:setlist_play_stats-list"),
+            {"event": self.event2.pk, "format": "json"},
+        )
+
+        assert response.status_code == 200  # noqa: PLR2004
+
+        rows = response.json()["results"]
+        assert [row["song"]["name"] for row in rows] == ["Song A", "Song B"]
+        assert rows[0]["ltp"]["event_id"] == "19780919-01"
+        assert rows[0]["tour_num"] == 2  # noqa: PLR2004
+
+
+class BulkImportTest(BaseDataTest):
+    def test_import_rows(self):
+        event = {
+            "event_id": "19800101-01",
+            "date": "1980-01-01",
+            "artist": self.artist.id,
+            "tour": self.tour.id,
+            "venue": self.venue.id,
+            "note": "See <b>this</b> [link](https://example.com)   now",
+            "public": "true",
+        }
+
+        setlists = [
+            {"event": "19800101-01", "song": song.id, "song_num": num, "note": ""}
+            for num, song in enumerate([self.song_a, self.song_b], start=1)
+        ]
+
+        snippet = {"event": "19800101-01", "song_num": 2, "snippet": self.song_c.id}
+
+        with self.assertRaises(ValidationError) as raised:  # noqa: PT027
+            bulk_import.import_rows(
+                {"events": [event], "setlists": [{**setlists[0], "song": 0}]},
+            )
+
+        assert raised.exception.messages == [
+            "setlists row 1: song: no Songs with id 0",
+        ]
+
+        assert not Events.objects.filter(event_id="19800101-01").exists()
+
+        counts = bulk_import.import_rows(
+            {"events": [event], "setlists": setlists, "snippets": [snippet]},
+        )
+
+        assert counts == {"events": 1, "setlists": 2, "onstage": 0, "snippets": 1}
+
+        imported = Events.objects.get(event_id="19800101-01")
+        assert imported.summary == "See this link now"
+        assert Snippets.objects.get(snippet=self.song_c).setlist.song == self.song_b
+
+        # the stats are refreshed once the import commits
+        stats = SetlistPlayStats.objects.get(event=imported, song=self.song_a)
+        assert stats.ltp == self.event2
+        assert SetlistTransitions.objects.filter(event=imported).count() == 1
+
+
+class MaterializedViewTest(BaseDataTest):
+    def test_venues_text_follows_venue_rename(self):
+        def location() -> str:
+            return VenuesText.objects.get(id=self.venue).location
+
+        assert location() == "Bottom Line, New York City"
+
+        # MATVIEW_REFRESH_DELAY is 0 in tests, so the refresh runs on commit
+        self.venue.name = "Stone Pony"
+        self.venue.save()
+
+        assert location() == "Stone Pony, New York City"
+        assert "venues_text" not in matviews.get_cached(matviews.DIRTY_KEY)
+
+    @override_settings(MATVIEW_REFRESH_DELAY=30)
+    def test_overdue_refresh_is_taken_over(self):
+        # scheduled by a worker that restarted before its timer fired
+        cache.set(matviews.SCHEDULED_KEY, time.time() - 60, None)
+
+        self.venue.name = "Stone Pony"
+        self.venue.save()
+
+        assert VenuesText.objects.get(id=self.venue).location == (
+            "Stone Pony, New York City"
+        )
+        assert cache.get(matviews.SCHEDULED_KEY) is None
+
+
+class SongCatalogTest(BaseDataTest):
+    def test_breakdown_uses_current_song_names(self):
+        url = reverse("api:setlist_breakdown-list")
+
+        response = self.client.get(url, {"event": self.event1.id})
+        names = [song["name"] for row in response.json() for song in row["songs"]]
+        assert "Song A" in names
+
+        # renaming a song bumps the data version, which reloads the catalog
+        self.song_a.name = "Song A (Renamed)"
+        self.song_a.save()
+
+        response = self.client.get(url, {"event": self.event1.id})
+        names = [song["name"] for row in response.json() for song in row["songs"]]
+        assert "Song A (Renamed)" in names
+
+
+class BatchLoaderTest(BaseDataTest):
+    def test_event_loader_memoizes_until_the_data_changes(self):
+        event_ids = [self.event1.event_id, self.event2.event_id]
+
+        with CaptureQueriesContext(connection) as queries:
+            loaded = loaders.events.load_many(event_ids)
+
+        assert len(queries) == 1
+        assert loaded[self.event1.event_id].date == "1978-09-19"
+
+        with CaptureQueriesContext(connection) as queries:
+            loaders.events.load_many(event_ids)
+
+        assert len(queries) == 0
+
+        self.event1.title = "Renamed"
+        self.event1.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            loaders.events.load_many(event_ids)
+
+        assert len(queries) == 1
+
+
+class ExportTest(BaseDataTest):
+    def test_setlist_export_streams_every_row(self):
+        url = reverse("api:setlist-export")
+
+        response = self.client.get(url, {"format": "ndjson"})
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson; charset=utf-8"
+
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        assert [row["id"] for row in rows] == [
+            self.setlist1.id,
+            self.setlist2.id,
+            self.setlist3.id,
+            self.setlist4.id,
+        ]
+
+        response = self.client.get(url, {"format": "csv", "event": self.event2.id})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert lines[0].startswith("song__name,")
+        assert len(lines) == 3  # noqa: PLR2004
+
+    def test_csv_columns_survive_a_null_first_row(self):
+        # the first row's last_event is null, a later one's isn't
+        self.setlist3.ltp = self.event1
+        self.setlist3.save()
+
+        response = self.client.get(reverse("api:setlist-export"), {"format": "csv"})
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+
+        assert rows[0]["last_event__event_id"] == ""
+        assert rows[2]["last_event__event_id"] == self.event1.event_id
+
+    def test_export_reads_in_one_transaction(self):
+        response = self.client.get(reverse("api:setlist-export"), {"format": "ndjson"})
+        chunks = iter(response.streaming_content)
+
+        # the server-side cursor stays in one transaction until the stream ends
+        next(chunks)
+        assert connection.in_atomic_block
+
+        list(chunks)
+        assert not connection.in_atomic_block
+
+
+class FieldPlanTest(BaseDataTest):
+    def test_nested_include_is_planned_once(self):
+        nested = SongsPageSerializer().fields["id"]
+
+        assert list(nested.fields) == [
+            "debut",
+            "premiere",
+            "set_name",
+            "gap",
+            "position",
+        ]
+
+        plan = BaseSerializer.field_plans[nested.plan_key]
+        again = SongsPageSerializer().fields["id"]
+
+        assert list(again.fields) == list(nested.fields)
+        assert again.fields["gap"] is not nested.fields["gap"]
+        assert BaseSerializer.field_plans[nested.plan_key] is plan
+
+
+class StructSerializerTest(BaseDataTest):
+    def setUp(self):
+        super().setUp()
+
+        # event1 is on a leg, the new event isn't and its city has no state
+        # or country
+        self.event1.leg = TourLegs.objects.create(
+            tour=self.tour,
+            name="Leg 1",
+            first_event=self.event1,
+            last_event=self.event2,
+        )
+        self.event1.save()
+
+        venue = Venues.objects.create(
+            name="Roadhouse",
+            detail="",
+            city=Cities.objects.create(name="Nowhere"),
+        )
+
+        self.event3 = Events.objects.create(
+            event_id="19790101-01",
+            date=datetime.date(1979, 1, 1),
+            venue=venue,
+            artist=self.artist,
+            tour=self.tour,
+            public=True,
+        )
+
+        setlist = Setlists.objects.create(
+            event=self.event3,
+            song=self.song_b,
+            song_num=1,
+            set_name="Encore",
+        )
+
+        SetlistNotes.objects.create(
+            setlist=self.setlist1,
+            event=self.event1,
+            num=1,
+            note="Tour premiere",
+        )
+
+        SetlistNotes.objects.create(
+            setlist=setlist,
+            event=self.event3,
+            num=1,
+            note="Tour premiere",
+        )
+
+    def get_both(self, basename: str) -> list[dict]:
+        """The struct rows of a list endpoint, checked against the serializer."""
+        url = reverse(f"api:{basename}-list")
+
+        cache.clear()
+        fast = self.client.get(url, {"format": "json"}).json()["results"]
+
+        cache.clear()
+
+        with mock.patch.object(StructListMixin, "use_struct_plan", return_value=False):
+            slow = self.client.get(url, {"format": "json"}).json()["results"]
+
+        assert fast == slow
+
+        return fast
+
+    def test_setlist_structs_match_serializer(self):
+        assert len(self.get_both("setlist")) == 5  # noqa: PLR2004
+
+    def test_event_structs_match_serializer(self):
+        rows = self.get_both("event")
+        assert "19790101-01" in [row["event_id"] for row in rows]
+
+    def test_index_setlist_structs_match_serializer(self):
+        assert len(self.get_both("setlist_index")) == 5  # noqa: PLR2004
+
+    def test_songs_page_structs_match_serializer(self):
+        assert len(self.get_both("songs_page")) == 5  # noqa: PLR2004
+
 
 class EventSearch(BaseDataTest):
     def test_search(self):
@@ -364,6 +1014,196 @@ class EventSearch(BaseDataTest):
         assert response.status_code == 200
         assert len(response.json()) == 3
 
+    def test_search_document_follows_venue_rename(self):
+        def matches() -> int:
+            return EventSearchDocument.objects.filter(document="stone pony").count()
+
+        assert matches() == 0
+
+        self.venue.name = "Stone Pony"
+        self.venue.save()
+
+        assert matches() == 3  # noqa: PLR2004
+
+    def test_typeahead(self):
+        url = reverse("api:event_typeahead-list")
+
+        response = self.client.get(url, {"q": "new york 1978-09"})
+        assert [row["event_id"] for row in response.json()] == [
+            "19780919-01",
+            "19780919-02",
+        ]
+
+        # the index is rebuilt after the data version has been bumped
+        self.venue.name = "Stone Pony"
+        self.venue.save()
+
+        response = self.client.get(url, {"q": "pony", "limit": 1})
+        assert [row["event_id"] for row in response.json()] == ["19750815-01"]
+
+
+class EventQueryCountTest(BaseDataTest):
+    def get_event_queries(self):
+        # skip the response cache, bulk_create doesn't bump the data version
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("api:event-list"),
+                {"format": "custom", "length": "-1"},
+            )
+
+        assert response.status_code == 200  # noqa: PLR2004
+
+        return len(queries), response.json()
+
+    def test_event_list_query_count_is_constant(self):
+        small_count, _ = self.get_event_queries()
+
+        start = datetime.date(1990, 1, 1)
+
+        Events.objects.bulk_create(
+            [
+                Events(
+                    event_id=f"{start + datetime.timedelta(days=i):%Y%m%d}-01",
+                    date=start + datetime.timedelta(days=i),
+                    venue=self.venue,
+                    artist=self.artist,
+                    tour=self.tour,
+                    public=True,
+                )
+                for i in range(500)
+            ],
+        )
+
+        large_count, data = self.get_event_queries()
+
+        assert data["recordsTotal"] == 503  # noqa: PLR2004
+        assert large_count == small_count
+
+
+class CountStrategyTest(BaseDataTest):
+    def count_events(self, queryset) -> tuple[int, int]:
+        view = EventViewSet()
+
+        with CaptureQueriesContext(connection) as queries:
+            count = CachedCount().count(queryset, view)
+
+        return count, len(queries)
+
+    def test_cached_count_follows_data_version(self):
+        queryset = EventViewSet().get_queryset()
+
+        assert self.count_events(queryset) == (3, 1)
+        assert self.count_events(queryset) == (3, 0)
+
+        # filtered counts are cached under their own signature
+        filtered = queryset.filter(event_id__startswith="1978")
+        assert self.count_events(filtered) == (2, 1)
+        assert self.count_events(filtered) == (2, 0)
+
+        Events.objects.create(
+            event_id="19800101-01",
+            date=datetime.date(1980, 1, 1),
+            venue=self.venue,
+            artist=self.artist,
+            tour=self.tour,
+            public=True,
+        )
+
+        assert self.count_events(queryset) == (4, 1)
+
+    @mock.patch.object(EventViewSet, "count_strategy", EstimatedCount(threshold=1))
+    def test_estimated_count_is_cached_and_caps_the_offset(self):
+        url = reverse("api:event-list")
+
+        # the planner overestimates the three events
+        with mock.patch("databruce.counting.estimate_count", return_value=50) as plan:
+            response = self.client.get(url, {"format": "custom", "length": 2})
+            assert response.json()["recordsTotal"] == 50  # noqa: PLR2004
+
+            # past the real rows, the last page is served with an exact count
+            response = self.client.get(
+                url,
+                {"format": "custom", "start": 45, "length": 2},
+            )
+            data = response.json()
+            assert data["recordsTotal"] == 3  # noqa: PLR2004
+            assert [row["event_id"] for row in data["data"]] == [
+                "19780919-01",
+                "19780919-02",
+            ]
+
+            response = self.client.get(url, {"format": "custom", "length": 3})
+            assert response.json()["recordsTotal"] == 3  # noqa: PLR2004
+
+        plan.assert_called_once()
+
+
+class EndpointQueryCountTest(BaseDataTest):
+    """Every API list endpoint should run the same number of queries at any size."""
+
+    small_size = 5
+    large_size = 50
+
+    def get_params(self, basename: str) -> dict:
+        params = {"format": "custom", "length": "-1"}
+
+        if basename == "setlist_breakdown":
+            params["event"] = self.event1.pk
+        elif basename == "user_album_breakdown":
+            params["user"] = self.user_active.pk
+
+        return params
+
+    def measure(self, url: str, params: dict) -> tuple[int, float]:
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = self.client.get(url, params)
+            elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200, (url, response.status_code)  # noqa: PLR2004
+
+        return len(queries), elapsed
+
+    def measure_all(self) -> dict:
+        return {
+            basename: self.measure(
+                reverse(f"api:{basename}-list"),
+                self.get_params(basename),
+            )
+            for _, _, basename in router.registry
+        }
+
+    def test_query_count_is_independent_of_size(self):
+        self.seed_rows(self.small_size)
+        small = self.measure_all()
+
+        self.seed_rows(self.large_size - self.small_size)
+        large = self.measure_all()
+
+        report = {
+            basename: {
+                "queries": large[basename][0],
+                "queries_small": small[basename][0],
+                "seconds": round(large[basename][1], 4),
+                "seconds_small": round(small[basename][1], 4),
+            }
+            for basename in large
+        }
+
+        if path := os.environ.get("QUERY_COUNT_REPORT"):
+            with open(path, "w") as f:  # noqa: PTH123
+                json.dump(report, f, indent=2, sort_keys=True)
+
+        growing = {
+            basename: (row["queries_small"], row["queries"])
+            for basename, row in report.items()
+            if row["queries"] != row["queries_small"]
+        }
+
+        assert not growing, growing
+
 
 class SitemapTestCase(BaseDataTest):
     def test_sitemap_loading(self):
@@ -383,16 +1223,78 @@ class TestViews(BaseDataTest):
         response = self.client.get(reverse("index"))
         assert response.status_code == 200
 
+    def test_home_counts_follow_data_version(self):
+        response = self.client.get(reverse("index"))
+        assert response.context["song_count"] == 3  # noqa: PLR2004
+
+        # saving a song bumps the data version, so the cached counts are rebuilt
+        Songs.objects.create(name="Song D", original_artist="Bruce Springsteen")
+
+        response = self.client.get(reverse("index"))
+        assert response.context["song_count"] == 4  # noqa: PLR2004
+
+    def test_data_version_survives_cache_flush(self):
+        seen = [data_version.bump_version() for _ in range(3)]
+
+        cache.clear()
+
+        # a reseeded version never repeats one a worker may still hold
+        assert data_version.get_version() > max(seen)
+
+    def test_data_version_bumps_on_commit(self):
+        before = data_version.get_version()
+
+        with transaction.atomic():
+            self.setlist1.note = "Updated Note"
+            self.setlist1.save()
+
+            # a request now would still read the old rows
+            assert data_version.get_version() == before
+
+        assert data_version.get_version() > before
+
     def test_event(self):
         response = self.client.get(reverse("event_details", args=[self.event.event_id]))
         assert response.status_code == 200
 
+    def test_event_not_modified(self):
+        url = reverse("event_details", args=[self.event.event_id])
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        response = self.client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == 304  # noqa: PLR2004
+
+        # any catalog edit bumps the data version and with it the ETag
+        self.event.note = "Updated Note"
+        self.event.save()
+
+        response = self.client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == 200  # noqa: PLR2004
+
     def test_event_mobile(self):
         response = self.client.get(
             reverse("event_details_mobile", args=[self.event.event_id]),
         )
         assert response.status_code == 200
 
+    def test_event_page_is_shared(self):
+        response = self.client.get(
+            reverse("event_details", args=[self.event1.event_id]),
+        )
+        assert response.context["prev_event"] == self.event
+        assert response.context["next_event"] == self.event2
+
+        # the mobile page reuses the cached context instead of refetching the event
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("event_details_mobile", args=[self.event1.event_id]),
+            )
+
+        assert response.context["next_event"] == self.event2
+        assert not any('"events"' in query["sql"] for query in queries)
+
     def test_song(self):
         response = self.client.get(reverse("song_details", args=[self.song_a.uuid]))
         assert response.status_code == 200
@@ -447,6 +1349,225 @@ class DataTablesTest(BaseDataTest):
         response = self.get_search_results(self.client)
         self.assertEqual(response.status_code, 200)
 
+    def test_cached_response(self):
+        url = reverse("api:event-list")
+
+        first = self.client.get(url, {"format": "custom", "draw": "1"}).json()
+        second = self.client.get(url, {"format": "custom", "draw": "7"}).json()
+
+        # the cached body is reused, with the draw counter patched in
+        assert second["draw"] == 7  # noqa: PLR2004
+        assert second["recordsTotal"] == first["recordsTotal"]
+
+        Events.objects.create(
+            event_id="19800101-01",
+            date=datetime.date(1980, 1, 1),
+            venue=self.venue,
+            artist=self.artist,
+            tour=self.tour,
+            public=True,
+        )
+
+        third = self.client.get(url, {"format": "custom", "draw": "8"}).json()
+
+        assert third["recordsTotal"] == first["recordsTotal"] + 1
+
+    def test_trigram_search(self):
+        Venues.objects.create(name="Hallenstadion", detail="", city=self.city)
+        Venues.objects.create(name="Zénith", detail="", city=self.city)
+
+        def search(value: str) -> list[str]:
+            response = self.client.get(
+                reverse("api:venue-list"),
+                {
+                    "format": "custom",
+                    "columns[0][data]": "name",
+                    "columns[0][name]": "name, detail",
+                    "columns[0][searchable]": "true",
+                    "search[value]": value,
+                },
+            )
+
+            return [row["name"] for row in response.json()["data"]]
+
+        # matched through immutable_unaccent(lower(...)), like the GIN index
+        assert search("ZENITH") == ["Zénith"]
+        assert search("stadion") == ["Hallenstadion"]
+        assert search("bottom_line") == []
+
+    @override_settings(DEBUG=True)
+    def test_searchbuilder_groups(self):
+        params = {
+            "format": "custom",
+            "columns[0][data]": "event_id",
+            "columns[0][name]": "event_id",
+            "columns[1][data]": "venue",
+            "columns[1][name]": "venue.name",
+            "searchBuilder[logic]": "AND",
+            "searchBuilder[criteria][0][origData]": "event_id",
+            "searchBuilder[criteria][0][condition]": "starts",
+            "searchBuilder[criteria][0][value1]": "1978",
+            "searchBuilder[criteria][1][logic]": "OR",
+            "searchBuilder[criteria][1][criteria][0][origData]": "event_id",
+            "searchBuilder[criteria][1][criteria][0][condition]": "ends",
+            "searchBuilder[criteria][1][criteria][0][value1]": "-02",
+            "searchBuilder[criteria][1][criteria][1][origData]": "venue",
+            "searchBuilder[criteria][1][criteria][1][condition]": "=",
+            "searchBuilder[criteria][1][criteria][1][value1]": "Stone Pony",
+        }
+
+        response = self.client.get(reverse("api:event-list"), params)
+        plan = json.loads(response.headers["X-Search-Plan"])
+
+        assert [row["event_id"] for row in response.json()["data"]] == [
+            "19780919-02",
+        ]
+        assert plan["lookups"] == [
+            "event_id__istartswith",
+            "event_id__iendswith",
+            "venue__name__iexact",
+        ]
+        assert not plan["multivalued"]
+
+        params["searchBuilder[criteria][0][origData]"] = "unknown"
+        response = self.client.get(reverse("api:event-list"), params)
+
+        assert response.status_code == 400  # noqa: PLR2004
+
+    def test_searchbuilder_only_searches_shown_columns(self):
+        params = {
+            "format": "custom",
+            "columns[0][data]": "password",
+            "columns[0][name]": "user_event.user.password",
+            "searchBuilder[criteria][0][origData]": "password",
+            "searchBuilder[criteria][0][condition]": "starts",
+            "searchBuilder[criteria][0][value1]": "pbkdf2",
+        }
+
+        response = self.client.get(reverse("api:event-list"), params)
+        assert response.status_code == 400  # noqa: PLR2004
+
+        # a view without searchbuilder_fields can't be searched at all
+        params["columns[0][name]"] = "id"
+        params["searchBuilder[criteria][0][value1]"] = "1"
+
+        response = self.client.get(reverse("api:setlist_stats-list"), params)
+        assert response.status_code == 400  # noqa: PLR2004
+
+    def test_malformed_searchbuilder_keys_are_rejected(self):
+        for key in ("searchBuilder[x", "searchBuilder[]"):
+            response = self.client.get(
+                reverse("api:event-list"),
+                {"format": "custom", key: "AND"},
+            )
+            assert response.status_code == 400  # noqa: PLR2004
+
+    def test_to_many_search_rows_are_not_repeated(self):
+        for num, note in enumerate(["Acoustic", "Acoustic, solo piano"]):
+            SetlistNotes.objects.create(
+                setlist=self.setlist1,
+                event=self.event1,
+                num=num,
+                note=note,
+            )
+
+        response = self.client.get(
+            reverse("api:event-list"),
+            {
+                "format": "custom",
+                "columns[0][data]": "notes",
+                "columns[0][name]": "notes_event.note",
+                "columns[0][searchable]": "true",
+                "columns[0][orderable]": "true",
+                "columns[0][search][value]": "acoustic",
+                "order[0][column]": "0",
+            },
+        )
+
+        assert [row["event_id"] for row in response.json()["data"]] == [
+            self.event1.event_id,
+        ]
+
+    def test_filterset_to_many_rows_are_not_repeated(self):
+        relation = Relations.objects.create(
+            name="Relation",
+            start_date=self.event1.date,
+            end_date=self.event1.date,
+        )
+
+        # the same relation twice on one event, like a player on two bands
+        for band in (self.artist, Bands.objects.create(name="Other Band")):
+            Onstage.objects.create(event=self.event1, relation=relation, band=band)
+
+        response = self.client.get(
+            reverse("api:event-list"),
+            {"format": "custom", "relation": relation.id},
+        ).json()
+
+        assert response["recordsTotal"] == 1
+        assert [row["event_id"] for row in response["data"]] == [
+            self.event1.event_id,
+        ]
+
+    def test_filterset_annotations_and_ordering_are_kept(self):
+        relation = Relations.objects.create(
+            name="Relation",
+            start_date=self.event1.date,
+            end_date=self.event1.date,
+        )
+
+        for event in (self.event1, self.event2):
+            for band in (self.artist, Bands.objects.create(name=event.event_id)):
+                Onstage.objects.create(event=event, relation=relation, band=band)
+
+        request = Request(APIRequestFactory().get("/", {"format": "custom"}))
+        request.accepted_renderer = mock.Mock(format="custom")
+        view = EventViewSet(
+            request=request,
+            format_kwarg=None,
+            kwargs={},
+            action="list",
+        )
+
+        # like a FilterSet that joins the onstage rows and ranks the events
+        queryset = (
+            view.get_queryset()
+            .filter(onstage_event__relation=relation)
+            .annotate(rank=F("id") * 2)
+            .order_by("-event_id")
+        )
+
+        rows = DataTablesFilterBackend().filter_queryset(request, queryset, view)
+
+        assert list(rows.values_list("event_id", "rank")) == [
+            (self.event2.event_id, self.event2.id * 2),
+            (self.event1.event_id, self.event1.id * 2),
+        ]
+
+    def test_keyset_pages_match_offset_pages(self):
+        url = reverse("api:setlist-list")
+
+        expected = self.client.get(url, {"format": "custom", "length": "-1"}).json()
+
+        rows = []
+        cursor = ""
+
+        while cursor is not None:
+            page = self.client.get(
+                url,
+                {"format": "custom", "length": "1", "cursor": cursor},
+            ).json()
+
+            assert page["recordsTotal"] == expected["recordsTotal"]
+
+            rows.extend(row["id"] for row in page["data"])
+            cursor = page["next"]
+
+        assert rows == [row["id"] for row in expected["data"]]
+
+        response = self.client.get(url, {"format": "json", "cursor": "invalid"})
+        assert response.status_code == 404  # noqa: PLR2004
+
     def get_search_results(
         self,
         client,
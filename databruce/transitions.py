@@ -0,0 +1,81 @@
+"""Maintains `SetlistTransitions`, the song -> next song table.
+
+Setlist saves mark their event as dirty, and the transitions for every dirty
+event are rebuilt once the surrounding transaction commits. An admin save of
+a whole setlist through `SetlistInline` therefore refreshes each event once.
+"""
+
+import threading
+
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import Lead
+
+from databruce import data_version, models, setlist_index
+
+_state = threading.local()
+
+
+def transition_rows(event_ids: list[int] | None = None):
+    """Setlist rows annotated with the id of the next song in the same set."""
+    qs = models.Setlists.objects.filter(song_num__isnull=False)
+
+    if event_ids is not None:
+        qs = qs.filter(event_id__in=event_ids)
+
+    return qs.annotate(
+        next_song_id=Window(
+            Lead("song_id"),
+            partition_by=[F("event_id"), F("set_name")],
+            order_by=F("song_num").asc(),
+        ),
+    ).values("id", "event_id", "set_name", "song_id", "next_song_id", "segue")
+
+
+def refresh_transitions(event_ids: list[int] | None = None) -> int:
+    """Rebuild the transitions for the given events, or all of them."""
+    with transaction.atomic():
+        existing = models.SetlistTransitions.objects.all()
+
+        if event_ids is not None:
+            existing = existing.filter(
+                Q(event_id__in=event_ids) | Q(setlist__event_id__in=event_ids),
+            )
+
+        existing.delete()
+
+        created = models.SetlistTransitions.objects.bulk_create(
+            [
+                models.SetlistTransitions(
+                    setlist_id=row["id"],
+                    event_id=row["event_id"],
+                    set_name=row["set_name"],
+                    song_id=row["song_id"],
+                    next_song_id=row["next_song_id"],
+                    segue=row["segue"],
+                )
+                for row in transition_rows(event_ids)
+                if row["next_song_id"] is not None
+            ],
+            batch_size=5000,
+        )
+
+    setlist_index.invalidate()
+
+    return len(created)
+
+
+def mark_dirty(event_id: int) -> None:
+    """Queue an event for a transitions refresh after the current transaction."""
+    pending = _state.__dict__.setdefault("pending", set())
+    pending.add(event_id)
+
+    transaction.on_commit(_flush)
+
+
+def _flush() -> None:
+    pending = _state.__dict__.pop("pending", set())
+
+    if pending:
+        refresh_transitions(list(pending))
+        data_version.bump_version()
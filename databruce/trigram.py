@@ -0,0 +1,86 @@
+"""Trigram search indexes for the DataTables search boxes.
+
+`unaccent()` is only STABLE, so Postgres won't index it. Migration 0003
+wraps it in the IMMUTABLE `immutable_unaccent()`, and models declare
+`TrigramIndex("name", ...)` in `Meta.indexes`. That index is a `pg_trgm` GIN
+index over `immutable_unaccent(lower(name))`.
+
+The `search_contains` and `search_regex` lookups compare against that exact
+expression, so Postgres can answer them from the index instead of running
+`unaccent()` on every row. `api.filters.DataTablesFilterBackend` switches to
+them for any field listed by `indexed_fields()`.
+"""
+
+import functools
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models import CharField, F, Func, Lookup, TextField
+
+FUNCTION = "immutable_unaccent"
+
+
+class SearchText(Func):
+    """Lowercased, unaccented text, as stored in a `TrigramIndex`."""
+
+    function = FUNCTION
+    template = "%(function)s(lower(%(expressions)s))"
+    output_field = TextField()
+
+
+class TrigramIndex(GinIndex):
+    def __init__(self, field: str, *, name: str) -> None:
+        self.search_field = field
+
+        super().__init__(
+            OpClass(SearchText(F(field)), name="gin_trgm_ops"),
+            name=name,
+        )
+
+    def deconstruct(self):
+        path, _, _ = super().deconstruct()
+        return path, (self.search_field,), {"name": self.name}
+
+
+@functools.cache
+def indexed_fields(model) -> frozenset[str]:
+    return frozenset(
+        index.search_field
+        for index in model._meta.indexes  # noqa: SLF001
+        if isinstance(index, TrigramIndex)
+    )
+
+
+class SearchLookup(Lookup):
+    def get_rhs_sql(self, rhs: str, connection) -> str:
+        raise NotImplementedError
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+
+        sql = f"{FUNCTION}(lower({lhs})) {self.get_rhs_sql(rhs, connection)}"
+
+        return sql, (*lhs_params, *rhs_params)
+
+
+@CharField.register_lookup
+@TextField.register_lookup
+class SearchContains(SearchLookup):
+    """Case and accent insensitive substring match."""
+
+    lookup_name = "search_contains"
+
+    def get_rhs_sql(self, rhs: str, connection) -> str:
+        pattern = connection.pattern_esc.format(f"{FUNCTION}(lower({rhs}))")
+        return f"LIKE '%%' || {pattern} || '%%'"
+
+
+@CharField.register_lookup
+@TextField.register_lookup
+class SearchRegex(SearchLookup):
+    """Case and accent insensitive regex match."""
+
+    lookup_name = "search_regex"
+
+    def get_rhs_sql(self, rhs: str, connection) -> str:  # noqa: ARG002
+        return f"~* {rhs}"
@@ -3,7 +3,6 @@ import json
 import logging
 import os
 import re
-import zoneinfo
 from typing import Any
 
 from django.contrib import messages
@@ -14,17 +13,15 @@ from django.contrib.auth.tokens import (
     default_token_generator,
 )
 from django.contrib.auth.views import LoginView
-from django.contrib.postgres.aggregates import ArrayAgg
 from django.contrib.postgres.expressions import ArraySubquery
-from django.contrib.postgres.search import SearchRank, SearchVector
+from django.contrib.postgres.search import SearchRank
 from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.core.mail import send_mail
 from django.db.models import (
-    Count,
     Exists,
     F,
-    Min,
     OuterRef,
     Q,
     QuerySet,
@@ -46,7 +43,7 @@ from django.views.generic import TemplateView
 from django.views.generic.base import ContextMixin
 from shortener import shortener
 
-from databruce import models
+from databruce import data_version, event_pages, models, setlist_index
 from databruce.config import base
 from databruce.forms import (
     AdvancedEventSearch,
@@ -97,15 +94,8 @@ def event_search(request):
 
     results = (
         models.Events.objects.select_related("artist", "venue")
-        .annotate(
-            search=SearchVector("event_id", weight="A")
-            + SearchVector("date", weight="B")
-            + SearchVector("early_late", weight="B")
-            + SearchVector("artist__name", weight="C")
-            + SearchVector("venue__name", weight="D"),
-        )
-        .filter(search=query)
-        .annotate(rank=SearchRank(F("search"), query))
+        .filter(search_document__document=query)
+        .annotate(rank=SearchRank(F("search_document__document"), query))
         .values()
     )
 
@@ -142,12 +132,28 @@ class Index(PageTitleMixin, TemplateView):
         context = super().get_context_data(**kwargs)
 
         date = datetime.datetime.today()
-        month = date.month
-        day = date.day
 
+        # both are cached under the data version, the setlist per calendar day
+        context["latest_event"] = cache.get_or_set(
+            data_version.versioned_key("index:on_this_day", date.strftime("%m-%d")),
+            lambda: self.get_on_this_day(date),
+            timeout=60 * 60 * 24,
+        )
+
+        context.update(
+            cache.get_or_set(
+                data_version.versioned_key("index:counts"),
+                self.get_counts,
+                timeout=60 * 60 * 24,
+            ),
+        )
+
+        return context
+
+    def get_on_this_day(self, date: datetime.datetime) -> models.Setlists | None:
         event_filter = Q(
-            Q(event__date__month=month)
-            & Q(event__date__day=day)
+            Q(event__date__month=date.month)
+            & Q(event__date__day=date.day)
             & Q(event__artist__springsteen_band=True)
             & Q(set_name__in=VALID_SET_NAMES)
             & Q(event__setlist_certainty="Confirmed")
@@ -155,7 +161,7 @@ class Index(PageTitleMixin, TemplateView):
             & ~Q(event__tour_id__in=[25, 48]),
         )
 
-        queryset = (
+        return (
             models.Setlists.objects.select_related(
                 "event__artist",
                 "event__venue",
@@ -169,16 +175,15 @@ class Index(PageTitleMixin, TemplateView):
             .first()
         )
 
-        context["latest_event"] = queryset
-
-        context["event_count"] = models.Events.objects.count()
-        context["song_count"] = models.Songs.objects.count()
-        context["tour_count"] = models.Tours.objects.count()
-        context["venue_count"] = models.Venues.objects.count()
-        context["relation_count"] = models.Relations.objects.count()
-        context["band_count"] = models.Bands.objects.count()
-
-        return context
+    def get_counts(self) -> dict[str, int]:
+        return {
+            "event_count": models.Events.objects.count(),
+            "song_count": models.Songs.objects.count(),
+            "tour_count": models.Tours.objects.count(),
+            "venue_count": models.Venues.objects.count(),
+            "relation_count": models.Relations.objects.count(),
+            "band_count": models.Bands.objects.count(),
+        }
 
 
 class Song(PageTitleMixin, TemplateView):
@@ -575,120 +580,39 @@ class UserAddRemoveShow(View):
         return JsonResponse(result)
 
 
-class EventDetail(PageTitleMixin, TemplateView):
-    template_name = "databruce/events/detail.html"
-    description = "Event Detail"
+class EventPageMixin(PageTitleMixin):
+    """Context shared by the event detail pages, see `databruce.event_pages`."""
 
     def get_context_data(self, **kwargs: dict[str, Any]):
         context = super().get_context_data(**kwargs)
-
-        context["event"] = get_object_or_404(
-            models.Events.objects.select_related(
-                "venue",
-                "artist",
-                "tour",
-                "venue__city",
-            ).prefetch_related(
-                "leg",
-                "run",
-                "archive_links",
-                "nugs_event",
-                "release_event",
-                "event_type",
-            ),
-            event_id=self.kwargs["id"],
-        )
+        context.update(event_pages.get_page(self.kwargs["id"]))
 
         event = context["event"]
-        event_date = event.get_date()
-
-        venue = event.venue
-        venue_name = getattr(venue, "name", "Unknown Venue")
-
-        context["title"] = f"{event_date} - {venue_name}"
 
-        context["description"] = f"{event.summary}"
-
-        context["setlist_certainty"] = bool(
-            context["event"].setlist_certainty not in (None, "", "Unknown"),
-        )
-
-        if venue and venue.city and venue.city.timezone:
-            tz_target = venue.city.timezone
-        else:
-            tz_target = zoneinfo.ZoneInfo(base.TIME_ZONE)
-
-        context["scheduled_time"] = None
-        context["start_time"] = None
-        context["end_time"] = None
-        context["duration"] = None
-
-        if event.scheduled_time:
-            context["scheduled_time"] = (
-                event.scheduled_time.astimezone(tz_target).strftime("%I:%M%p").lower()
-            )
-
-        if event.start_time:
-            context["start_time"] = (
-                event.start_time.astimezone(tz_target).strftime("%I:%M%p").lower()
-            )
-
-        if event.end_time:
-            context["end_time"] = (
-                event.end_time.astimezone(tz_target).strftime("%I:%M%p").lower()
-            )
-
-        neighbor_qs = models.Events.objects.select_related("venue", "artist", "tour")
-
-        context["prev_event"] = (
-            neighbor_qs.filter(event_id__lt=event.event_id)
-            .order_by("-event_id")
-            .first()
-        )
-
-        context["next_event"] = (
-            neighbor_qs.filter(event_id__gt=event.event_id).order_by("event_id").first()
+        context["description"] = (
+            f"{event.get_date()}<br>{event.artist}<br>"
+            f"{getattr(event.venue, 'name', 'Unknown Venue')}"
         )
 
-        if not context["event"].date:
+        if not event.date:
             messages.info(
                 self.request,
                 "This is a placeholder date, actual date unknown.",
             )
 
-        user = self.request.user
+        context["user_attended"] = event_pages.user_attended(self.request.user, event)
+
+        return context
 
-        if user.is_authenticated:
-            context["user_attended"] = models.UserAttendedShows.objects.filter(
-                user_id=user.pk,
-                event_id=event.pk,
-            ).first()
 
-        if context["event"].run:
-            if context["event"].run.ticket_range:
-                context["ticket_range"] = [
-                    currency(float(x))
-                    for x in context["event"].run.ticket_range.split("/")  # type: ignore
-                ]
-            else:
-                context["ticket_range"] = [
-                    currency(context["event"].run.ticket_min),
-                    currency(context["event"].run.ticket_max),
-                ]
-        elif context["event"].ticket_range:
-            context["ticket_range"] = [
-                currency(float(x)) for x in context["event"].ticket_range.split("/")
-            ]
-        else:
-            context["ticket_range"] = [
-                currency(context["event"].ticket_min),
-                currency(context["event"].ticket_max),
-            ]
+@method_decorator(data_version.conditional, name="dispatch")
+class EventDetail(EventPageMixin, TemplateView):
+    template_name = "databruce/events/detail.html"
+    description = "Event Detail"
 
-        try:
-            context["ticket_range"] = " / ".join(context["ticket_range"])
-        except TypeError:
-            context["ticket_range"] = "- / -"
+    def get_context_data(self, **kwargs: dict[str, Any]):
+        context = super().get_context_data(**kwargs)
+        context["description"] = f"{context['event'].summary}"
 
         return context
 
@@ -700,147 +624,22 @@ class EventDetail(PageTitleMixin, TemplateView):
         return [self.template_name]
 
 
-class EventDetailMobile(PageTitleMixin, TemplateView):
+@method_decorator(data_version.conditional, name="dispatch")
+class EventDetailMobile(EventPageMixin, TemplateView):
     template_name = "databruce/event_mobile.html"
     description = "Event Detail"
 
-    def get_context_data(self, **kwargs: dict[str, Any]):
-        context = super().get_context_data(**kwargs)
-
-        context["event"] = get_object_or_404(
-            models.Events.objects.select_related(
-                "venue",
-                "artist",
-                "tour",
-                "venue__city",
-            ).prefetch_related("leg", "run"),
-            event_id=self.kwargs["id"],
-        )
-
-        event = context["event"]
-        event_date = event.get_date()
-
-        venue = event.venue
-        venue_name = getattr(venue, "name", "Unknown Venue")
 
-        context["title"] = f"{event_date} - {venue_name}"
-
-        context["description"] = (
-            f"{event_date}<br>{context['event'].artist}<br>{venue_name}"
-        )
-
-        if not context["event"].date:
-            messages.info(
-                self.request,
-                "This is a placeholder date, actual date unknown.",
-            )
-
-        return context
-
-
-class EventDetailTest(PageTitleMixin, TemplateView):
+@method_decorator(data_version.conditional, name="dispatch")
+class EventDetailTest(EventPageMixin, TemplateView):
     template_name = "databruce/event_test.html"
     description = "Event Detail"
 
     def get_context_data(self, **kwargs: dict[str, Any]):
         context = super().get_context_data(**kwargs)
 
-        context["event"] = get_object_or_404(
-            models.Events.objects.select_related(
-                "venue",
-                "artist",
-                "tour",
-                "venue__city",
-            )
-            .prefetch_related("leg", "run", "archive_links", "nugs_event")
-            .annotate(),
-            event_id=self.kwargs["id"],
-        )
-        event = context["event"]
-        event_date = event.get_date()
-
-        venue = event.venue
-        venue_name = getattr(venue, "name", "Unknown Venue")
-
-        context["title"] = f"{event_date} - {venue_name}"
-        context["description"] = f"{event_date}<br>{event.artist}<br>{venue_name}"
-
-        if context["event"].setlist_certainty in (None, "", "Unknown"):
-            context["setlist_certainty"] = False
-        else:
-            context["setlist_certainty"] = True
-
-        if venue and venue.city and venue.city.timezone:
-            tz_target = venue.city.timezone
-        else:
-            tz_target = zoneinfo.ZoneInfo(base.TIME_ZONE)
-
-        if event.scheduled_time:
-            context["scheduled_time"] = (
-                event.scheduled_time.astimezone(tz_target).strftime("%I:%M%p").lower()
-            )
-
-        if event.start_time:
-            context["start_time"] = (
-                event.start_time.astimezone(tz_target).strftime("%I:%M%p").lower()
-            )
-
-        if event.end_time:
-            context["end_time"] = (
-                event.end_time.astimezone(tz_target).strftime("%I:%M%p").lower()
-            )
-
-        if event.start_time and event.end_time and not event.length:
-            context["duration"] = event.end_time.astimezone(
-                tz_target,
-            ) - event.start_time.astimezone(tz_target)
-        elif event.length:
-            context["duration"] = event.length
-
-        neighbor_qs = models.Events.objects.select_related("venue", "artist", "tour")
-
-        context["prev_event"] = (
-            neighbor_qs.filter(event_id__lt=event.event_id)
-            .order_by("-event_id")
-            .first()
-        )
-
-        context["next_event"] = (
-            neighbor_qs.filter(event_id__gt=event.event_id).order_by("event_id").first()
-        )
-
-        if not context["event"].date:
-            messages.info(
-                self.request,
-                "This is a placeholder date, actual date unknown.",
-            )
-
-        context["official"] = (
-            models.Releases.objects.filter(
-                event__id=event.pk,
-            )
-            .prefetch_related("event")
-            .order_by("date")
-        )
-
-        context["official_tracks"] = (
-            models.ReleaseTracks.objects.filter(event__id=event.pk)
-            .select_related("release")
-            .prefetch_related("event")
-            .distinct("release_id", "release__date")
-            .order_by("release__date")
-        )
-
-        user = self.request.user
-
-        if user.is_authenticated:
-            context["user_attended"] = models.UserAttendedShows.objects.filter(
-                user=user.pk,
-                event__id=event.pk,
-            )
-
         context["users"] = models.UserAttendedShows.objects.filter(
-            event__id=event.pk,
+            event__id=context["event"].pk,
         )
 
         return context
@@ -881,6 +680,7 @@ class Venue(PageTitleMixin, TemplateView):
         return super().get_context_data(**kwargs)
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class VenueDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/locations/venues/detail.html"
 
@@ -927,6 +727,7 @@ class SongLyrics(PageTitleMixin, TemplateView):
         return super().get_context_data(**kwargs)
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class SongLyricDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/songs/lyric_detail.html"
 
@@ -949,6 +750,7 @@ class SongLyricDetail(PageTitleMixin, TemplateView):
         return context
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class SongDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/songs/detail.html"
 
@@ -956,7 +758,7 @@ class SongDetail(PageTitleMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         try:
             context["info"] = get_object_or_404(
-                models.Songs.objects.prefetch_related(
+                models.Songs.objects.select_related("stats").prefetch_related(
                     "album",
                     "last_event",
                 ),
@@ -964,7 +766,7 @@ class SongDetail(PageTitleMixin, TemplateView):
             )
         except KeyError:
             context["info"] = get_object_or_404(
-                models.Songs.objects.prefetch_related(
+                models.Songs.objects.select_related("stats").prefetch_related(
                     "album",
                     "last_event",
                 ),
@@ -984,64 +786,17 @@ class SongDetail(PageTitleMixin, TemplateView):
             .prefetch_related("setlist_position")
         )
 
-        context["positions"] = (
-            context["setlists"]
-            .filter(position__isnull=False)
-            .values("position")
-            .annotate(
-                count=Count("position"),
-                num=Min("song_num"),
-            )
-        ).order_by("num")
-
-        first_event = getattr(context["info"], "first_event", None)
-        first_event_id = first_event.event_id if first_event else None
-
-        last_event = getattr(context["info"], "last_event", None)
-        last_event_id = last_event.event_id if last_event else None
-
-        latest_event = (
-            models.Events.objects.filter(
-                is_stats_eligible=True,
-                setlist_event__isnull=False,
-            )
-            .order_by("-event_id")
-            .first()
-        )
-
-        if last_event_id and latest_event:
-            context["show_gap"] = models.Events.objects.filter(
-                event_id__gt=last_event_id,
-                event_id__lte=latest_event.event_id,
-                is_stats_eligible=True,
-            ).count()
-        else:
-            context["show_gap"] = 0
-
         context["lyrics"] = models.Lyrics.objects.filter(
             song_id=song.pk,
         ).order_by("id")
 
-        if first_event:
-            context["events_since_premiere"] = models.Events.objects.filter(
-                event_id__gt=first_event_id,
-            ).count()
-        else:
-            context["events_since_premiere"] = 0
-
-        if context["events_since_premiere"] > 0:
-            context["frequency"] = round(
-                (
-                    (
-                        context["info"].num_plays_public
-                        / context["events_since_premiere"]
-                    )
-                    * 100
-                ),
-                2,
-            )
-        else:
-            context["frequency"] = None
+        # maintained by databruce.song_stats, missing until the first refresh
+        stats = getattr(song, "stats", None)
+
+        context["positions"] = stats.positions if stats else []
+        context["show_gap"] = stats.show_gap if stats else 0
+        context["events_since_premiere"] = stats.events_since_premiere if stats else 0
+        context["frequency"] = stats.frequency if stats else None
 
         return context
 
@@ -1056,6 +811,7 @@ class Tour(PageTitleMixin, TemplateView):
     title = "Tours"
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class TourDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/tours/detail.html"
 
@@ -1178,19 +934,19 @@ class AdvancedSearchResults(PageTitleMixin, TemplateView):
 
     position_filters = {
         "show_opener": Q(is_opener=True),
-        "in_show": Q(set_name="show"),
-        "in_set_one": Q(set_name="set 1"),
-        "set_one_opener": Q(set_name="set 1", is_set_opener=True),
-        "set_one_closer": Q(set_name="set 1", is_set_closer=True),
-        "in_set_two": Q(set_name="set 2"),
-        "set_two_opener": Q(set_name="set 2", is_set_opener=True),
-        "set_two_closer": Q(set_name="set 2", is_set_closer=True),
+        "in_show": Q(set_name="Show"),
+        "in_set_one": Q(set_name="Set 1"),
+        "set_one_opener": Q(set_name="Set 1", is_set_opener=True),
+        "set_one_closer": Q(set_name="Set 1", is_set_closer=True),
+        "in_set_two": Q(set_name="Set 2"),
+        "set_two_opener": Q(set_name="Set 2", is_set_opener=True),
+        "set_two_closer": Q(set_name="Set 2", is_set_closer=True),
         "main_set_closer": Q(is_main_set_closer=True),
-        "encore_opener": Q(set_name="encore", is_set_opener=True),
-        "in_encore": Q(set_name="encore"),
-        "in_preshow": Q(set_name="pre-show"),
-        "in_recording": Q(set_name="recording"),
-        "in_soundcheck": Q(set_name="soundcheck"),
+        "encore_opener": Q(set_name="Encore", is_set_opener=True),
+        "in_encore": Q(set_name="Encore"),
+        "in_preshow": Q(set_name="Pre-Show"),
+        "in_recording": Q(set_name="Recording"),
+        "in_soundcheck": Q(set_name="Soundcheck"),
         "show_closer": Q(is_closer=True),
         "anywhere": Q(),  # No additional filters
         "premiere": Q(premiere=True),
@@ -1199,6 +955,8 @@ class AdvancedSearchResults(PageTitleMixin, TemplateView):
         "request": Q(sign_request=True),
     }
 
+    index = setlist_index.SetlistIndex(position_filters, VALID_SET_NAMES)
+
     def get(self, request, *args, **kwargs):
         event_form = self.form_class(self.request.GET)
         formset = self.formset_class(self.request.GET)
@@ -1218,38 +976,7 @@ class AdvancedSearchResults(PageTitleMixin, TemplateView):
 
         pos_choices = dict(formset.form.base_fields["position"].choices)  # type: ignore
 
-        next_song = (
-            models.Setlists.objects.select_related("song")
-            .filter(
-                set_name=OuterRef("set_name"),
-                event_id=OuterRef("event_id"),
-                song_num__gt=OuterRef("song_num"),
-            )
-            .order_by("event", "song_num")
-            .values("song_id")[:1]
-        )
-
-        setlist_qs = (
-            models.Setlists.objects.all()
-            .select_related("event", "song")
-            .values("event_id")
-            .annotate(
-                next_song=Subquery(next_song),
-            )
-        )
-
-        setlist_anywhere_qs = (
-            models.Setlists.objects.all()
-            .select_related("event", "song")
-            .values("event_id")
-            .annotate(
-                songs_list=ArrayAgg(
-                    "song_id",
-                    filter=Q(set_name__in=VALID_SET_NAMES),
-                    distinct=True,
-                ),
-            )
-        )
+        index = self.index.load()
 
         event_filter = event_form.get_filters()
         sl_filter = Q()
@@ -1290,73 +1017,39 @@ class AdvancedSearchResults(PageTitleMixin, TemplateView):
                 s1_name = song_map.get(str(form["song1"]).replace("'", ""))
 
                 choice_str = "is" if choice else "not"
-
-                condition = Q(song=form["song1"])
+                song1_id = int(str(form["song1"]).replace("'", ""))
 
                 summary = f"{s1_name} ({choice_str} anywhere)"
 
                 if pos == "followed_by" and form.get("song2"):
                     s2_name = song_map.get(str(form["song2"]).replace("'", ""))
 
-                    song2_condition = Q(
-                        next_song=form["song2"],
+                    matched_events = index.followed_by(
+                        song1_id,
+                        int(str(form["song2"]).replace("'", "")),
+                        choice,
                     )
 
-                    if not choice:
-                        song2_condition = ~song2_condition
-
-                    condition &= song2_condition
-
                     summary = f"{s1_name} ({choice_str} followed by) {s2_name}"
 
                 elif pos == "anywhere":
-                    condition = Q(
-                        songs_list__contains=[int(form["song1"].replace("'", ""))],
-                    )
-
-                    if not choice or choice is None:
-                        condition = ~Q(
-                            songs_list__contains=[int(form["song1"].replace("'", ""))],
-                        )
+                    matched_events = index.anywhere(song1_id, choice)
 
                 else:
-                    pos_filter = self.position_filters.get(pos)  # type: ignore
                     pos_display = pos_choices.get(pos)
 
-                    if not choice:
-                        condition &= ~pos_filter  # type: ignore
-                    else:
-                        condition &= pos_filter  # type: ignore
+                    matched_events = index.position(song1_id, pos, choice)  # type: ignore
 
                     summary = f"{s1_name} ({choice_str} {pos_display})"
 
-                # use different queryset for the anywhere position
-                if pos == "anywhere":
-                    matched_events = set(
-                        setlist_anywhere_qs.filter(condition).values_list(
-                            "event_id",
-                            flat=True,
-                        ),
-                    )
-
-                else:
-                    matched_events = set(
-                        setlist_qs.filter(condition).values_list("event_id", flat=True),
-                    )
-
                 event_search_queries.append(matched_events)
                 setlist_search_display_queries.append(summary)
 
-        final_events = set()
-
         if event_search_queries:
             conjunction = event_form.cleaned_data["conjunction"]
-            if conjunction == "or":
-                final_events = set.union(*event_search_queries)
-            else:
-                final_events = set.intersection(*event_search_queries)
+            final_events = setlist_index.combine(event_search_queries, conjunction)
 
-            event_filter &= Q(id__in=final_events)
+            event_filter &= Q(id__in=setlist_index.event_ids(final_events))
 
         context["events"] = (
             models.Events.objects.filter(event_filter)
@@ -1477,19 +1170,19 @@ class AdvSearch(PageTitleMixin, TemplateView):
 
     position_filters = {
         "show_opener": Q(is_opener=True),
-        "in_show": Q(set_name="show"),
-        "in_set_one": Q(set_name="set 1"),
-        "set_one_opener": Q(set_name="set 1", is_set_opener=True),
-        "set_one_closer": Q(set_name="set 1", is_set_closer=True),
-        "in_set_two": Q(set_name="set 2"),
-        "set_two_opener": Q(set_name="set 2", is_set_opener=True),
-        "set_two_closer": Q(set_name="set 2", is_set_closer=True),
+        "in_show": Q(set_name="Show"),
+        "in_set_one": Q(set_name="Set 1"),
+        "set_one_opener": Q(set_name="Set 1", is_set_opener=True),
+        "set_one_closer": Q(set_name="Set 1", is_set_closer=True),
+        "in_set_two": Q(set_name="Set 2"),
+        "set_two_opener": Q(set_name="Set 2", is_set_opener=True),
+        "set_two_closer": Q(set_name="Set 2", is_set_closer=True),
         "main_set_closer": Q(is_main_set_closer=True),
-        "encore_opener": Q(set_name="encore", is_set_opener=True),
-        "in_encore": Q(set_name="encore"),
-        "in_preshow": Q(set_name="pre-show"),
-        "in_recording": Q(set_name="recording"),
-        "in_soundcheck": Q(set_name="soundcheck"),
+        "encore_opener": Q(set_name="Encore", is_set_opener=True),
+        "in_encore": Q(set_name="Encore"),
+        "in_preshow": Q(set_name="Pre-Show"),
+        "in_recording": Q(set_name="Recording"),
+        "in_soundcheck": Q(set_name="Soundcheck"),
         "show_closer": Q(is_closer=True),
         "anywhere": Q(),  # No additional filters
         "premiere": Q(premiere=True),
@@ -1684,6 +1377,7 @@ class AdvSearch(PageTitleMixin, TemplateView):
         return context
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class RelationDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/relations/detail.html"
 
@@ -1706,6 +1400,7 @@ class Band(PageTitleMixin, TemplateView):
     title = "Bands"
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class BandDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/bands/detail.html"
 
@@ -1722,6 +1417,7 @@ class Release(PageTitleMixin, TemplateView):
     title = "Releases"
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class ReleaseDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/releases/detail.html"
 
@@ -1740,6 +1436,7 @@ class City(PageTitleMixin, TemplateView):
     title = "Cities"
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class CityDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/locations/cities/detail.html"
     queryset = models.Cities.objects.all().select_related("country")
@@ -1757,6 +1454,7 @@ class State(PageTitleMixin, TemplateView):
     title = "States"
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class StateDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/locations/states/detail.html"
     queryset = models.States.objects.select_related("country")
@@ -1774,6 +1472,7 @@ class Country(PageTitleMixin, TemplateView):
     title = "Countries"
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class CountryDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/locations/countries/detail.html"
     queryset = models.Countries.objects.select_related(
@@ -1849,6 +1548,7 @@ class EventTag(PageTitleMixin, TemplateView):
         return context
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class RunDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/events/run_detail.html"
     queryset = (
@@ -1892,6 +1592,7 @@ class TourLeg(PageTitleMixin, TemplateView):
     title = "Tour Legs"
 
 
+@method_decorator(data_version.conditional, name="dispatch")
 class TourLegDetail(PageTitleMixin, TemplateView):
     template_name = "databruce/tours/leg_detail.html"
     queryset = models.TourLegs.objects.all()
@@ -1,7 +1,99 @@
 # test_runner.py
+from django.apps import apps
 from django.db import connection
 from django.test.runner import DiscoverRunner
 
+# Stand-ins for the production views behind the unmanaged models. They are
+# plain views over the tables the tests seed, so every API endpoint can run
+# against them. The values are simplified, only the columns have to match.
+STAND_IN_VIEWS = {
+    "songs_page": """
+        SELECT
+        s.id,
+        lag(s.id) OVER (PARTITION BY s.event_id ORDER BY s.song_num) AS prev,
+        lead(s.id) OVER (PARTITION BY s.event_id ORDER BY s.song_num) AS next
+        FROM setlists s
+    """,
+    "setlist_positions": "SELECT id, position FROM setlists",
+    "setlist_tour_count": """
+        SELECT id, tour_num AS num, tour_total AS total FROM setlists
+    """,
+    "setlist_stats": """
+        SELECT
+        s.id,
+        s.song_num,
+        s.set_name,
+        s.event_id,
+        count(*) OVER (PARTITION BY s.event_id) AS total_event_songs,
+        s.is_opener AS global_first,
+        s.is_last_in_show AS global_last,
+        s.is_set_opener AS set_first,
+        s.is_set_closer AS set_last,
+        s.is_main_set_closer AS is_the_main_closer,
+        bool_or(s.set_name = 'Encore') OVER (PARTITION BY s.event_id)
+            AS show_has_encore,
+        s.last AS calc_gap,
+        s.last_time_played AS calc_last_ev_id,
+        s.premiere AS is_premiere,
+        s.debut AS is_debut,
+        NULL::boolean AS is_band_premiere,
+        s.tour_num,
+        s.tour_total
+        FROM setlists s
+    """,
+    "setlists_by_set_and_date": """
+        SELECT
+        min(s.id) AS id,
+        min(s.song_num) AS set_order,
+        s.event_id,
+        s.set_name,
+        string_agg(so.song_name, ', ' ORDER BY s.song_num) AS setlist,
+        string_agg(so.song_name, ', ' ORDER BY s.song_num) AS setlist_no_note
+        FROM setlists s
+        JOIN songs so ON so.id = s.song_id
+        GROUP BY s.event_id, s.set_name
+    """,
+    "setlist_entries": """
+        SELECT
+        s.event_id AS id,
+        s.event_id,
+        max(s.song_id) FILTER (WHERE s.is_opener) AS show_opener,
+        max(s.song_id) FILTER (WHERE s.set_name = 'Set 1' AND s.is_set_closer)
+            AS s1_closer,
+        max(s.song_id) FILTER (WHERE s.set_name = 'Set 2' AND s.is_set_opener)
+            AS s2_opener,
+        max(s.song_id) FILTER (WHERE s.is_main_set_closer) AS main_closer,
+        max(s.song_id) FILTER (WHERE s.set_name = 'Encore' AND s.is_set_opener)
+            AS encore_opener,
+        max(s.song_id) FILTER (WHERE s.is_closer) AS show_closer
+        FROM setlists s
+        GROUP BY s.event_id
+    """,
+    "onstage_band_members": """
+        SELECT
+        min(o.id) AS id,
+        o.relation_id,
+        o.band_id,
+        count(DISTINCT o.event_id)::integer AS count,
+        min(o.event_id) AS first,
+        max(o.event_id) AS last
+        FROM onstage o
+        WHERE o.band_id IS NOT NULL
+        GROUP BY o.relation_id, o.band_id
+    """,
+    "updates": """
+        SELECT
+        NULL::integer AS id,
+        NULL::text AS item_id,
+        NULL::text AS item,
+        NULL::text AS to_value,
+        NULL::text AS view,
+        NULL::text AS msg,
+        NULL::timestamptz AS created_at
+        WHERE false
+    """,
+}
+
 
 class PostgresViewTestRunner(DiscoverRunner):
     def setup_databases(self, **kwargs):
@@ -102,4 +194,39 @@ class PostgresViewTestRunner(DiscoverRunner):
                 base_data;
             """)
 
+        self.create_missing_tables()
+
         return config
+
+    def create_missing_tables(self):
+        """Create what the migrations leave out of the test database.
+
+        The migration state is behind the models: `types`, `tags` and
+        `event_tags` are never created and `event_types` has the columns of
+        `Types`. The unmanaged views get the stand-ins above, and
+        `event_types` is a table without foreign keys, so flushing the tables
+        it points at between tests isn't blocked by it.
+        """
+        existing = set(connection.introspection.table_names())
+
+        with connection.schema_editor() as editor:
+            for model in apps.get_app_config("databruce").get_models():
+                table = model._meta.db_table  # noqa: SLF001
+
+                if model._meta.managed and table not in existing:  # noqa: SLF001
+                    editor.create_model(model)
+
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS event_types CASCADE")
+            cursor.execute("""
+                CREATE TABLE event_types (
+                    id serial PRIMARY KEY,
+                    event_id integer NOT NULL,
+                    type_id integer NOT NULL,
+                    UNIQUE (event_id, type_id)
+                )
+            """)
+
+            for view, query in STAND_IN_VIEWS.items():
+                cursor.execute(f"DROP TABLE IF EXISTS {view} CASCADE")
+                cursor.execute(f"CREATE VIEW {view} AS {query}")